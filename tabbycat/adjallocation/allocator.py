@@ -1,11 +1,35 @@
+from participants.prefetch import annotate_weighted_scores
+
+
+def get_allocator_class(tournament):
+    """Returns the allocator class selected by the tournament's
+    `adj_allocator` preference."""
+    method = tournament.pref('adj_allocator')
+    if method == 'anneal':
+        from .anneal import SAAllocator
+        return SAAllocator
+    if method == 'anneal_parallel':
+        from .anneal import ParallelSAAllocator
+        return ParallelSAAllocator
+    from .hungarian import HungarianAllocator
+    return HungarianAllocator
+
+
+def allocate_adjudicators(round, alloc_class=None, **kwargs):
+    """Allocates adjudicators to the debates in `round` using `alloc_class`,
+    or if it's None, the allocator selected in the tournament's preferences.
+    Keyword arguments are passed to the allocator's constructor. Returns the
+    allocator, so that callers can inspect it after allocation."""
+    if alloc_class is None:
+        alloc_class = get_allocator_class(round.tournament)
 
-def allocate_adjudicators(round, alloc_class):
     if round.draw_status != round.STATUS_CONFIRMED:
         raise RuntimeError("Tried to allocate adjudicators on unconfirmed draw")
 
-    debates = round.debate_set.all()
-    adjs = list(round.active_adjudicators.all())
-    allocator = alloc_class(debates, adjs, round)
+    debates = round.debate_set_with_prefetches(ordering=(), teams=True, adjudicators=False,
+            speakers=False, divisions=False, venues=False)
+    adjs = list(annotate_weighted_scores(round.active_adjudicators.all(), round.feedback_weight))
+    allocator = alloc_class(debates, adjs, round, **kwargs)
 
     for alloc in allocator.allocate():
         alloc.save()
@@ -13,10 +37,13 @@ def allocate_adjudicators(round, alloc_class):
     round.adjudicator_status = round.STATUS_DRAFT
     round.save()
 
+    return allocator
+
 
 class Allocator(object):
     def __init__(self, debates, adjudicators, round):
         self.tournament = round.tournament
+        self.round = round
         self.debates = list(debates)
         self.adjudicators = adjudicators
 
@@ -1,208 +1,386 @@
-import math
-import random
-
-from .allocator import Allocator
-from .stab import StabAllocator
+"""Simulated annealing refinement of adjudicator allocations.
 
+The Hungarian allocator finds optimal allocations with respect to costs that
+depend on one adjudicator and one debate at a time, but can't account for
+relationships between adjudicators on the same panel (adjudicator-adjudicator
+conflicts and histories). The annealer here starts from the Hungarian
+allocation and swaps adjudicators between positions to reduce the total cost,
+including those relationships.
 
-class SAAllocator(Allocator):
-    SCORE_ADJ_TEAM_CONFLICT = 10000
-    SCORE_TARGET_PANEL = 800
-    SCORE_ADJ_TEAM_HISTORY = 100
-    SCORE_ADJ_ADJ_HISTORY = 30
+All state is held in flat integer lists, and all penalties are precomputed,
+so that each candidate swap costs a constant number of list and dict lookups
+(proportional to panel size)."""
 
-    MAX_TRIES = 3
+import logging
+import random
+from math import exp
+from timeit import default_timer as timer
+
+from .allocation import AdjudicatorAllocation
+from .conflicts import ConflictsAndHistories
+from .hungarian import HungarianAllocator
+from .parallel import anneal_restarts
+
+logger = logging.getLogger(__name__)
+
+# Cost of an adjudicator taking a slot they can't take. This is finite, so that
+# energy deltas are always well-defined.
+INELIGIBLE = 1e9
+
+
+class PanelAnnealer:
+    """Minimizes the total cost of an assignment of adjudicators to slots by
+    simulated annealing, where moves swap the occupants of two slots in
+    different debates. Adjudicators, slots and debates are all identified by
+    indices, and every slot has exactly one occupant; unallocated adjudicators
+    occupy slots in the "pool", which is identified by debate index -1.
+
+    The cost of a slot in debate `d` with row `k` occupied by adjudicator `a`
+    is `debate_costs[d][a] + row_costs[k][a]`, and additionally, any two
+    adjudicators `a` and `b` in the same debate cost `pair_costs[a].get(b, 0)`
+    (which must be symmetric). Slots in the pool cost nothing. Costs may be
+    INELIGIBLE to forbid an adjudicator from taking a slot.
+    """
+
+    # Number of moves between checks of the time and temperature
+    CHECK_INTERVAL = 1024
+
+    def __init__(self, occupants, slot_debates, slot_rows, debate_costs, row_costs, pair_costs):
+        self.occupants = list(occupants)
+        self.slot_debates = slot_debates
+        self.slot_rows = slot_rows
+        self.debate_costs = debate_costs
+        self.row_costs = row_costs
+        self.pair_costs = pair_costs
+
+        self.debate_slots = [[] for i in range(len(debate_costs))]
+        for s, d in enumerate(slot_debates):
+            if d >= 0:
+                self.debate_slots[d].append(s)
+
+    def energy(self, occupants=None):
+        """Returns the total cost of `occupants` (default: the current
+        state), computed from scratch."""
+        if occupants is None:
+            occupants = self.occupants
+        energy = 0
+        for s, (d, k) in enumerate(zip(self.slot_debates, self.slot_rows)):
+            if d >= 0:
+                a = occupants[s]
+                energy += self.debate_costs[d][a] + self.row_costs[k][a]
+        for slots in self.debate_slots:
+            for i, s in enumerate(slots):
+                pairs = self.pair_costs[occupants[s]]
+                for t in slots[i+1:]:
+                    energy += pairs.get(occupants[t], 0)
+        return energy
+
+    def anneal(self, max_temp, min_temp, time_limit=None, steps=None, seed=None):
+        """Runs the annealer, cooling exponentially from `max_temp` to
+        `min_temp` over `steps` moves or, if `steps` is None, `time_limit`
+        seconds. (Only a fixed number of steps is reproducible for a given
+        seed.) Leaves the best state found in `self.occupants`, and returns a
+        dict of statistics."""
+
+        if steps is None and time_limit is None:
+            raise ValueError("Either steps or time_limit must be specified")
+
+        rng = random.Random(seed)
+        rand = rng.random
+
+        # Local references for speed in the inner loop
+        occupants = self.occupants
+        slot_debates = self.slot_debates
+        slot_rows = self.slot_rows
+        debate_costs = self.debate_costs
+        row_costs = self.row_costs
+        pair_costs = self.pair_costs
+        debate_slots = self.debate_slots
+        nslots = len(occupants)
+
+        energy = self.energy()
+        start_energy = best_energy = energy
+        best_occupants = list(occupants)
+        moves = accepts = 0
+
+        start = timer()
+        ratio = min_temp / max_temp
+        temp = max_temp
+        done = nslots < 2
+
+        while not done:
+            # Update the temperature, and check whether we're finished
+            if steps is not None:
+                fraction = moves / steps
+            else:
+                fraction = (timer() - start) / time_limit
+            if fraction >= 1:
+                break
+            temp = max_temp * ratio ** fraction
+
+            for i in range(self.CHECK_INTERVAL):
+                moves += 1
+                s1 = int(rand() * nslots)
+                s2 = int(rand() * nslots)
+                d1 = slot_debates[s1]
+                d2 = slot_debates[s2]
+                if d1 == d2:
+                    continue
+
+                a = occupants[s1]
+                b = occupants[s2]
+                pairs_a = pair_costs[a]
+                pairs_b = pair_costs[b]
+                delta = 0
+
+                # b moves into s1
+                if d1 >= 0:
+                    costs = debate_costs[d1]
+                    row = row_costs[slot_rows[s1]]
+                    delta += costs[b] + row[b] - costs[a] - row[a]
+                    for t in debate_slots[d1]:
+                        if t != s1:
+                            c = occupants[t]
+                            delta += pairs_b.get(c, 0) - pairs_a.get(c, 0)
+
+                # a moves into s2
+                if d2 >= 0:
+                    costs = debate_costs[d2]
+                    row = row_costs[slot_rows[s2]]
+                    delta += costs[a] + row[a] - costs[b] - row[b]
+                    for t in debate_slots[d2]:
+                        if t != s2:
+                            c = occupants[t]
+                            delta += pairs_a.get(c, 0) - pairs_b.get(c, 0)
+
+                if delta <= 0 or rand() < exp(-delta / temp):
+                    occupants[s1] = b
+                    occupants[s2] = a
+                    energy += delta
+                    accepts += 1
+                    if energy < best_energy:
+                        best_energy = energy
+                        best_occupants[:] = occupants
+
+                if steps is not None and moves >= steps:
+                    done = True
+                    break
+
+        self.occupants = best_occupants
+        elapsed = timer() - start
+        stats = {
+            'moves': moves,
+            'accepts': accepts,
+            'seconds': elapsed,
+            'start_energy': start_energy,
+            'best_energy': best_energy,
+        }
+        logger.info("Annealed %d moves (%d accepted) in %.2f s (%.0f moves/s), energy %.2f -> %.2f",
+                moves, accepts, elapsed, moves / elapsed if elapsed else 0, start_energy, best_energy)
+        return stats
+
+
+class SAAllocator(HungarianAllocator):
+    """Allocates adjudicators using the Hungarian allocator, then refines the
+    allocation by simulated annealing (see PanelAnnealer), taking into account
+    adjudicator-adjudicator conflicts and histories within panels.
+
+    The annealer runs for `time_limit` seconds (default: the tournament's
+    `adj_anneal_time_limit` preference), or for exactly `steps` moves if
+    `steps` is given. `seed` seeds both the Hungarian allocator's shuffle and
+    the annealer."""
+
+    MAX_TEMP = 10.0
+    MIN_TEMP = 0.01
+
+    # Importance adjustments for voting positions: as in the Hungarian
+    # allocator, the third voting adjudicator can be slightly weaker, in the
+    # top half of panel debates only.
+    VOTING_ADJUSTMENTS = [0.0, 0.0, -1.0]
+    TRAINEE_ADJUSTMENT = -2.0
+
+    def __init__(self, *args, time_limit=None, steps=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if time_limit is None and steps is None:
+            time_limit = self.tournament.pref('adj_anneal_time_limit')
+        self.time_limit = time_limit
+        self.steps = steps
+
+    def calc_pair_costs(self, adjs):
+        """Returns a list of dicts, where `pair_costs[i][j]` is the penalty for
+        putting adjudicators `adjs[i]` and `adjs[j]` on the same panel, if it's
+        nonzero. Only conflicts and histories that exist are visited."""
+        ch = self.conflicts
+        index = {adj.id: i for i, adj in enumerate(adjs)}
+        by_institution = {}
+        for i, adj in enumerate(adjs):
+            by_institution.setdefault(adj.institution_id, []).append(i)
+
+        pair_costs = [dict() for adj in adjs]
+
+        def add(i, j, penalty):
+            if i is None or j is None or i == j:
+                return
+            pair_costs[i][j] = pair_costs[i].get(j, 0) + penalty
+            pair_costs[j][i] = pair_costs[j].get(i, 0) + penalty
+
+        conflicted = set()
+        for adj1_id, adj2_id in ch.adj_conflicts:
+            conflicted.add(frozenset((index.get(adj1_id), index.get(adj2_id))))
+        for adj_id, institution_id in ch.institution_conflicts:
+            for j in by_institution.get(institution_id, []):
+                conflicted.add(frozenset((index.get(adj_id), j)))
+        for pair in conflicted:
+            if len(pair) == 2:
+                add(*pair, penalty=self.conflict_penalty)
+
+        # adj_histories has both (a, b) and (b, a), so only take one of them
+        for (adj1_id, adj2_id), count in ch.adj_histories.items():
+            if adj1_id < adj2_id:
+                add(index.get(adj1_id), index.get(adj2_id), self.history_penalty * count)
+
+        return pair_costs
 
     def allocate(self, initial=None):
-        from .allocation import AdjudicatorAllocation
-
+        """Refines `initial`, a list of AdjudicatorAllocations, or if it's not
+        given, the allocation made by the Hungarian allocator."""
         if initial is None:
-            initial = StabAllocator(self.debates, self.adjudicators).allocate()
-
-        pairs = [(aa.debate, tuple(a[1] for a in aa)) for aa in initial]
-
-        top_bracket = pairs[0][0].bracket
-        bot_bracket = pairs[-1][0].bracket
-
-        # 4-0 - 5 brackets, needs 6 gaps
-        # 5-2
-
-        gaps = (top_bracket - bot_bracket) + 2
-
-        div = 3.0 / gaps
-
-        for debate, panel in pairs:
-            setattr(debate, 'target_panel', 2 + (debate.bracket - bot_bracket +
-                                                 1) * div)
-
-        print([d.target_panel for d, p in pairs])
-
-        self.state = dict(pairs)
-
-        self.anneal(800, 1, 1e4, self.state)
-
-        # i = 0
-        # while self.best_energy > 0 and i < self.MAX_TRIES:
-        #    self.anneal(100, 1, 1e3, self.best_state)
-        #    i += 1
+            initial = super().allocate()
+        else:
+            self.populate_adj_scores(self.adjudicators)
+            self.conflicts = ConflictsAndHistories(self.adjudicators, self.round)
+
+        annealer = self.build_annealer(initial)
+        occupants = self.run_annealer(annealer)
+        return self.make_allocations(occupants)
+
+    def build_annealer(self, initial):
+        """Returns a PanelAnnealer whose initial state is the allocation
+        `initial`. Also keeps what's needed to convert the annealer's state
+        back to allocations in `make_allocations()`."""
+        adjs = self._adjs = list(self.adjudicators)
+        debates = self.debates
+        adj_index = {adj.id: i for i, adj in enumerate(adjs)}
+        debate_index = {debate.id: i for i, debate in enumerate(debates)}
+
+        voting = self._voting = [adj._hungarian_score >= self.min_voting_score and not adj.trainee for adj in adjs]
+
+        panel_debates = sorted((aa.debate for aa in initial if aa.panellists),
+                key=lambda debate: (-debate.importance, debate.room_rank))
+        top_half = {debate.id for debate in panel_debates[:(len(panel_debates) + 1) // 2]}
+
+        # Build slots from the initial allocation
+        occupants = []
+        slot_debates = []
+        slot_adjustments = []
+        allocated = set()
+        for aa in initial:
+            d = debate_index[aa.debate.id]
+            voters = [aa.chair] + list(aa.panellists) if aa.chair else list(aa.panellists)
+            for k, adj in enumerate(voters):
+                occupants.append(adj_index[adj.id])
+                slot_debates.append(d)
+                if aa.debate.id in top_half:
+                    slot_adjustments.append(self.VOTING_ADJUSTMENTS[min(k, len(self.VOTING_ADJUSTMENTS) - 1)])
+                else:
+                    slot_adjustments.append(0.0)
+            for adj in aa.trainees:
+                occupants.append(adj_index[adj.id])
+                slot_debates.append(d)
+                slot_adjustments.append(None)
+            allocated.update(adj.id for adj in aa.all())
+
+        for i, adj in enumerate(adjs):
+            if adj.id not in allocated:
+                occupants.append(i)
+                slot_debates.append(-1)
+                slot_adjustments.append(None)
+
+        # Precompute costs
+        debate_costs = [[self.calc_penalty(debate, adj) for adj in adjs] for debate in debates]
+
+        rows = {}
+        row_costs = []
+        slot_rows = []
+        self._slot_debates = slot_debates
+        for d, adjustment in zip(slot_debates, slot_adjustments):
+            if d < 0:
+                slot_rows.append(-1)
+                continue
+            is_trainee_slot = adjustment is None
+            impt = debates[d].importance + 3 + (self.TRAINEE_ADJUSTMENT if is_trainee_slot else adjustment)
+            key = (impt, is_trainee_slot)
+            if key not in rows:
+                rows[key] = len(row_costs)
+                row_costs.append([INELIGIBLE if voting[i] == is_trainee_slot else self.calc_score_cost(impt, adj)
+                                  for i, adj in enumerate(adjs)])
+            slot_rows.append(rows[key])
+
+        pair_costs = self.calc_pair_costs(adjs)
+
+        return PanelAnnealer(occupants, slot_debates, slot_rows, debate_costs, row_costs, pair_costs)
+
+    def run_annealer(self, annealer):
+        """Runs `annealer` and returns the best state found."""
+        annealer.anneal(self.MAX_TEMP, self.MIN_TEMP, time_limit=self.time_limit, steps=self.steps, seed=self.seed)
+        return annealer.occupants
+
+    def make_allocations(self, occupants):
+        """Converts a state of the annealer built by `build_annealer()` to a
+        list of AdjudicatorAllocations."""
+        adjs = self._adjs
+        voting = self._voting
+        debates = self.debates
+
+        voting_panels = [[] for debate in debates]
+        trainee_panels = [[] for debate in debates]
+        for s, a in enumerate(occupants):
+            d = self._slot_debates[s]
+            if d < 0:
+                continue
+            if voting[a]:
+                voting_panels[d].append(adjs[a])
+            else:
+                trainee_panels[d].append(adjs[a])
 
         result = []
-        for debate, panel in list(self.best_state.items()):
-            aa = AdjudicatorAllocation(debate)
-            panel = list(panel)
-            panel.sort(key=lambda x: x.score, reverse=True)
-
-            aa.chair = panel.pop(0)
-            aa.panel = panel
+        for debate, panel, trainees in zip(debates, voting_panels, trainee_panels):
+            if not panel:
+                continue
+            # As in the Hungarian allocator, the chair is the highest-ranked
+            # adjudicator on the panel
+            panel.sort(key=lambda adj: adj._hungarian_score, reverse=True)
+            aa = AdjudicatorAllocation(debate, chair=panel[0], panellists=panel[1:], trainees=trainees)
             result.append(aa)
 
         return result
 
-    def save_best(self):
-        self.best_energy = self.energy
-        self.best_state = dict(self.state)
-
-    def anneal(self, steps, min_temp, max_temp, state):
-
-        self.energy = self.calc_energy(state)
-        print("start energy", self.energy)
-        self.save_best()
-        tf = -math.log(float(max_temp) / min_temp)
-
-        accepts = 0
-        improves = 0
-
-        for i in range(steps):
-
-            temp = max_temp * math.exp(tf * i/steps)
-
-            diff, swap = self.candidate_swap()
-            if diff < 0 or math.exp(-diff / temp) > random.random():
-                accepts += 1
-                self.energy += diff
-                self.apply_swap(swap)
-
-                if diff < 0:
-                    improves += 1
-
-                    if self.energy < self.best_energy:
-                        self.save_best()
-                        if self.energy == 0:
-                            break
-
-        print("accepts", accepts, "improves", improves)
-        print("end energy", self.best_energy)
-        print("end energy", self.calc_energy(self.best_state))
-        print(self.best_state)
-
-    def calc_energy(self, state):
-        return sum(self.score(debate, panel) for debate, panel in list(state.items()))
-
-    def candidate_swap(self):
-        meth = random.choice((self.panel_swap, self.member_swap))
-        return meth()
-
-    def member_swap(self):
-        d1 = random.choice(list(self.state.keys()))
-        panel1 = self.state[d1]
-        a1 = random.choice(panel1)
-
-        d2 = d1
-        panel2 = self.state[d2]
-
-        while d1 == d2 or len(panel1) != len(panel2):
-            d2 = random.choice(list(self.state.keys()))
-            panel2 = self.state[d2]
-            a2 = random.choice(panel2)
-
-        assert len(panel1) == len(panel2)
-
-        idx1 = panel1.index(a1)
-        new_panel1 = panel1[:idx1] + (a2,) + panel1[idx1+1:]
-        idx2 = panel2.index(a2)
-        new_panel2 = panel2[:idx2] + (a1,) + panel2[idx2+1:]
-
-        curr_score = self.score(d1, panel1) + self.score(d2, panel2)
-        new_score = self.score(d1, new_panel1) + self.score(d2, new_panel2)
-        diff = new_score - curr_score
-        swap = ((d1, new_panel1), (d2, new_panel2))
-
-        return diff, swap
-
-    def panel_swap(self):
-
-        # panel swap
-        d1 = random.choice(list(self.state.keys()))
-        d2 = d1
-        panel1 = self.state[d1]
-        panel2 = self.state[d2]
-
-        while d2 == d1 or len(panel1) != len(panel2):
-            d2 = random.choice(list(self.state.keys()))
-            panel2 = self.state[d2]
-
-        curr_score = self.score(d1, panel1) + self.score(d2, panel2)
-        new_score = self.score(d2, panel1) + self.score(d1, panel2)
-
-        diff = new_score - curr_score
-        swap = ((d2, panel1), (d1, panel2))
-
-        return diff, swap
-
-    def apply_swap(self, swap):
-        for debate, panel in swap:
-            self.state[debate] = panel
-
-    def score(self, debate, panel):
-        score = sum(getattr(self, f)(debate, panel) for f in dir(self) if f.startswith('score_'))
-        return score
-
-    def score_adj_team_conflict(self, debate, panel):
-        score = 0
-
-        for adj in panel:
-            score += self.SCORE_ADJ_TEAM_CONFLICT * adj.conflicts_with_team(debate.aff_team)
-            score += self.SCORE_ADJ_TEAM_CONFLICT * adj.conflicts_with_team(debate.neg_team)
-        return score
-
-    def score_adj_team_history(self, debate, panel):
-        score = 0
-
-        for adj in panel:
-            adj_impt = (6 - adj.score)
-            score += self.SCORE_ADJ_TEAM_HISTORY * adj.seen_team(debate.aff_team) * adj_impt
-            score += self.SCORE_ADJ_TEAM_HISTORY * adj.seen_team(debate.neg_team) * adj_impt
-
-        return score
-
-    def score_adj_adj_history(self, debate, panel):
-        score = 0
-
-        for i, adj in enumerate(panel):
-            for j in range(i+1, len(panel)):
-                score += self.SCORE_ADJ_ADJ_HISTORY * adj.seen_adjudicator(panel[j])
-
-        return score
-
-    def score_target_panel_strength(self, debate, panel):
-        avg = sum(p.score for p in panel) / len(panel)
-        diff = abs(debate.target_panel - avg)
-
-        return self.SCORE_TARGET_PANEL * diff * debate.target_panel * avg
-
-
-def test():
-    from tournaments.models import Round
-    from adjallocation.stab import StabAllocator
-
-    r = Round.objects.get(pk=4)
-    debates = r.debates()
-    adjs = list(r.active_adjudicators.all())
-
-    initial = StabAllocator(debates, adjs).allocate()
-
-    sa = SAAllocator(debates, adjs).allocate(initial)
-    print(sa)
 
-if __name__ == '__main__':
-    test()
+class ParallelSAAllocator(SAAllocator):
+    """Like SAAllocator, but runs `restarts` independent annealing runs with
+    different seeds, and keeps the best. `restarts` defaults to the
+    tournament's `adj_anneal_restarts` preference. The runs share the time
+    limit, so this takes about as long as a single run.
+
+    The runs happen one after another in this process, unless `processes` is
+    greater than 1, in which case they run on a pool of processes. Pools
+    shouldn't be used while handling web requests; the allocateadjudicators
+    management command uses them.
+
+    After allocation, `self.summary` holds a summary of the costs of all
+    restarts and the wall time (see adjallocation.parallel)."""
+
+    def __init__(self, *args, restarts=None, processes=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        if restarts is None:
+            restarts = self.tournament.pref('adj_anneal_restarts')
+        self.restarts = max(restarts, 1)
+        self.processes = processes
+        self.summary = None
+
+    def run_annealer(self, annealer):
+        base = self.seed if self.seed is not None else self.rng.randrange(2**32)
+        seeds = [base + k for k in range(self.restarts)]
+        occupants, self.summary = anneal_restarts(annealer, seeds, self.processes, max_temp=self.MAX_TEMP,
+                min_temp=self.MIN_TEMP, time_limit=self.time_limit, steps=self.steps)
+        return occupants
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AdjAllocationConfig(AppConfig):
     name = 'adjallocation'
     verbose_name = "Adjudicator Allocation"
+
+    def ready(self):
+        from . import signals  # noqa: F401
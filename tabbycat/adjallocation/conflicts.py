@@ -0,0 +1,81 @@
+"""Bulk-loaded conflict and history information for adjudicator allocation."""
+
+import logging
+
+from django.db.models import Q
+
+from draw.models import DebateTeam
+
+from .models import AdjudicatorAdjudicatorConflict, AdjudicatorConflict, AdjudicatorInstitutionConflict, DebateAdjudicator
+
+logger = logging.getLogger(__name__)
+
+
+class ConflictsAndHistories:
+    """Loads all conflicts and histories relevant to allocating `adjudicators`
+    in `round` in a fixed number of queries, and answers the same questions as
+    `Adjudicator.conflicts_with_team()`, `Adjudicator.conflicts_with_adj()`,
+    `Adjudicator.seen_team()` and `Adjudicator.seen_adjudicator()` without
+    further database access.
+
+    Histories only include debates in rounds of the same tournament before
+    `round`."""
+
+    def __init__(self, adjudicators, round):
+        adj_ids = [adj.id for adj in adjudicators]
+
+        self.team_conflicts = set(AdjudicatorConflict.objects.filter(
+            adjudicator_id__in=adj_ids).values_list('adjudicator_id', 'team_id'))
+        self.institution_conflicts = set(AdjudicatorInstitutionConflict.objects.filter(
+            adjudicator_id__in=adj_ids).values_list('adjudicator_id', 'institution_id'))
+
+        # Adjudicator-adjudicator conflicts are symmetric
+        self.adj_conflicts = set()
+        for adj1, adj2 in AdjudicatorAdjudicatorConflict.objects.filter(
+                Q(adjudicator_id__in=adj_ids) | Q(conflict_adjudicator_id__in=adj_ids)).values_list(
+                'adjudicator_id', 'conflict_adjudicator_id'):
+            self.adj_conflicts.add((adj1, adj2))
+            self.adj_conflicts.add((adj2, adj1))
+
+        # Group past seatings by debate
+        adjs_by_debate = {}
+        for debate_id, adj_id in DebateAdjudicator.objects.filter(
+                debate__round__tournament_id=round.tournament_id,
+                debate__round__seq__lt=round.seq).values_list('debate_id', 'adjudicator_id'):
+            adjs_by_debate.setdefault(debate_id, []).append(adj_id)
+        teams_by_debate = {}
+        for debate_id, team_id in DebateTeam.objects.filter(
+                debate__round__tournament_id=round.tournament_id,
+                debate__round__seq__lt=round.seq).values_list('debate_id', 'team_id'):
+            teams_by_debate.setdefault(debate_id, []).append(team_id)
+
+        self.team_histories = {}
+        self.adj_histories = {}
+        for debate_id, debate_adj_ids in adjs_by_debate.items():
+            for adj_id in debate_adj_ids:
+                for team_id in teams_by_debate.get(debate_id, []):
+                    key = (adj_id, team_id)
+                    self.team_histories[key] = self.team_histories.get(key, 0) + 1
+                for other_id in debate_adj_ids:
+                    if other_id != adj_id:
+                        key = (adj_id, other_id)
+                        self.adj_histories[key] = self.adj_histories.get(key, 0) + 1
+
+        logger.debug("Loaded %d team, %d institution and %d adjudicator conflicts, and histories from %d debates",
+                len(self.team_conflicts), len(self.institution_conflicts), len(self.adj_conflicts) // 2,
+                len(adjs_by_debate))
+
+    def conflicts_with_team(self, adj, team):
+        return (adj.id, team.id) in self.team_conflicts or \
+            (adj.id, team.institution_id) in self.institution_conflicts
+
+    def conflicts_with_adj(self, adj1, adj2):
+        return (adj1.id, adj2.id) in self.adj_conflicts or \
+            (adj1.id, adj2.institution_id) in self.institution_conflicts or \
+            (adj2.id, adj1.institution_id) in self.institution_conflicts
+
+    def seen_team(self, adj, team):
+        return self.team_histories.get((adj.id, team.id), 0)
+
+    def seen_adjudicator(self, adj1, adj2):
+        return self.adj_histories.get((adj1.id, adj2.id), 0)
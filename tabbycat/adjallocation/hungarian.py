@@ -2,18 +2,25 @@ import logging
 import random
 from math import exp
 
-from munkres import Munkres
-
 from .allocation import AdjudicatorAllocation
 from .allocator import Allocator
+from .conflicts import ConflictsAndHistories
+from .solvers import get_assignment_solver
 
 logger = logging.getLogger(__name__)
 
 
 class HungarianAllocator(Allocator):
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, solver=None, seed=None, **kwargs):
+        """`solver` is the name of the assignment solver to use (see
+        adjallocation.solvers), or None to use the best available. `seed`
+        seeds the shuffle that breaks ties between equally-scored
+        adjudicators, for reproducible allocations."""
         super().__init__(*args, **kwargs)
+        self.solver = get_assignment_solver(solver)
+        self.seed = seed
+        self.rng = random.Random(seed)
         t = self.tournament
         self.min_score = t.pref('adj_min_score')
         self.max_score = t.pref('adj_max_score')
@@ -26,48 +33,78 @@ class HungarianAllocator(Allocator):
         self.feedback_weight = t.current_round.feedback_weight
 
     def populate_adj_scores(self, adjudicators):
+        score_min = self.min_score
+        score_range = self.max_score - score_min
         for adj in adjudicators:
             adj._hungarian_score = adj.weighted_score(self.feedback_weight)
 
-    def calc_cost(self, debate, adj, adjustment=0, chair=None):
+            # Normalise adj scores to the 0-5 range expected
+            normalised_adj_score = (adj._hungarian_score - score_min) / score_range * 5 + 0
+            if normalised_adj_score > 5.0:
+                logger.warning("%s's score %s is larger than the range" % (adj.name, adj._hungarian_score))
+            elif normalised_adj_score < 0.0:
+                logger.warning("%s's score %s is smaller than the range" % (adj.name, adj._hungarian_score))
+
+    def calc_penalty(self, debate, adj, chair=None):
+        """Returns the conflict and history penalty for allocating `adj` to
+        `debate`, and, if `chair` is given, alongside `chair`."""
+        ch = self.conflicts
+        penalty = 0
+        for team in (debate.aff_team, debate.neg_team):
+            penalty += self.conflict_penalty * ch.conflicts_with_team(adj, team)
+            penalty += self.history_penalty * ch.seen_team(adj, team)
+        if chair:
+            penalty += self.conflict_penalty * ch.conflicts_with_adj(adj, chair)
+            penalty += self.history_penalty * ch.seen_adjudicator(adj, chair)
+        return penalty
+
+    def calc_score_cost(self, importance, adj):
+        """Returns the cost of allocating `adj` to a position of the given
+        (normalised and adjusted) importance."""
         cost = 0
+        diff = 5 + importance - adj._hungarian_score
+        if diff > 0.25:
+            cost += 1000 * exp(diff - 0.25)
+        cost += self.max_score - adj._hungarian_score
+        return cost
 
-        # Normalise debate importances back to the 1-5 (not ±2) range expected
-        normalised_importance = debate.importance + 3
+    def calc_cost_matrix(self, debates, adjs, adjustments, chairs=None):
+        """Returns a cost matrix with one row for each element of
+        `adjustments` for each debate in `debates` (in that order), and one
+        column for each adjudicator in `adjs`.
 
-        # Similarly normalise adj scores to the 0-5 range expected
-        score_min = self.min_score
-        score_range = self.max_score - score_min
-        normalised_adj_score = (adj._hungarian_score - score_min) / score_range * 5 + 0
+        `adjustments` is a function taking the index of a debate and returning
+        a list of importance adjustments, one for each position on the debate.
+        `chairs`, if given, is a list of chairs corresponding to `debates`.
 
-        if normalised_adj_score > 5.0:
-            logger.warning("%s's score %s is larger than the range" % (adj.name, adj._hungarian_score))
-        elif normalised_adj_score < 0.0:
-            logger.warning("%s's score %s is smaller than the range" % (adj.name, adj._hungarian_score))
+        Penalties are computed once per debate and score costs once per
+        distinct importance, then the two are summed for each row."""
 
-        cost += self.conflict_penalty * adj.conflicts_with_team(debate.aff_team)
-        cost += self.conflict_penalty * adj.conflicts_with_team(debate.neg_team)
-        cost += self.history_penalty * adj.seen_team(debate.aff_team, debate.round)
-        cost += self.history_penalty * adj.seen_team(debate.neg_team, debate.round)
-        if chair:
-            cost += self.conflict_penalty * adj.conflicts_with_adj(chair)
-            cost += self.history_penalty * adj.seen_adjudicator(chair, debate.round)
+        score_rows = {}
+        cost_matrix = []
 
-        impt = normalised_importance + adjustment
-        diff = 5 + impt - adj._hungarian_score
-        if diff > 0.25:
-            cost += 1000 * exp(diff - 0.25)
+        for i, debate in enumerate(debates):
+            chair = chairs[i] if chairs else None
+            penalty_row = [self.calc_penalty(debate, adj, chair) for adj in adjs]
 
-        cost += self.max_score - adj._hungarian_score
+            # Normalise debate importances back to the 1-5 (not ±2) range expected
+            normalised_importance = debate.importance + 3
 
-        return cost
+            for adjustment in adjustments(i):
+                impt = normalised_importance + adjustment
+                if impt not in score_rows:
+                    score_rows[impt] = [self.calc_score_cost(impt, adj) for adj in adjs]
+                cost_matrix.append([p + s for p, s in zip(penalty_row, score_rows[impt])])
+
+        return cost_matrix
 
     def allocate(self):
         self.populate_adj_scores(self.adjudicators)
+        self.conflicts = ConflictsAndHistories(self.adjudicators, self.round)
 
         # Sort voting adjudicators in descending order by score
         voting = [a for a in self.adjudicators if a._hungarian_score >= self.min_voting_score and not a.trainee]
-        random.shuffle(voting)
+        self.rng.shuffle(voting)
         voting.sort(key=lambda a: a._hungarian_score, reverse=True)
 
         # Divide into solos, panellists and trainees
@@ -106,17 +143,12 @@ class HungarianAllocator(Allocator):
                     "(less than %d)", len(panel_debates), len(panellists), len(panel_debates) * 3)
 
         # Allocate solos
-        m = Munkres()
-
         if len(solos) > 0:
             logger.info("costing solos")
-            cost_matrix = []
-            for debate in solo_debates:
-                row = [self.calc_cost(debate, adj) for adj in solos]
-                cost_matrix.append(row)
+            cost_matrix = self.calc_cost_matrix(solo_debates, solos, lambda i: [0])
 
             logger.info("optimizing solos (matrix size: %d positions by %d adjudicators)", len(cost_matrix), len(cost_matrix[0]))
-            indexes = m.compute(cost_matrix)
+            indexes = self.solver.compute(cost_matrix)
             total_cost = sum(cost_matrix[i][j] for i, j in indexes)
             logger.info('total cost for %d solo debates: %f', len(solos), total_cost)
 
@@ -132,17 +164,16 @@ class HungarianAllocator(Allocator):
         # Allocate panellists
         if len(panellists) > 0 and len(panel_debates) > 0:
             logger.info("costing panellists")
-            cost_matrix = []
-            for i, debate in enumerate(panel_debates):
-                for j in range(3):
-                    # for the top half of these debates, the final panellist
-                    # can be of lower quality than the other 2
-                    adjustment = -1.0 if i < len(panel_debates)/2 and j == 2 else 0.0
-                    row = [self.calc_cost(debate, adj, adjustment) for adj in panellists]
-                    cost_matrix.append(row)
+
+            # for the top half of these debates, the final panellist
+            # can be of lower quality than the other 2
+            def adjustments(i):
+                return [0.0, 0.0, -1.0 if i < len(panel_debates)/2 else 0.0]
+
+            cost_matrix = self.calc_cost_matrix(panel_debates, panellists, adjustments)
 
             logger.info("optimizing panellists (matrix size: %d positions by %d adjudicators)", len(cost_matrix), len(cost_matrix[0]))
-            indexes = m.compute(cost_matrix)
+            indexes = self.solver.compute(cost_matrix)
             total_cost = sum(cost_matrix[i][j] for i, j in indexes)
             logger.info('total cost for %d panel debates: %f', len(panel_debates), total_cost)
 
@@ -172,14 +203,11 @@ class HungarianAllocator(Allocator):
             allocation_by_debate = {aa.debate: aa for aa in alloc}
 
             logger.info("costing trainees")
-            cost_matrix = []
-            for debate in solo_debates:
-                chair = allocation_by_debate[debate].chair
-                row = [self.calc_cost(debate, adj, adjustment=-2.0, chair=chair) for adj in trainees]
-                cost_matrix.append(row)
+            chairs = [allocation_by_debate[debate].chair for debate in solo_debates]
+            cost_matrix = self.calc_cost_matrix(solo_debates, trainees, lambda i: [-2.0], chairs=chairs)
 
             logger.info("optimizing trainees (matrix size: %d positions by %d trainees)", len(cost_matrix), len(cost_matrix[0]))
-            indexes = m.compute(cost_matrix)
+            indexes = self.solver.compute(cost_matrix)
             total_cost = sum(cost_matrix[i][j] for i, j in indexes)
             logger.info('total cost for %d trainees: %f', len(solos), total_cost)
 
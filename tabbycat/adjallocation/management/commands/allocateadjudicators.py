@@ -0,0 +1,38 @@
+from multiprocessing import cpu_count
+
+from django.core.management.base import CommandError
+
+from adjallocation.allocator import allocate_adjudicators
+from adjallocation.anneal import ParallelSAAllocator
+from adjallocation.parallel import describe_summary
+from utils.management.base import RoundCommand
+
+
+class Command(RoundCommand):
+
+    help = "Allocates adjudicators to all debates in a round (or rounds), using simulated annealing with " \
+           "restarts run on several processes. This replaces any existing allocation."
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument("--processes", type=int, default=cpu_count(),
+            help="Number of processes to run restarts on (default: number of CPUs, {:d})".format(cpu_count()))
+        parser.add_argument("--restarts", type=int, default=None,
+            help="Number of annealing runs (default: the tournament's adj_anneal_restarts preference)")
+        parser.add_argument("--time-limit", type=float, default=None,
+            help="Time limit for all runs together, in seconds "
+                 "(default: the tournament's adj_anneal_time_limit preference)")
+        parser.add_argument("--seed", type=int, default=None,
+            help="Seed for the random number generator")
+
+    def handle_round(self, round, **options):
+        if options["processes"] < 1:
+            raise CommandError("--processes must be at least 1")
+        if round.draw_status != round.STATUS_CONFIRMED:
+            raise CommandError("The draw for round '{}' isn't confirmed".format(round.name))
+
+        self.stdout.write("Allocating adjudicators for all debates in round '{}' on {:d} processes...".format(
+            round.name, options["processes"]))
+        allocator = allocate_adjudicators(round, ParallelSAAllocator, processes=options["processes"],
+                restarts=options["restarts"], time_limit=options["time_limit"], seed=options["seed"])
+        self.stdout.write(describe_summary(allocator.summary))
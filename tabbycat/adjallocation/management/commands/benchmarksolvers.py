@@ -0,0 +1,67 @@
+import random
+from math import exp
+from timeit import default_timer as timer
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adjallocation.solvers import ASSIGNMENT_SOLVERS, get_assignment_solver
+
+
+class Command(BaseCommand):
+
+    help = "Compares the speed of assignment solvers on synthetic panellist cost " \
+           "matrices, shaped like those built by the Hungarian allocator"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--debates", type=int, nargs="+", default=[50, 150, 400],
+            help="Numbers of debates in synthetic rounds (default: 50 150 400)")
+        parser.add_argument("--solvers", type=str, nargs="+", default=None,
+            choices=[klass.name for klass in ASSIGNMENT_SOLVERS],
+            help="Solvers to compare (default: all available)")
+        parser.add_argument("--seed", type=int, default=None,
+            help="Seed for the random number generator")
+
+    def synthetic_cost_matrix(self, ndebates, rng):
+        """Returns a cost matrix with three positions per debate, and 10% more
+        adjudicators than positions, using the same cost function as the
+        Hungarian allocator with a few conflicts and histories thrown in."""
+        scores = [rng.uniform(1.5, 5.0) for i in range(ndebates * 33 // 10)]
+        cost_matrix = []
+        for i in range(ndebates):
+            importance = rng.choice([-2, -1, 0, 0, 0, 1, 2]) + 3
+            penalties = [rng.choice([0] * 50 + [100, 10000]) for score in scores]
+            for adjustment in [0.0, 0.0, -1.0 if i < ndebates / 2 else 0.0]:
+                impt = importance + adjustment
+                row = []
+                for score, penalty in zip(scores, penalties):
+                    diff = 5 + impt - score
+                    cost = penalty + 5 - score
+                    if diff > 0.25:
+                        cost += 1000 * exp(diff - 0.25)
+                    row.append(cost)
+                cost_matrix.append(row)
+        return cost_matrix
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        if options["solvers"]:
+            try:
+                solvers = [get_assignment_solver(name) for name in options["solvers"]]
+            except ValueError as e:
+                raise CommandError(str(e))
+        else:
+            solvers = [klass() for klass in ASSIGNMENT_SOLVERS if klass.is_available()]
+
+        for ndebates in options["debates"]:
+            cost_matrix = self.synthetic_cost_matrix(ndebates, rng)
+            self.stdout.write("{:d} debates ({:d} positions by {:d} adjudicators):".format(
+                    ndebates, len(cost_matrix), len(cost_matrix[0])))
+
+            for solver in solvers:
+                start = timer()
+                indices = solver.compute(cost_matrix)
+                elapsed = timer() - start
+                total_cost = sum(cost_matrix[i][j] for i, j in indices)
+                self.stdout.write("    {:<8s} {:10.3f} s    total cost {:.2f}".format(
+                        solver.name, elapsed, total_cost))
@@ -0,0 +1,112 @@
+"""Runs independent restarts of the panel annealer, keeping the best.
+
+By default, restarts run one after another in the current process, sharing the
+time limit between them, which is what the auto-allocator does: starting
+processes (and setting up Django in them) inside a web request isn't safe on
+all servers. Callers outside the request path, like benchmarks, can instead
+run restarts on a pool of processes.
+
+With a pool, the annealer is pickled once in the parent, and each worker
+unpickles it once when it starts, so the cost of serializing the problem
+doesn't grow with the number of restarts. This module deliberately doesn't
+import any models at module level: with the "spawn" and "forkserver" start
+methods, workers import it before Django is set up, so the worker initializer
+sets up Django before unpickling the annealer."""
+
+import logging
+import pickle
+from math import ceil
+from multiprocessing import Pool
+from statistics import mean, median
+from timeit import default_timer as timer
+
+logger = logging.getLogger(__name__)
+
+# The annealer in each worker process, and its initial state
+_annealer = None
+_initial = None
+
+
+def _init_worker(data):
+    global _annealer, _initial
+    import django
+    django.setup()
+    _annealer = pickle.loads(data)
+    _initial = list(_annealer.occupants)
+
+
+def _run_restart(seed, anneal_kwargs):
+    _annealer.occupants = list(_initial)
+    stats = _annealer.anneal(seed=seed, **anneal_kwargs)
+    return seed, _annealer.occupants, stats
+
+
+def _run_restarts_sequentially(annealer, seeds, anneal_kwargs):
+    initial = list(annealer.occupants)
+    results = []
+    for seed in seeds:
+        annealer.occupants = list(initial)
+        stats = annealer.anneal(seed=seed, **anneal_kwargs)
+        results.append((seed, annealer.occupants, stats))
+    annealer.occupants = initial
+    return results
+
+
+def _run_restarts_on_pool(annealer, seeds, processes, anneal_kwargs):
+    data = pickle.dumps(annealer, protocol=pickle.HIGHEST_PROTOCOL)
+    with Pool(processes, initializer=_init_worker, initargs=(data,)) as pool:
+        return pool.starmap(_run_restart, [(seed, anneal_kwargs) for seed in seeds])
+
+
+def anneal_restarts(annealer, seeds, processes=1, time_limit=None, **anneal_kwargs):
+    """Runs `annealer.anneal()` once for each seed in `seeds`, each from the
+    annealer's current state. If `processes` is greater than 1, restarts run on
+    a pool of that many processes; otherwise, they run in this process. Other
+    keyword arguments are passed to `anneal()`.
+
+    If `time_limit` is given, it's the time budget for all restarts together,
+    so each restart gets a share of it. (On a pool, restarts running at the
+    same time share nothing.)
+
+    Returns a tuple `(occupants, summary)`, where `occupants` is the best state
+    found by any restart, and `summary` is a dict describing the distribution
+    of costs of all restarts, the best seed and the total wall time."""
+
+    seeds = list(seeds)
+    processes = max(min(processes or 1, len(seeds)), 1)
+    if time_limit is not None:
+        anneal_kwargs['time_limit'] = time_limit / ceil(len(seeds) / processes)
+
+    start = timer()
+    if processes > 1:
+        results = _run_restarts_on_pool(annealer, seeds, processes, anneal_kwargs)
+    else:
+        results = _run_restarts_sequentially(annealer, seeds, anneal_kwargs)
+
+    best_seed, best_occupants, best_stats = min(results, key=lambda result: result[2]['best_energy'])
+    costs = sorted(stats['best_energy'] for seed, occupants, stats in results)
+    summary = {
+        'restarts': len(results),
+        'processes': processes,
+        'best_seed': best_seed,
+        'start_cost': best_stats['start_energy'],
+        'min_cost': costs[0],
+        'median_cost': median(costs),
+        'mean_cost': mean(costs),
+        'max_cost': costs[-1],
+        'costs': costs,
+        'moves': sum(stats['moves'] for seed, occupants, stats in results),
+        'wall_time': timer() - start,
+    }
+    logger.info("Ran %(restarts)d restarts on %(processes)d processes in %(wall_time).2f s: cost %(start_cost).2f -> "
+            "min %(min_cost).2f, median %(median_cost).2f, max %(max_cost).2f (best seed %(best_seed)s)", summary)
+
+    return best_occupants, summary
+
+
+def describe_summary(summary):
+    """Returns a short, human-readable description of a summary returned by
+    `anneal_restarts()`."""
+    return ("Kept the best of {restarts:d} annealing runs ({wall_time:.1f} s): total cost reduced from "
+            "{start_cost:.0f} to {min_cost:.0f} (median of all runs {median_cost:.0f}, worst {max_cost:.0f})").format(
+            **summary)
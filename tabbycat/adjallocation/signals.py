@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from draw.models import Debate, DebateTeam
+from tournaments.models import Round
+
+from .models import DebateAdjudicator
+from .utils import clear_histories_cache, histories_cache_key
+
+
+@receiver(post_delete, sender=DebateAdjudicator)
+@receiver(post_save, sender=DebateAdjudicator)
+@receiver(post_delete, sender=DebateTeam)
+@receiver(post_save, sender=DebateTeam)
+def update_histories_cache(sender, instance, **kwargs):
+    debate_round = Debate.objects.filter(id=instance.debate_id).values_list(
+            'round__tournament_id', 'round__seq').first()
+    if debate_round is None:
+        return
+    tournament_id, seq = debate_round
+    clear_histories_cache(tournament_id, seq)
+
+
+@receiver(pre_save, sender=Round)
+def record_previous_round_seq(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._previous_seq = None
+    else:
+        instance._previous_seq = Round.objects.filter(pk=instance.pk).values_list('seq', flat=True).first()
+
+
+@receiver(post_save, sender=Round)
+def update_histories_cache_on_round_save(sender, instance, created, **kwargs):
+    # Changing a round's sequence number changes which debates come before
+    # which rounds, so all histories in the tournament are affected
+    previous_seq = getattr(instance, '_previous_seq', None)
+    if created or previous_seq == instance.seq:
+        return
+    cache.delete(histories_cache_key(instance.tournament_id, previous_seq))
+    clear_histories_cache(instance.tournament_id)
+
+
+@receiver(post_delete, sender=Round)
+def update_histories_cache_on_round_delete(sender, instance, **kwargs):
+    cache.delete(histories_cache_key(instance.tournament_id, instance.seq))
+    clear_histories_cache(instance.tournament_id, instance.seq)
@@ -0,0 +1,162 @@
+"""Linear assignment solvers used by the adjudicator allocators.
+
+Each solver takes a cost matrix, as a list of lists (rows need not equal
+columns), and returns a list of (row, column) tuples, sorted by row, that
+assigns min(rows, columns) rows to distinct columns with the minimum total
+cost. This is the same interface as `munkres.Munkres.compute()`."""
+
+import logging
+
+from munkres import Munkres
+
+logger = logging.getLogger(__name__)
+
+
+class BaseAssignmentSolver:
+
+    name = None  # must be set by subclasses
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def compute(self, cost_matrix):
+        raise NotImplementedError
+
+
+class MunkresAssignmentSolver(BaseAssignmentSolver):
+    """Pure-Python Munkres (Hungarian) algorithm, from the munkres package.
+    Always available, but slow on large matrices."""
+
+    name = "munkres"
+
+    def compute(self, cost_matrix):
+        if not cost_matrix or not cost_matrix[0]:
+            return []
+        return Munkres().compute(cost_matrix)
+
+
+class ShortestAugmentingPathAssignmentSolver(BaseAssignmentSolver):
+    """Pure-Python Jonker-Volgenant-style solver, which adds one row at a time
+    and finds the shortest augmenting path using dual potentials. It's
+    O(n²m) like Munkres, but with a much smaller constant, since each step is
+    a single pass over a row."""
+
+    name = "jv"
+
+    def compute(self, cost_matrix):
+        if not cost_matrix or not cost_matrix[0]:
+            return []
+
+        nrows = len(cost_matrix)
+        ncols = len(cost_matrix[0])
+
+        # The algorithm requires rows <= columns, so transpose if necessary
+        if nrows > ncols:
+            transposed = [list(col) for col in zip(*cost_matrix)]
+            indices = self._solve(transposed)
+            return sorted((i, j) for j, i in indices)
+
+        return self._solve(cost_matrix)
+
+    @staticmethod
+    def _solve(cost):
+        n = len(cost)
+        m = len(cost[0])
+        inf = float('inf')
+
+        # Uses 1-based indexing for rows and columns, with 0 as a sentinel.
+        u = [0] * (n + 1)    # row potentials
+        v = [0] * (m + 1)    # column potentials
+        p = [0] * (m + 1)    # p[j] is the row assigned to column j
+        way = [0] * (m + 1)  # previous column on the shortest path
+
+        for i in range(1, n + 1):
+            p[0] = i
+            j0 = 0
+            minv = [inf] * (m + 1)
+            used = [False] * (m + 1)
+
+            while True:
+                used[j0] = True
+                i0 = p[j0]
+                row = cost[i0 - 1]
+                ui0 = u[i0]
+                delta = inf
+                j1 = 0
+                for j in range(1, m + 1):
+                    if not used[j]:
+                        cur = row[j - 1] - ui0 - v[j]
+                        if cur < minv[j]:
+                            minv[j] = cur
+                            way[j] = j0
+                        if minv[j] < delta:
+                            delta = minv[j]
+                            j1 = j
+                for j in range(m + 1):
+                    if used[j]:
+                        u[p[j]] += delta
+                        v[j] -= delta
+                    else:
+                        minv[j] -= delta
+                j0 = j1
+                if p[j0] == 0:
+                    break
+
+            # Augment along the path found
+            while j0:
+                j1 = way[j0]
+                p[j0] = p[j1]
+                j0 = j1
+
+        return sorted((p[j] - 1, j - 1) for j in range(1, m + 1) if p[j] != 0)
+
+
+class ScipyAssignmentSolver(BaseAssignmentSolver):
+    """Uses SciPy's compiled `linear_sum_assignment`, if SciPy is installed."""
+
+    name = "scipy"
+
+    @classmethod
+    def is_available(cls):
+        try:
+            import scipy.optimize  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def compute(self, cost_matrix):
+        from scipy.optimize import linear_sum_assignment
+        if not cost_matrix or not cost_matrix[0]:
+            return []
+        rows, cols = linear_sum_assignment(cost_matrix)
+        return [(int(i), int(j)) for i, j in zip(rows, cols)]
+
+
+# In order of preference
+ASSIGNMENT_SOLVERS = [
+    ScipyAssignmentSolver,
+    ShortestAugmentingPathAssignmentSolver,
+    MunkresAssignmentSolver,
+]
+
+
+def get_assignment_solver(name=None):
+    """Returns an instance of the assignment solver called `name`, or if
+    `name` is None, the most preferred solver that is available. Raises a
+    ValueError if the named solver doesn't exist or isn't available."""
+
+    for klass in ASSIGNMENT_SOLVERS:
+        if name is not None and klass.name != name:
+            continue
+        if klass.is_available():
+            logger.debug("Using %s assignment solver", klass.name)
+            return klass()
+        if name is not None:
+            raise ValueError("Assignment solver {!r} isn't available".format(name))
+
+    if name is not None:
+        raise ValueError("Unrecognised assignment solver: {!r}".format(name))
+
+    # Munkres is always available, so this should never happen
+    return MunkresAssignmentSolver()
@@ -0,0 +1,133 @@
+import random
+import unittest
+from types import SimpleNamespace
+
+from adjallocation.allocation import AdjudicatorAllocation
+from adjallocation.anneal import INELIGIBLE, PanelAnnealer, SAAllocator
+from adjallocation.parallel import anneal_restarts
+
+
+class TestPanelAnnealer(unittest.TestCase):
+
+    def random_annealer(self, rng, ndebates=10, panel_size=3, npool=5):
+        nadjs = ndebates * panel_size + npool
+        occupants = list(range(nadjs))
+        rng.shuffle(occupants)
+        slot_debates = [d for d in range(ndebates) for i in range(panel_size)] + [-1] * npool
+        slot_rows = [i for d in range(ndebates) for i in range(panel_size)] + [-1] * npool
+        debate_costs = [[rng.choice([0, 0, 0, 100]) for a in range(nadjs)] for d in range(ndebates)]
+        row_costs = [[rng.uniform(0, 10) for a in range(nadjs)] for i in range(panel_size)]
+        pair_costs = [dict() for a in range(nadjs)]
+        for i in range(nadjs * 2):
+            a, b = rng.sample(range(nadjs), 2)
+            penalty = rng.choice([10, 1000])
+            pair_costs[a][b] = pair_costs[b][a] = penalty
+        return PanelAnnealer(occupants, slot_debates, slot_rows, debate_costs, row_costs, pair_costs)
+
+    def test_energy_tracking(self):
+        """Checks that the energy reported, computed from deltas, matches the
+        energy of the final state computed from scratch."""
+        rng = random.Random(1234)
+        for i in range(10):
+            annealer = self.random_annealer(rng)
+            stats = annealer.anneal(100, 0.1, steps=5000, seed=i)
+            self.assertAlmostEqual(stats['best_energy'], annealer.energy(), places=6)
+            self.assertLessEqual(stats['best_energy'], stats['start_energy'])
+
+    def test_permutation(self):
+        annealer = self.random_annealer(random.Random(42))
+        original = sorted(annealer.occupants)
+        annealer.anneal(100, 0.1, steps=5000, seed=0)
+        self.assertEqual(sorted(annealer.occupants), original)
+
+    def test_reproducible(self):
+        results = []
+        for i in range(2):
+            annealer = self.random_annealer(random.Random(42))
+            annealer.anneal(100, 0.1, steps=5000, seed=7)
+            results.append(annealer.occupants)
+        self.assertEqual(results[0], results[1])
+
+    def test_resolves_pair_conflict(self):
+        # Two debates of two adjudicators, where 0 and 1 conflict
+        pair_costs = [{1: 1000}, {0: 1000}, {}, {}]
+        debate_costs = [[0] * 4, [0] * 4]
+        row_costs = [[0] * 4]
+        annealer = PanelAnnealer([0, 1, 2, 3], [0, 0, 1, 1], [0, 0, 0, 0], debate_costs, row_costs, pair_costs)
+        stats = annealer.anneal(10, 0.01, steps=1000, seed=0)
+        self.assertEqual(stats['best_energy'], 0)
+        occupants = annealer.occupants
+        self.assertNotEqual(occupants.index(0) // 2, occupants.index(1) // 2)
+
+    def test_ineligible(self):
+        # Adjudicator 0 can't take the slot in debate 0, so must go to the pool
+        debate_costs = [[0, 0]]
+        row_costs = [[INELIGIBLE, 5]]
+        annealer = PanelAnnealer([0, 1], [0, -1], [0, -1], debate_costs, row_costs, [{}, {}])
+        stats = annealer.anneal(10, 0.01, steps=100, seed=0)
+        self.assertEqual(annealer.occupants, [1, 0])
+        self.assertEqual(stats['best_energy'], 5)
+
+    def test_parallel_restarts(self):
+        annealer = self.random_annealer(random.Random(42))
+        occupants, summary = anneal_restarts(annealer, [1, 2, 3], processes=2, max_temp=100, min_temp=0.1, steps=5000)
+        self.assertEqual(summary['restarts'], 3)
+        self.assertEqual(summary['min_cost'], min(summary['costs']))
+        self.assertAlmostEqual(annealer.energy(occupants), summary['min_cost'], places=6)
+
+        # The best restart should be reproducible in this process
+        annealer.anneal(100, 0.1, steps=5000, seed=summary['best_seed'])
+        self.assertEqual(annealer.occupants, occupants)
+
+    def test_sequential_restarts(self):
+        annealer = self.random_annealer(random.Random(42))
+        initial = list(annealer.occupants)
+        occupants, summary = anneal_restarts(annealer, [1, 2, 3], max_temp=100, min_temp=0.1, steps=5000)
+        self.assertEqual(summary['restarts'], 3)
+        self.assertEqual(summary['processes'], 1)
+        self.assertAlmostEqual(annealer.energy(occupants), summary['min_cost'], places=6)
+        self.assertEqual(annealer.occupants, initial)
+
+        # Should match the same restarts on a pool
+        pool_occupants, pool_summary = anneal_restarts(annealer, [1, 2, 3], processes=2, max_temp=100,
+                min_temp=0.1, steps=5000)
+        self.assertEqual(pool_summary['costs'], summary['costs'])
+        self.assertEqual(pool_occupants, occupants)
+
+
+class TestSAAllocator(unittest.TestCase):
+
+    def make_allocator(self, ndebates):
+        """Returns an SAAllocator with `ndebates` panel debates of three voting
+        adjudicators each, set up without a database, and its initial
+        allocation. The score cost of a slot is its adjusted importance."""
+        debates = [SimpleNamespace(id=d, importance=0, room_rank=d + 1) for d in range(ndebates)]
+        adjs = [SimpleNamespace(id=a, _hungarian_score=a, trainee=False, institution_id=None)
+                for a in range(3 * ndebates)]
+
+        allocator = SAAllocator.__new__(SAAllocator)  # skip loading from the database
+        allocator.debates = debates
+        allocator.adjudicators = adjs
+        allocator.min_voting_score = 0
+        allocator.conflict_penalty = allocator.history_penalty = 0
+        allocator.conflicts = SimpleNamespace(adj_conflicts=[], institution_conflicts=[], adj_histories={})
+        allocator.calc_penalty = lambda debate, adj: 0
+        allocator.calc_score_cost = lambda importance, adj: importance
+
+        # Put each panel's weakest adjudicator in the chair
+        initial = [AdjudicatorAllocation(debate, chair=adjs[3 * d], panellists=adjs[3 * d + 1:3 * d + 3])
+                   for d, debate in enumerate(debates)]
+        return allocator, initial
+
+    def test_weaker_third_in_top_half_only(self):
+        allocator, initial = self.make_allocator(4)
+        annealer = allocator.build_annealer(initial)
+        third_slot_costs = [annealer.row_costs[annealer.slot_rows[s]][0] for s in range(2, 12, 3)]
+        self.assertEqual(third_slot_costs, [2.0, 2.0, 3.0, 3.0])
+
+    def test_chair_is_highest_scored(self):
+        allocator, initial = self.make_allocator(3)
+        annealer = allocator.build_annealer(initial)
+        for aa in allocator.make_allocations(annealer.occupants):
+            for adj in aa.panellists:
+                self.assertGreater(aa.chair._hungarian_score, adj._hungarian_score)
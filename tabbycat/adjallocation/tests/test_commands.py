@@ -0,0 +1,24 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from adjallocation.models import DebateAdjudicator
+from tournaments.models import Round
+from utils.tests import TournamentTestCase
+
+
+class TestAllocateAdjudicatorsCommand(TournamentTestCase):
+
+    def test_allocate_on_pool(self):
+        round = self.t.prelim_rounds().last()
+        round.draw_status = Round.STATUS_CONFIRMED
+        round.save()
+        DebateAdjudicator.objects.filter(debate__round=round).delete()
+
+        stdout = StringIO()
+        call_command('allocateadjudicators', '--tournament', self.t.slug, str(round.seq), '--processes', '2',
+                     '--restarts', '2', '--time-limit', '0.5', '--seed', '1', stdout=stdout)
+
+        self.assertIn("Kept the best of 2 annealing runs", stdout.getvalue())
+        for debate in round.debate_set.all():
+            self.assertTrue(debate.debateadjudicator_set.filter(type=DebateAdjudicator.TYPE_CHAIR).exists())
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+
+from adjallocation.models import DebateAdjudicator
+from adjallocation.utils import get_histories, histories_cache_key
+from draw.models import DebateTeam
+from utils.tests import TournamentTestCase
+
+
+class TestGetHistories(TournamentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.round = self.t.round_set.order_by('-seq').first()
+
+    def tearDown(self):
+        cache.clear()
+        super().tearDown()
+
+    def test_grouping(self):
+        histories = get_histories(self.t, self.round)
+
+        for da in DebateAdjudicator.objects.filter(debate__round__tournament=self.t,
+                debate__round__seq__lt=self.round.seq).select_related('debate__round'):
+            ago = self.round.seq - da.debate.round.seq
+            history = histories['for_adjs'][da.adjudicator_id]
+            for other in da.debate.debateadjudicator_set.exclude(adjudicator=da.adjudicator):
+                self.assertIn({'ago': ago, 'id': other.adjudicator_id}, history['adjudicator'])
+            for dt in da.debate.debateteam_set.all():
+                self.assertIn({'ago': ago, 'id': dt.team_id}, history['team'])
+                self.assertIn({'ago': ago, 'id': da.adjudicator_id},
+                        histories['for_teams'][dt.team_id]['adjudicator'])
+
+        # No debates from this round or later
+        for dt in DebateTeam.objects.filter(debate__round=self.round):
+            for entry in histories['for_teams'].get(dt.team_id, {}).get('adjudicator', []):
+                self.assertGreater(entry['ago'], 0)
+
+    def test_cached(self):
+        get_histories(self.t, self.round)
+        with self.assertNumQueries(0):
+            get_histories(self.t, self.round)
+
+    def test_invalidated_by_debate_adjudicator(self):
+        get_histories(self.t, self.round)
+        da = DebateAdjudicator.objects.filter(debate__round__tournament=self.t,
+                debate__round__seq__lt=self.round.seq).first()
+        da.delete()
+        self.assertIsNone(cache.get(histories_cache_key(self.t.id, self.round.seq)))
+        self.assertNotIn({'ago': self.round.seq - da.debate.round.seq, 'id': da.adjudicator_id},
+                get_histories(self.t, self.round)['for_teams'][da.debate.debateteam_set.first().team_id]['adjudicator'])
+
+    def test_invalidated_by_round_seq_change(self):
+        get_histories(self.t, self.round)
+        old_seq = self.round.seq
+        self.round.seq = old_seq + 10
+        self.round.save()
+        self.assertIsNone(cache.get(histories_cache_key(self.t.id, old_seq)))
+
+    def test_invalidated_by_round_delete(self):
+        first_round = self.t.round_set.order_by('seq').first()
+        get_histories(self.t, self.round)
+        first_round.delete()
+        self.assertIsNone(cache.get(histories_cache_key(self.t.id, self.round.seq)))
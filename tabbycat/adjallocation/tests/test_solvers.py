@@ -0,0 +1,41 @@
+import random
+import unittest
+from itertools import permutations
+
+from ..solvers import ASSIGNMENT_SOLVERS
+
+
+class TestAssignmentSolvers(unittest.TestCase):
+
+    def brute_force_cost(self, cost_matrix):
+        nrows, ncols = len(cost_matrix), len(cost_matrix[0])
+        if nrows <= ncols:
+            return min(sum(cost_matrix[i][j] for i, j in enumerate(cols))
+                       for cols in permutations(range(ncols), nrows))
+        else:
+            return min(sum(cost_matrix[i][j] for j, i in enumerate(rows))
+                       for rows in permutations(range(nrows), ncols))
+
+    def test_optimal(self):
+        rng = random.Random(1234)
+        for klass in ASSIGNMENT_SOLVERS:
+            if not klass.is_available():
+                continue
+            solver = klass()
+            for i in range(50):
+                nrows, ncols = rng.randint(1, 6), rng.randint(1, 6)
+                cost_matrix = [[rng.choice([0, rng.uniform(0, 10), 1000]) for j in range(ncols)]
+                               for i in range(nrows)]
+                with self.subTest(solver=klass.name, cost_matrix=cost_matrix):
+                    indices = solver.compute(cost_matrix)
+                    self.assertEqual(len(indices), min(nrows, ncols))
+                    self.assertEqual(len(set(i for i, j in indices)), len(indices))
+                    self.assertEqual(len(set(j for i, j in indices)), len(indices))
+                    self.assertEqual(indices, sorted(indices))
+                    self.assertAlmostEqual(sum(cost_matrix[i][j] for i, j in indices),
+                                           self.brute_force_cost(cost_matrix))
+
+    def test_empty(self):
+        for klass in ASSIGNMENT_SOLVERS:
+            if klass.is_available():
+                self.assertEqual(klass().compute([]), [])
@@ -1,11 +1,16 @@
+import logging
 import math
 from itertools import permutations
 
+from django.core.cache import cache
 from django.db.models import Q
 
 from .models import AdjudicatorAdjudicatorConflict, AdjudicatorConflict, AdjudicatorInstitutionConflict, DebateAdjudicator
 
 from draw.models import DebateTeam
+from tournaments.models import Round
+
+logger = logging.getLogger(__name__)
 
 
 def adjudicator_conflicts_display(debates):
@@ -121,52 +126,72 @@ def get_clashes(t, r):
     return clashes
 
 
-def populate_histories(histories, seen_adj_or_team, seen_adj_or_team_histories,
-                       type, for_type, current_round):
-    adj_or_team_id = seen_adj_or_team[0]
+# Histories are invalidated by the signals in adjallocation.signals, but writes
+# that bypass signals (like QuerySet.update()) can't be caught, so cached
+# histories also expire after this many seconds.
+HISTORIES_CACHE_TIMEOUT = 60 * 60
 
-    # Make the base dictionary structure for each adj if it doesn't exist already
-    if adj_or_team_id not in histories[for_type]:
-        histories[for_type][adj_or_team_id] = {'team': [], 'adjudicator': []}
-
-    seen_round_debate_id = seen_adj_or_team[1]
-    seen_round_seq = seen_adj_or_team[2]
-
-    # We don't know who they saw just based on a DebateAdjudicator/Team; so we need
-    # to match things upagainst the other objects
-    for history in seen_adj_or_team_histories:
-        debate_id = history[1]
-        check_team_or_adj_id = history[0]
-
-        if type is 'adjudicator' and adj_or_team_id == check_team_or_adj_id:
-            # Don't match conflicts to self
-            continue
-        if seen_round_debate_id == debate_id:
-            # If the root DA/DT saw this DT/DA
-            histories[for_type][adj_or_team_id][type].append(
-                {'ago': current_round.seq - seen_round_seq, 'id': history[0]})
 
-    return histories
+def histories_cache_key(tournament_id, round_seq):
+    return "%s_%s_%s" % (tournament_id, round_seq, 'histories')
+
+
+def clear_histories_cache(tournament_id, round_seq=None):
+    """Clears cached histories affected by a change to the debates in the
+    round with sequence number `round_seq`. Histories only look at earlier
+    rounds, so only later rounds are affected. If `round_seq` is None, clears
+    cached histories for all rounds in the tournament."""
+    later_seqs = Round.objects.filter(tournament_id=tournament_id)
+    if round_seq is not None:
+        later_seqs = later_seqs.filter(seq__gt=round_seq)
+    later_seqs = later_seqs.values_list('seq', flat=True)
+    cached_keys = [histories_cache_key(tournament_id, later_seq) for later_seq in later_seqs]
+    if cached_keys:
+        cache.delete_many(cached_keys)
+        logger.debug("Cleared histories cache for rounds after %s in tournament %d", round_seq, tournament_id)
 
 
 def get_histories(t, r):
+    """Returns a dict with keys 'for_adjs' and 'for_teams', each mapping
+    adjudicator or team IDs to lists of the adjudicators (and, for
+    adjudicators, teams) they've seen in rounds before `r`. Rows are grouped
+    by debate in a single pass, and the result is cached per round; the cache
+    is invalidated by the signals in adjallocation.signals."""
+
+    cached_key = histories_cache_key(t.id, r.seq)
+    histories = cache.get(cached_key)
+    if histories is not None:
+        return histories
 
     adj_histories = DebateAdjudicator.objects.filter(
-        debate__round__tournament=t, debate__round__seq__lt=r.seq).select_related(
-            'debate__round').values_list('adjudicator', 'debate', 'debate__round__seq').order_by('-debate__round__seq')
+        debate__round__tournament=t, debate__round__seq__lt=r.seq).values_list(
+            'adjudicator', 'debate', 'debate__round__seq').order_by('-debate__round__seq')
     team_histories = DebateTeam.objects.filter(
-        debate__round__tournament=t, debate__round__seq__lt=r.seq).select_related(
-            'debate__round').values_list('team', 'debate', 'debate__round__seq').order_by('-debate__round__seq')
+        debate__round__tournament=t, debate__round__seq__lt=r.seq).values_list(
+            'team', 'debate', 'debate__round__seq').order_by('-debate__round__seq')
+
+    # Group the IDs of who was in each debate
+    adjs_by_debate = {}
+    for adj_id, debate_id, seq in adj_histories:
+        adjs_by_debate.setdefault(debate_id, []).append(adj_id)
+    teams_by_debate = {}
+    for team_id, debate_id, seq in team_histories:
+        teams_by_debate.setdefault(debate_id, []).append(team_id)
 
     # Make a dictionary of conflicts with adj or team ID as key
     histories = {'for_teams': {}, 'for_adjs': {}}
-    for seen_adj in adj_histories:
-        histories = populate_histories(histories, seen_adj, adj_histories,
-                                       'adjudicator', 'for_adjs', r)
-        histories = populate_histories(histories, seen_adj, team_histories,
-                                       'team', 'for_adjs', r)
-    for seen_team in team_histories:
-        histories = populate_histories(histories, seen_team, adj_histories,
-                                       'adjudicator', 'for_teams', r)
-
+    for adj_id, debate_id, seq in adj_histories:
+        ago = r.seq - seq
+        history = histories['for_adjs'].setdefault(adj_id, {'team': [], 'adjudicator': []})
+        history['adjudicator'].extend({'ago': ago, 'id': other_id}
+                for other_id in adjs_by_debate[debate_id] if other_id != adj_id)
+        history['team'].extend({'ago': ago, 'id': team_id}
+                for team_id in teams_by_debate.get(debate_id, []))
+    for team_id, debate_id, seq in team_histories:
+        ago = r.seq - seq
+        history = histories['for_teams'].setdefault(team_id, {'team': [], 'adjudicator': []})
+        history['adjudicator'].extend({'ago': ago, 'id': adj_id}
+                for adj_id in adjs_by_debate.get(debate_id, []))
+
+    cache.set(cached_key, histories, HISTORIES_CACHE_TIMEOUT)
     return histories
@@ -16,7 +16,7 @@ from tournaments.mixins import DrawForDragAndDropMixin, RoundMixin, SaveDragAndD
 from utils.mixins import JsonDataResponsePostView, SuperuserRequiredMixin
 
 from .allocator import allocate_adjudicators
-from .hungarian import HungarianAllocator
+from .parallel import describe_summary
 from .models import DebateAdjudicator
 from .utils import get_clashes, get_histories
 
@@ -116,11 +116,15 @@ class CreateAutoAllocation(LogActionMixin, AdjudicatorAllocationViewBase, JsonDa
     action_log_type = ActionLogEntry.ACTION_TYPE_ADJUDICATORS_AUTO
 
     def post_data(self):
-        allocate_adjudicators(self.get_round(), HungarianAllocator)
-        return {
+        allocator = allocate_adjudicators(self.get_round())
+        data = {
             'debates': self.get_draw(),
             'unallocatedAdjudicators': self.get_unallocated_adjudicators()
         }
+        summary = getattr(allocator, 'summary', None)
+        if summary:
+            data['summary'] = describe_summary(summary)
+        return data
 
     def post(self, request, *args, **kwargs):
         round = self.get_round()
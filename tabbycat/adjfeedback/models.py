@@ -212,6 +212,18 @@ class AdjudicatorFeedback(Submission):
     def round(self):
         return self.debate.round
 
+    @property
+    def answers(self):
+        """Returns a dict mapping question IDs to the answers given in this
+        feedback. Uses answers populated by `prefetch.populate_answers()` if
+        present, otherwise retrieves them from the database."""
+        try:
+            return self._answers
+        except AttributeError:
+            from .prefetch import populate_answers
+            populate_answers([self])
+            return self._answers
+
     @cached_property
     def feedback_weight(self):
         if self.round:
@@ -0,0 +1,60 @@
+"""Functions that prefetch data for efficiency."""
+
+from django.db.models import Prefetch
+
+from draw.models import DebateTeam
+from results.models import TeamScore
+
+from .models import AdjudicatorFeedbackQuestion
+
+
+def populate_answers(feedbacks):
+    """Sets an attribute `_answers` on each AdjudicatorFeedback in `feedbacks`,
+    being a dict mapping question IDs to the answer given to that question.
+    Questions that weren't answered are not in the dict.
+    `AdjudicatorFeedback.answers` uses this in preference to querying the
+    database.
+
+    This retrieves answers in one SQL query per answer type, rather than one
+    for each question of each feedback. Operates in-place."""
+
+    feedbacks_by_id = {feedback.id: feedback for feedback in feedbacks}
+    for feedback in feedbacks_by_id.values():
+        feedback._answers = {}
+
+    for answer_class in AdjudicatorFeedbackQuestion.ANSWER_TYPE_CLASSES_REVERSE.keys():
+        answers = answer_class.objects.filter(feedback_id__in=feedbacks_by_id.keys()).values_list(
+                'feedback_id', 'question_id', 'answer')
+        for feedback_id, question_id, answer in answers:
+            feedbacks_by_id[feedback_id]._answers[question_id] = answer
+
+
+def populate_source_team_wins(feedbacks):
+    """Sets the attribute `_win` on the source DebateTeam of each
+    AdjudicatorFeedback in `feedbacks` that came from a team, representing
+    whether that team won the debate. Retrieves all of the information in a
+    single SQL query. Operates in-place."""
+
+    debateteams = [feedback.source_team for feedback in feedbacks if feedback.source_team_id is not None]
+    wins = dict(TeamScore.objects.filter(debate_team__in=debateteams,
+            ballot_submission__confirmed=True).values_list('debate_team_id', 'win'))
+    for debateteam in debateteams:
+        debateteam._win = wins.get(debateteam.id)
+
+
+def prefetch_feedback_details(queryset):
+    """Returns a list of the AdjudicatorFeedback instances in `queryset`, with
+    their sources, debates, rounds, answers and source team results loaded, in
+    a fixed number of SQL queries."""
+
+    debateteams = DebateTeam.objects.select_related('team')
+    feedbacks = list(queryset.select_related(
+        'source_adjudicator__adjudicator', 'source_adjudicator__debate__round',
+        'source_team__team', 'source_team__debate__round',
+    ).prefetch_related(
+        Prefetch('source_adjudicator__debate__debateteam_set', queryset=debateteams),
+        Prefetch('source_team__debate__debateteam_set', queryset=debateteams),
+    ))
+    populate_answers(feedbacks)
+    populate_source_team_wins(feedbacks)
+    return feedbacks
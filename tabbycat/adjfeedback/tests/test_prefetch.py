@@ -0,0 +1,57 @@
+from adjallocation.models import DebateAdjudicator
+from adjfeedback.models import AdjudicatorFeedback
+from adjfeedback.prefetch import populate_answers, prefetch_feedback_details
+from adjfeedback.utils import parse_feedback
+from utils.tests import TournamentTestCase
+
+
+class TestPopulateAnswers(TournamentTestCase):
+
+    ANSWERS = {
+        'bs': True,
+        'bc': False,
+        'is': 4,
+        'f': 1.5,
+        't': "word",
+        'tl': "Some comments",
+        'ss': "Yes",
+        'ms': "Yes//No",
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.questions = list(self.t.adj_feedback_questions)
+        self.feedbacks = []
+        chairs = DebateAdjudicator.objects.filter(debate__round__tournament=self.t,
+                type=DebateAdjudicator.TYPE_CHAIR).select_related('adjudicator', 'debate')
+        for i, chair in enumerate(chairs[:4]):
+            dt = chair.debate.debateteam_set.first()
+            feedback = AdjudicatorFeedback.objects.create(confirmed=True, adjudicator=chair.adjudicator,
+                    score=3, source_team=dt)
+            # Leave some questions unanswered
+            for question in self.questions[i:]:
+                question.answer_type_class.objects.create(question=question, feedback=feedback,
+                        answer=self.ANSWERS[question.answer_type])
+            self.feedbacks.append(feedback)
+
+    def tearDown(self):
+        AdjudicatorFeedback.objects.all().delete()
+        super().tearDown()
+
+    def test_matches_answer_sets(self):
+        feedbacks = list(AdjudicatorFeedback.objects.filter(id__in=[f.id for f in self.feedbacks]))
+        populate_answers(feedbacks)
+        for feedback in feedbacks:
+            for question in self.questions:
+                answers = question.answer_set.filter(feedback=feedback)
+                if answers.exists():
+                    self.assertEqual(feedback.answers[question.id], answers.get().answer)
+                else:
+                    self.assertNotIn(question.id, feedback.answers)
+
+    def test_parse_feedback_queries(self):
+        # One each for feedback, debate teams and team results, and one per answer type
+        with self.assertNumQueries(7):
+            feedbacks = prefetch_feedback_details(AdjudicatorFeedback.objects.all())
+            for feedback in feedbacks:
+                parse_feedback(feedback, self.questions)
@@ -1,6 +1,5 @@
 import logging
 
-from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q
 
 from adjallocation.allocation import AdjudicatorAllocation
@@ -55,71 +54,98 @@ def expected_feedback_targets(debateadj, feedback_paths=None, debate=None):
 def get_feedback_overview(t, adjudicators):
 
     rounds = list(t.prelim_rounds(until=t.current_round))
-    debate_adjudicators = DebateAdjudicator.objects.filter(debate__round__tournament=t)
-    all_feedbacks = AdjudicatorFeedback.objects.filter(
-                        Q(source_adjudicator__debate__round__in=rounds) |
-                        Q(source_team__debate__round__in=rounds), confirmed=True).select_related(
-                        'adjudicator', 'source_adjudicator', 'source_team',
-                        'source_adjudicator__debate__round',
-                        'source_team__debate__round').exclude(
-                        source_adjudicator__type=DebateAdjudicator.TYPE_TRAINEE)
-
-    all_scores = SpeakerScoreByAdj.objects.filter(
-                        ballot_submission__confirmed=True,
-                        debate_adjudicator__debate__round__in=rounds).select_related(
-                        'debate_adjudicator__adjudicator', 'ballot_submission').exclude(
-                        position=t.reply_position)
+
+    # Group all rows by adjudicator in a single pass over each query, so that
+    # this scales linearly with the number of adjudicators.
+    adjudications = {}
+    for adj_id, debate_id, adj_type in DebateAdjudicator.objects.filter(
+            debate__round__tournament=t).values_list('adjudicator_id', 'debate_id', 'type'):
+        adjudications.setdefault(adj_id, {})[debate_id] = adj_type
+
+    all_feedbacks = {}
+    for adj_id, score, adj_debate_id, adj_round_id, team_debate_id, team_round_id in AdjudicatorFeedback.objects.filter(
+                Q(source_adjudicator__debate__round__in=rounds) |
+                Q(source_team__debate__round__in=rounds), confirmed=True).exclude(
+                source_adjudicator__type=DebateAdjudicator.TYPE_TRAINEE).values_list(
+                'adjudicator_id', 'score', 'source_adjudicator__debate_id', 'source_adjudicator__debate__round_id',
+                'source_team__debate_id', 'source_team__debate__round_id'):
+        if team_debate_id is not None:
+            feedback = (team_round_id, team_debate_id, True, score)
+        else:
+            feedback = (adj_round_id, adj_debate_id, False, score)
+        all_feedbacks.setdefault(adj_id, []).append(feedback)
+
+    all_scores = {}
+    for adj_id, ballotsub_id, score in SpeakerScoreByAdj.objects.filter(
+                ballot_submission__confirmed=True,
+                debate_adjudicator__debate__round__in=rounds).exclude(
+                position=t.reply_position).values_list(
+                'debate_adjudicator__adjudicator_id', 'ballot_submission_id', 'score'):
+        all_scores.setdefault(adj_id, []).append((ballotsub_id, score))
 
     for adj in adjudicators:
-        # Gather feedback scores for graphs
-        adj_feedbacks = [f for f in all_feedbacks if f.adjudicator == adj]
-        adj_adjudications = [a for a in debate_adjudicators if a.adjudicator == adj]
-        adj_scores = [s for s in all_scores if s.debate_adjudicator.adjudicator == adj]
+        adj_adjudications = adjudications.get(adj.id, {})
 
         # Gather a dict of round-by-round feedback for the graph
-        adj.feedback_data = feedback_stats(adj, rounds, adj_feedbacks, debate_adjudicators)
+        adj.feedback_data = feedback_stats(adj, rounds, all_feedbacks.get(adj.id, []), adj_adjudications)
         # Sum up remaining stats
-        adj = scoring_stats(adj, adj_scores, adj_adjudications)
+        adj = scoring_stats(adj, all_scores.get(adj.id, []), adj_adjudications)
 
     return adjudicators
 
 
-def feedback_stats(adj, rounds, feedbacks, all_debate_adjudicators):
+FEEDBACK_POSITION_NAMES = {
+    DebateAdjudicator.TYPE_CHAIR: "Chair",
+    DebateAdjudicator.TYPE_PANEL: "Panellist",
+    DebateAdjudicator.TYPE_TRAINEE: "Trainee",
+}
+
+
+def feedback_stats(adj, rounds, feedbacks, adjudications):
+    """Returns a list of points for the feedback graph of `adj`.
+
+    `feedbacks` is a list of tuples `(round_id, debate_id, from_team, score)`,
+    one for each confirmed feedback on `adj`. `adjudications` is a dict mapping
+    debate IDs to the type of position `adj` had in that debate."""
 
     # Start off with their test scores
     feedback_data = [{'x': 0, 'y': adj.test_score, 'position': "Test Score"}]
 
+    feedbacks_by_round = {}
+    for round_id, debate_id, from_team, score in feedbacks:
+        feedbacks_by_round.setdefault(round_id, []).append((debate_id, from_team, score))
+
     for r in rounds:
-        # Filter all the feedback to focus on this particular rouond
-        adj_round_feedbacks = [f for f in feedbacks if (f.source_adjudicator and f.source_adjudicator.debate.round == r)]
-        adj_round_feedbacks.extend([f for f in feedbacks if (f.source_team and f.source_team.debate.round == r)])
-
-        if len(adj_round_feedbacks) > 0:
-            debates = [fb.source_team.debate for fb in adj_round_feedbacks if fb.source_team]
-            debates.extend([fb.source_adjudicator.debate for fb in adj_round_feedbacks if fb.source_adjudicator])
-            adj_da = next((da for da in all_debate_adjudicators if (da.adjudicator == adj and da.debate == debates[0])), None)
-            if adj_da:
-                if adj_da.type == adj_da.TYPE_CHAIR:
-                    adj_type = "Chair"
-                elif adj_da.type == adj_da.TYPE_PANEL:
-                    adj_type = "Panellist"
-                elif adj_da.type == adj_da.TYPE_TRAINEE:
-                    adj_type = "Trainee"
-
-                total_score = [f.score for f in adj_round_feedbacks]
-                average_score = round(sum(total_score) / len(total_score), 2)
-
-                # Creating the object list for the graph
-                feedback_data.append({
-                    'x': r.seq,
-                    'y': average_score,
-                    'position': adj_type,
-                })
+        adj_round_feedbacks = feedbacks_by_round.get(r.id)
+        if not adj_round_feedbacks:
+            continue
+
+        # Find the position from the debate of the first feedback from a team,
+        # or failing that, from an adjudicator
+        debate_id = next((debate_id for debate_id, from_team, score in adj_round_feedbacks if from_team),
+                adj_round_feedbacks[0][0])
+        adj_type = adjudications.get(debate_id)
+        if adj_type not in FEEDBACK_POSITION_NAMES:
+            continue
+
+        total_score = [score for debate_id, from_team, score in adj_round_feedbacks]
+        average_score = round(sum(total_score) / len(total_score), 2)
+
+        # Creating the object list for the graph
+        feedback_data.append({
+            'x': r.seq,
+            'y': average_score,
+            'position': FEEDBACK_POSITION_NAMES[adj_type],
+        })
 
     return feedback_data
 
 
 def scoring_stats(adj, scores, adjudications):
+    """Annotates `adj` with the number of debates adjudicated, average speaker
+    score given and average margin given. `scores` is a list of tuples
+    `(ballot_submission_id, score)` of speaker scores given by `adj`."""
+
     adj.debates = len(adjudications)
     adj.avg_score = None
     adj.avg_margin = None
@@ -127,15 +153,15 @@ def scoring_stats(adj, scores, adjudications):
     if len(scores) == 0 or len(adjudications) == 0:
         return adj
 
-    adj.avg_score = sum(s.score for s in scores) / len(scores)
+    adj.avg_score = sum(score for ballotsub_id, score in scores) / len(scores)
+
     # Figure out average margin by summing speaks (post splitting them in 2)
-    ballot_ids = [s.ballot_submission for s in scores]
-    ballot_ids = sorted(set([b.id for b in ballot_ids])) # Deduplicate
+    scores_by_ballot = {}
+    for ballotsub_id, score in scores:
+        scores_by_ballot.setdefault(ballotsub_id, []).append(score)
     ballot_margins = []
 
-    for id in ballot_ids:
-        # For each unique ballot id make an array of all its scores
-        ballot_scores = [s.score for s in scores if s.ballot_submission.id == id]
+    for ballot_scores in scores_by_ballot.values():
         speakers = int(len(ballot_scores) / 2)
 
         # Get the team totals by summing each half of the scores array
@@ -145,13 +171,15 @@ def scoring_stats(adj, scores, adjudications):
         ballot_margins.append(max(aff_pts, neg_pts) - min(aff_pts, neg_pts))
 
     if ballot_margins:
-        # print('%s has %s margins %s' % (adj, len(ballot_margins), ballot_margins))
         adj.avg_margin = sum(ballot_margins) / len(ballot_margins)
 
     return adj
 
 
 def parse_feedback(feedback, questions):
+    """Returns a dict describing `feedback` for the feedback JSON endpoints.
+    For efficiency, `feedback` should come from `prefetch_feedback_details()`
+    in adjfeedback/prefetch.py, and `questions` should be evaluated once."""
 
     if feedback.source_team:
         source_annotation = " (" + feedback.source_team.get_result_display() + ")"
@@ -177,10 +205,7 @@ def parse_feedback(feedback, questions):
             'text': question.text,
             'name': question.name
         }
-        try:
-            q['answer'] = question.answer_set.get(feedback=feedback).answer
-        except ObjectDoesNotExist:
-            q['answer'] = "-"
+        q['answer'] = feedback.answers.get(question.id, "-")
 
         data['questions'].append(q)
 
@@ -3,8 +3,7 @@ import logging
 
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views.generic.base import TemplateView, View
@@ -13,7 +12,7 @@ from django.views.generic.edit import FormView
 from actionlog.mixins import LogActionMixin
 from actionlog.models import ActionLogEntry
 from participants.models import Adjudicator, Team
-from participants.prefetch import populate_feedback_scores
+from participants.prefetch import annotate_weighted_scores, populate_feedback_scores
 from results.mixins import PublicSubmissionFieldsMixin, TabroomSubmissionFieldsMixin
 from tournaments.mixins import (PublicTournamentPageMixin, SingleObjectByRandomisedUrlMixin,
                                 SingleObjectFromTournamentMixin, TournamentMixin)
@@ -26,6 +25,7 @@ from utils.tables import TabbycatTableBuilder
 
 from .models import AdjudicatorFeedback, AdjudicatorTestScoreHistory
 from .forms import make_feedback_form_class
+from .prefetch import populate_answers, prefetch_feedback_details
 from .tables import FeedbackTableBuilder
 from .utils import get_feedback_overview, parse_feedback
 from .progress import get_feedback_progress
@@ -36,19 +36,18 @@ logger = logging.getLogger(__name__)
 class GetAdjScores(LoginRequiredMixin, TournamentMixin, JsonDataResponseView):
 
     def get_data(self):
-        feedback_weight = self.get_tournament().current_round.feedback_weight
-        data = {}
-        for adj in Adjudicator.objects.all():
-            data[adj.id] = adj.weighted_score(feedback_weight)
-        return data
+        t = self.get_tournament()
+        feedback_weight = t.current_round.feedback_weight
+        adjudicators = annotate_weighted_scores(t.relevant_adjudicators, feedback_weight)
+        return dict(adjudicators.values_list('id', 'weighted_score_annotation'))
 
 
 class GetAdjFeedbackJSON(LoginRequiredMixin, TournamentMixin, JsonDataResponseView):
 
     def get_data(self):
         adjudicator = get_object_or_404(Adjudicator, pk=self.kwargs['pk'])
-        feedback = adjudicator.get_feedback().filter(confirmed=True)
-        questions = self.get_tournament().adj_feedback_questions
+        feedback = prefetch_feedback_details(adjudicator.get_feedback().filter(confirmed=True))
+        questions = list(self.get_tournament().adj_feedback_questions)
         data = [parse_feedback(f, questions) for f in feedback]
         return data
 
@@ -100,12 +99,13 @@ class FeedbackByTargetView(LoginRequiredMixin, TournamentMixin, VueTableTemplate
     def get_table(self):
         tournament = self.get_tournament()
         table = TabbycatTableBuilder(view=self, sort_key="Name")
-        table.add_adjudicator_columns(tournament.adjudicator_set.all())
+        adjudicators = tournament.adjudicator_set.select_related('institution').annotate(
+                feedback_count=Count('adjudicatorfeedback'))
+        table.add_adjudicator_columns(adjudicators)
         feedback_data = []
-        for adj in tournament.adjudicator_set.all():
-            count = adj.adjudicatorfeedback_set.count()
+        for adj in adjudicators:
             feedback_data.append({
-                'text': "{:d} Feedbacks".format(count),
+                'text': "{:d} Feedbacks".format(adj.feedback_count),
                 'link': reverse_tournament('adjfeedback-view-on-adjudicator', tournament, kwargs={'pk': adj.id}),
             })
         table.add_column("Feedbacks", feedback_data)
@@ -173,16 +173,15 @@ class FeedbackCardsView(LoginRequiredMixin, TournamentMixin, TemplateView):
         }
 
     def get_feedbacks(self):
-        questions = self.get_tournament().adj_feedback_questions
-        feedbacks = self.get_feedback_queryset()
+        questions = list(self.get_tournament().adj_feedback_questions)
+        feedbacks = list(self.get_feedback_queryset())
+        populate_answers(feedbacks)
         for feedback in feedbacks:
             feedback.items = []
             for question in questions:
-                try:
-                    answer = question.answer_set.get(feedback=feedback).answer
-                except ObjectDoesNotExist:
+                if question.id not in feedback.answers:
                     continue
-                feedback.items.append({'question': question, 'answer': answer})
+                feedback.items.append({'question': question, 'answer': feedback.answers[question.id]})
         return feedbacks
 
     def get_feedback_queryset(self):
@@ -223,7 +222,8 @@ class FeedbackFromSourceView(SingleObjectFromTournamentMixin, FeedbackCardsView)
 
     def get_feedback_queryset(self):
         kwargs = {self.adjfeedback_filter_field: self.object}
-        return AdjudicatorFeedback.objects.filter(**kwargs).order_by('-timestamp')
+        return AdjudicatorFeedback.objects.filter(**kwargs).order_by('-timestamp').select_related(
+            'adjudicator', 'source_adjudicator__adjudicator', 'source_team__team')
 
 
 class FeedbackOnAdjudicatorView(FeedbackFromSourceView):
@@ -272,20 +272,16 @@ class GetAdjFeedback(LoginRequiredMixin, TournamentMixin, JsonDataResponseView):
             f.score,
         ]
         for question in questions:
-            try:
-                data.append(question.answer_set.get(feedback=f).answer)
-            except ObjectDoesNotExist:
-                data.append("-")
+            data.append(f.answers.get(question.id, "-"))
         data.append(f.confirmed)
         return data
 
     def get_data(self):
         t = self.get_tournament()
         adj = get_object_or_404(Adjudicator, pk=int(self.request.GET['id']))
-        feedback = adj.get_feedback().filter(confirmed=True)
-        questions = t.adj_feedback_questions
+        feedback = prefetch_feedback_details(adj.get_feedback().filter(confirmed=True))
+        questions = list(t.adj_feedback_questions)
 
-        data = [self.parse_feedback(f, questions) for f in feedback]
         data = [parse_feedback(f, questions) for f in feedback]
         return {'aaData': data}
 
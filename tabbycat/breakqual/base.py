@@ -4,7 +4,7 @@ generator (which just takes the top teams)."""
 import logging
 from itertools import groupby
 
-from breakqual.models import BreakingTeam
+from breakqual.models import BreakCategory, BreakingTeam
 from standings.teams import TeamStandingsGenerator
 
 logger = logging.getLogger(__name__)
@@ -21,6 +21,48 @@ class BreakGeneratorError(RuntimeError):
     pass
 
 
+class BreakEligibility:
+    """Which teams are eligible for each break category in a tournament, and
+    the existing remarks of teams in each category, loaded for all categories
+    at once so that break generators can look them up by team ID.
+
+    If breaks are generated for several categories in turn, `reload_remarks()`
+    must be called for each category after its break is generated, so that
+    lower-priority categories know which teams broke in it."""
+
+    def __init__(self, tournament):
+        self.eligible = {}
+        for category_id, team_id in BreakCategory.team_set.through.objects.filter(
+                breakcategory__tournament=tournament).values_list('breakcategory_id', 'team_id'):
+            self.eligible.setdefault(category_id, set()).add(team_id)
+
+        self.priorities = dict(tournament.breakcategory_set.values_list('id', 'priority'))
+        self.remarks = {category_id: {} for category_id in self.priorities}
+        for category_id, team_id, remark in BreakingTeam.objects.filter(
+                break_category__tournament=tournament).values_list('break_category_id', 'team_id', 'remark'):
+            self.remarks[category_id][team_id] = remark
+
+    def reload_remarks(self, category):
+        self.remarks[category.id] = dict(category.breakingteam_set.values_list('team_id', 'remark'))
+
+    def eligible_team_ids(self, category):
+        return self.eligible.get(category.id, set())
+
+    def remark_team_ids(self, category):
+        """Returns the IDs of teams with a (non-blank) remark in `category`."""
+        return {team_id for team_id, remark in self.remarks[category.id].items() if remark}
+
+    def different_break_team_ids(self, category):
+        """Returns the IDs of teams listed in the break of a higher-priority
+        category, other than as ineligible."""
+        team_ids = set()
+        for category_id, remarks in self.remarks.items():
+            if self.priorities[category_id] > category.priority:
+                team_ids.update(team_id for team_id, remark in remarks.items()
+                        if remark != BreakingTeam.REMARK_INELIGIBLE)
+        return team_ids
+
+
 class BaseBreakGenerator:
     """Base class for break generators.
 
@@ -37,7 +79,9 @@ class BaseBreakGenerator:
 
     2. `retrieve_standings()`, which sets `self.standings` to a Standings
        object. This function uses the metrics set in the tournament preferences,
-       and the rankings specified in the `rankings` class attribute.
+       and the rankings specified in the `rankings` class attribute. If shared
+       standings were passed to the constructor, it derives the standings from
+       those, rather than recomputing metrics.
 
     3. `filter_eligible_teams()`, which sets `self.excluded_teams` to a dict
        mapping StandingInfo objects to BreakingTeam.REMARK_* constants, and sets
@@ -56,10 +100,18 @@ class BaseBreakGenerator:
     required_metrics = ()
     rankings = ()
 
-    def __init__(self, category):
-        """`category` is a BreakCategory instance."""
+    def __init__(self, category, standings=None, eligibility=None):
+        """`category` is a BreakCategory instance.
+
+        To avoid repeating work when generating breaks for several categories,
+        `standings` may be team standings for all teams in the tournament,
+        generated using the tournament's team standings precedence, and
+        `eligibility` may be a BreakEligibility for the tournament. These are
+        then shared rather than computed for each category."""
         self.category = category
         self.break_size = category.break_size
+        self.shared_standings = standings
+        self.eligibility = eligibility
 
     def generate(self):
         self.set_team_queryset()
@@ -111,9 +163,27 @@ class BaseBreakGenerator:
         self.check_required_metrics(metrics)
 
         generator = TeamStandingsGenerator(metrics, self.rankings)
-        generated = generator.generate(self.team_queryset)
+
+        # Metrics that depend on which other teams are in the standings (like
+        # who-beat-whom) can't be reused for a subset of teams.
+        if self.shared_standings is None:
+            generated = generator.generate(self.team_queryset)
+        elif self.category.is_general:
+            generated = generator.generate_from(self.shared_standings, self.shared_standings.get_instance_list())
+        elif generator.reusable_metrics:
+            eligible_ids = self.get_eligibility().eligible_team_ids(self.category)
+            teams = [team for team in self.shared_standings.get_instance_list() if team.id in eligible_ids]
+            generated = generator.generate_from(self.shared_standings, teams)
+        else:
+            generated = generator.generate(self.team_queryset)
+
         self.standings = list(generated)
 
+    def get_eligibility(self):
+        if self.eligibility is None:
+            self.eligibility = BreakEligibility(self.category.tournament)
+        return self.eligibility
+
     def filter_eligible_teams(self):
         """Places the eligible StandingInfo objects in
         `self.eligible_teams`, and notes teams that are ineligible for this
@@ -133,29 +203,22 @@ class BaseBreakGenerator:
         institution cap. Such cases should be accounted for directly in the
         `compute_break()` method.
         """
-        existing_remark_teams = self.team_queryset.filter(
-            breakingteam__break_category=self.category,
-            breakingteam__remark__isnull=False,
-        ).exclude(breakingteam__remark__exact='')
-        different_break_teams = self.team_queryset.exclude(
-            breakingteam__remark=BreakingTeam.REMARK_INELIGIBLE,
-            breakingteam__break_category__priority__gt=self.category.priority
-        ).filter(
-            breakingteam__break_category__priority__gt=self.category.priority
-        )
-        ineligible_teams = self.team_queryset.exclude(break_categories=self.category)
+        eligibility = self.get_eligibility()
+        existing_remark_ids = eligibility.remark_team_ids(self.category)
+        eligible_ids = eligibility.eligible_team_ids(self.category)
+        different_break_ids = eligibility.different_break_team_ids(self.category)
 
         self.excluded_teams = {}
         self.eligible_teams = []
 
         for tsi in self.standings:
-            if tsi.team in existing_remark_teams:
+            if tsi.team.id in existing_remark_ids:
                 logger.debug("Excluding %s because it has an existing remark", tsi.team)
                 self.excluded_teams[tsi] = None
-            elif tsi.team in ineligible_teams:
+            elif tsi.team.id not in eligible_ids:
                 logger.debug("Excluding %s because it is ineligible", tsi.team)
                 self.excluded_teams[tsi] = BreakingTeam.REMARK_INELIGIBLE
-            elif tsi.team in different_break_teams:
+            elif tsi.team.id in different_break_ids:
                 logger.debug("Excluding %s because it broke in a different break", tsi.team)
                 self.excluded_teams[tsi] = BreakingTeam.REMARK_DIFFERENT_BREAK
             else:
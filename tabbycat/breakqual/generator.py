@@ -6,6 +6,7 @@ from . import aida  # noqa: F401
 from . import wadl  # noqa: F401
 
 from breakqual.models import BreakCategory
+from standings.teams import TeamStandingsGenerator
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +16,39 @@ def BreakGenerator(category, **kwargs):  # noqa: N802
     return klass(category, **kwargs)
 
 
+def generate_breaks(categories):
+    """Generates the breaks for all of `categories`, which must be in the same
+    tournament, in descending order of priority. The team standings and team
+    eligibility are loaded once and shared between all categories.
+
+    Returns a list of tuples `(category, error)`, where `error` is the
+    BreakGeneratorError raised for that category, or None if it succeeded."""
+
+    categories = sorted(categories, key=lambda category: category.priority, reverse=True)
+    if not categories:
+        return []
+
+    tournament = categories[0].tournament
+    eligibility = base.BreakEligibility(tournament)
+    if len(categories) > 1:
+        generator = TeamStandingsGenerator(tournament.pref('team_standings_precedence'), ())
+        standings = generator.generate(tournament.team_set.all())
+    else:
+        standings = None
+
+    results = []
+    for category in categories:
+        try:
+            BreakGenerator(category, standings=standings, eligibility=eligibility).generate()
+        except base.BreakGeneratorError as e:
+            results.append((category, e))
+        else:
+            results.append((category, None))
+        eligibility.reload_remarks(category)
+
+    return results
+
+
 # Verify that the available generators match the choices in the BreakCategory model
 generator_keys = set(base.registry.keys())
 model_choices = set(key for key, _ in BreakCategory.BREAK_QUALIFICATION_CHOICES)
@@ -0,0 +1,157 @@
+"""Break liveness: whether teams are safe, live or dead in each break category.
+
+A team is *safe* if it will break however the remaining rounds go, and *dead*
+if it can't break however they go. This is computed from the actual wins of
+every team and the number of remaining rounds, assuming only that each debate
+has one winner and one loser. Under that assumption, any distribution of
+remaining wins in which no team wins more than the number of remaining rounds,
+and the total is the number of remaining debates, can happen (with suitable
+pairings). So "safe" and "dead" are certain, regardless of draw rules.
+
+Teams with equal wins are conservatively assumed to rank below each other when
+checking if a team is safe, and above each other when checking if it's dead.
+Categories are considered independently, so teams that might break in another
+category aren't discounted.
+
+Only wins in preliminary rounds count. Thresholds are cached per round, under
+the tournament's content version (see utils/cache.py), which is bumped whenever
+a ballot, a break category or a team's break category membership changes."""
+
+import logging
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from draw.models import Debate
+from participants.models import Team
+from results.models import TeamScore
+from tournaments.models import Round
+from utils.cache import get_content_version
+
+logger = logging.getLogger(__name__)
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def max_teams_reaching(wins, others, remaining, budget):
+    """Returns the most teams in `others` (a sorted list of win counts) that
+    can reach at least `wins` wins, if they can win at most `remaining` more
+    each and `budget` more between them."""
+    count = 0
+    for other in reversed(others):
+        needed = max(wins - other, 0)
+        if needed > remaining or needed > budget:
+            break
+        budget -= needed
+        count += 1
+    return count
+
+
+def min_teams_exceeding(wins, others, remaining, budget, spare_capacity):
+    """Returns the fewest teams in `others` (a list of win counts) that must
+    finish with more than `wins` wins, if `budget` more wins must be won in
+    total, each team can win at most `remaining` more, and teams outside
+    `others` can absorb `spare_capacity` of them."""
+    count = 0
+    extras = []  # additional wins each team could absorb by exceeding `wins`
+    capacity = spare_capacity
+    for other in others:
+        if other > wins:
+            count += 1
+            capacity += remaining
+        else:
+            absorbable = min(remaining, wins - other)
+            capacity += absorbable
+            if absorbable < remaining:
+                extras.append(remaining - absorbable)
+
+    extras.sort(reverse=True)
+    for extra in extras:
+        if capacity >= budget:
+            break
+        capacity += extra
+        count += 1
+    return count
+
+
+def liveness_thresholds(wins, break_size, remaining, nteams):
+    """Returns a tuple `(safe, dead)`, where a team in the category with at
+    least `safe` wins is safe and a team with at most `dead` wins is dead.
+
+    `wins` is a list of the current win counts of teams in the category,
+    `remaining` is the number of remaining rounds, and `nteams` is the number
+    of teams in the tournament (in or out of the category)."""
+
+    wins = sorted(wins)
+    debates = nteams // 2
+    top = max(wins, default=0)
+
+    def others_than(w):
+        # The other teams in the category, if a team has `w` wins
+        if w in wins:
+            others = list(wins)
+            others.remove(w)
+            return others
+        return wins
+
+    def is_safe(w):
+        # Worst case: this team loses every remaining round
+        others = others_than(w)
+        return max_teams_reaching(w, others, remaining, remaining * debates) < break_size
+
+    def is_dead(w):
+        # Best case: this team wins every remaining round
+        others = others_than(w)
+        final = w + remaining
+        spare_capacity = (nteams - len(others) - 1) * remaining
+        budget = remaining * (debates - 1)
+        return min_teams_exceeding(final, others, remaining, budget, spare_capacity) >= break_size
+
+    safe = next((w for w in range(top + 1) if is_safe(w)), top + remaining + 1)
+    dead = next((w for w in range(top, -1, -1) if is_dead(w)), -1)
+    return safe, dead
+
+
+def remaining_rounds(round):
+    """Returns the number of preliminary rounds from `round` onwards that
+    don't yet have all their results confirmed."""
+    rounds = round.tournament.prelim_rounds().filter(seq__gte=round.seq)
+    confirmed = set()
+    unconfirmed = set()
+    for round_id, status in Debate.objects.filter(round__in=rounds).values_list('round_id', 'result_status'):
+        (confirmed if status == Debate.STATUS_CONFIRMED else unconfirmed).add(round_id)
+    return len(set(rounds.values_list('id', flat=True)) - (confirmed - unconfirmed))
+
+
+def get_live_thresholds(tournament, round):
+    """Returns a dict mapping the ID of each break category in `tournament` to
+    a tuple `(safe, dead)` of liveness thresholds going into `round`."""
+
+    version = get_content_version(tournament.id)
+    key = "%s_%s_%s_%.6f" % (tournament.id, round.id, 'live_thresholds', version)
+    thresholds = cache.get(key)
+    if thresholds is not None:
+        return thresholds
+
+    nteams = tournament.team_set.exclude(type=Team.TYPE_BYE).count()
+    remaining = remaining_rounds(round)
+
+    wins_by_team = dict(TeamScore.objects.filter(
+        ballot_submission__confirmed=True, win=True, debate_team__team__tournament=tournament,
+        debate_team__debate__round__stage=Round.STAGE_PRELIMINARY,
+    ).values('debate_team__team_id').annotate(wins=Count('id')).values_list('debate_team__team_id', 'wins'))
+
+    wins_by_category = {}
+    for category_id, team_id in Team.break_categories.through.objects.filter(
+            breakcategory__tournament=tournament).values_list('breakcategory_id', 'team_id'):
+        wins_by_category.setdefault(category_id, []).append(wins_by_team.get(team_id, 0))
+
+    thresholds = {}
+    for category in tournament.breakcategory_set.all():
+        thresholds[category.id] = liveness_thresholds(wins_by_category.get(category.id, []),
+                category.break_size, remaining, nteams)
+        logger.debug("Liveness thresholds for %s with %d rounds remaining: safe %d, dead %d",
+                category.name, remaining, *thresholds[category.id])
+
+    cache.set(key, thresholds, CACHE_TIMEOUT)
+    return thresholds
@@ -0,0 +1,107 @@
+import random
+import unittest
+from itertools import combinations, product
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from breakqual.liveness import get_live_thresholds, liveness_thresholds
+from draw.models import Debate, DebateTeam
+from results.models import BallotSubmission, TeamScore
+from tournaments.models import Round
+from utils.tests import TournamentTestsMixin
+
+
+class TestLivenessThresholds(unittest.TestCase):
+
+    def brute_force(self, wins, category, break_size, remaining):
+        """Returns a list of (safe, dead) for each team in `category`, by trying
+        every possible set of winners in every remaining round."""
+        nteams = len(wins)
+        winner_sets = list(combinations(range(nteams), nteams // 2))
+        finals = []
+        for outcome in product(winner_sets, repeat=remaining):
+            final = list(wins)
+            for winners in outcome:
+                for team in winners:
+                    final[team] += 1
+            finals.append(final)
+
+        results = []
+        for team in category:
+            others = [other for other in category if other != team]
+            safe = all(sum(1 for o in others if final[o] >= final[team]) < break_size for final in finals)
+            dead = all(sum(1 for o in others if final[o] > final[team]) >= break_size for final in finals)
+            results.append((safe, dead))
+        return results
+
+    def test_against_brute_force(self):
+        rng = random.Random(1234)
+        for i in range(150):
+            nteams = rng.choice([4, 6])
+            remaining = rng.randint(0, 2)
+            wins = [rng.randint(0, 3) for team in range(nteams)]
+            category = sorted(rng.sample(range(nteams), rng.randint(2, nteams)))
+            break_size = rng.randint(1, len(category) - 1)
+
+            safe, dead = liveness_thresholds([wins[t] for t in category], break_size, remaining, nteams)
+            expected = self.brute_force(wins, category, break_size, remaining)
+
+            for team, (is_safe, is_dead) in zip(category, expected):
+                with self.subTest(wins=wins, category=category, break_size=break_size,
+                                  remaining=remaining, team=team):
+                    self.assertEqual(wins[team] >= safe, is_safe)
+                    self.assertEqual(wins[team] <= dead, is_dead)
+
+    def test_everyone_breaks(self):
+        self.assertEqual(liveness_thresholds([0, 1, 2], 4, 3, 20), (0, -1))
+
+    def test_no_rounds_remaining(self):
+        safe, dead = liveness_thresholds([5, 4, 4, 3, 2], 2, 0, 10)
+        self.assertEqual(safe, 5)
+        self.assertEqual(dead, 3)
+
+
+class TestGetLiveThresholds(TournamentTestsMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.round = self.t.prelim_rounds().last()
+        self.category = self.t.breakcategory_set.first()
+
+    def recompute(self):
+        cache.clear()
+        return get_live_thresholds(self.t, self.round)
+
+    def test_elimination_wins_ignored(self):
+        before = self.recompute()
+
+        # Give every team in the category a confirmed win in an elimination round
+        elim = Round.objects.create(tournament=self.t, seq=100, abbreviation="X", name="Extra",
+                stage=Round.STAGE_ELIMINATION, draw_type=Round.DRAW_BREAK, break_category=self.category)
+        for team in self.category.team_set.all():
+            debate = Debate.objects.create(round=elim)
+            debate_team = DebateTeam.objects.create(debate=debate, team=team, side=DebateTeam.SIDE_AFFIRMATIVE)
+            ballotsub = BallotSubmission.objects.create(debate=debate, confirmed=True,
+                    submitter_type=BallotSubmission.SUBMITTER_TABROOM)
+            TeamScore.objects.create(ballot_submission=ballotsub, debate_team=debate_team, points=1, win=True)
+
+        self.assertEqual(self.recompute(), before)
+
+    def test_break_size_change_invalidates(self):
+        before = get_live_thresholds(self.t, self.round)
+        self.category.break_size = 1
+        self.category.save()
+        after = get_live_thresholds(self.t, self.round)
+        self.assertNotEqual(after, before)
+        self.assertEqual(after, self.recompute())
+
+    def test_break_category_membership_invalidates(self):
+        before = get_live_thresholds(self.t, self.round)
+        teams = list(self.category.team_set.all())
+        for team in teams[:len(teams) // 2]:
+            team.break_categories.remove(self.category)
+        after = get_live_thresholds(self.t, self.round)
+        self.assertNotEqual(after, before)
+        self.assertEqual(after, self.recompute())
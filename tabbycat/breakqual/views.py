@@ -10,9 +10,8 @@ from utils.mixins import CacheMixin, PostOnlyRedirectView, SuperuserRequiredMixi
 from utils.tables import TabbycatTableBuilder
 from tournaments.mixins import PublicTournamentPageMixin, SingleObjectFromTournamentMixin, TournamentMixin
 
-from .base import BreakGeneratorError
 from .utils import breakcategories_with_counts, get_breaking_teams
-from .generator import BreakGenerator
+from .generator import BreakGenerator, generate_breaks
 from .models import BreakCategory, BreakingTeam
 from . import forms
 
@@ -75,12 +74,10 @@ class GenerateBreakMixin:
         containing a list of names of categories where breaks were successfully
         generated."""
         successes = []
-        for category in categories:
-            try:
-                BreakGenerator(category).generate()
-            except BreakGeneratorError as e:
+        for category, error in generate_breaks(categories):
+            if error is not None:
                 messages.error(self.request, _("There was an error generating the break for category "
-                    "%(category)s: %(message)s") % {'category': category.name, 'message': str(e)})
+                    "%(category)s: %(message)s") % {'category': category.name, 'message': str(error)})
             else:
                 successes.append(category.name)
         return ", ".join(successes)
@@ -1,14 +1,230 @@
+import logging
 import random
 
-from .models import Division
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
 
 from participants.models import Institution, Team
+from utils.cache import bump_content_version
+from venues.models import VenueCategory, VenueConstraint
 
+from .models import Division
 
-class DivisionAllocator():
+logger = logging.getLogger(__name__)
+
+INFINITY = float('inf')
+
+
+def division_sizes(nteams, minimum_size, ideal_size, maximum_size):
+    """Returns a list of division sizes that add up to `nteams`, differ from
+    each other by at most one, and are as close to `ideal_size` as possible
+    while being between `minimum_size` and `maximum_size`. If that's not
+    possible, it returns the sizes closest to `ideal_size` and logs a warning."""
+    if nteams == 0:
+        return []
+
+    if is_divisible(nteams, minimum_size, maximum_size):
+        fewest = -(-nteams // maximum_size)  # ceiling division
+        most = nteams // minimum_size
+        ndivisions = min(range(fewest, most + 1), key=lambda k: abs(nteams / k - ideal_size))
+    else:
+        ndivisions = max(round(nteams / ideal_size), 1)
+        logger.warning("Can't divide %d teams into divisions of between %d and %d teams",
+                nteams, minimum_size, maximum_size)
+
+    return [nteams // ndivisions + (1 if i < nteams % ndivisions else 0) for i in range(ndivisions)]
+
+
+def is_divisible(nteams, minimum_size, maximum_size):
+    """Returns True if `nteams` teams can be divided into divisions of between
+    `minimum_size` and `maximum_size` teams."""
+    return -(-nteams // maximum_size) <= nteams // minimum_size
+
+
+def largest_divisible_count(capacity, minimum_size, maximum_size):
+    """Returns the largest number of teams, not more than `capacity`, that can
+    be divided into divisions of between `minimum_size` and `maximum_size`
+    teams, or 0 if there isn't one."""
+    for nteams in range(capacity, 0, -1):
+        if is_divisible(nteams, minimum_size, maximum_size):
+            return nteams
+    return 0
+
+
+class CapacitatedAssignment:
+    """Maintains a minimum-cost assignment of items to categories, where
+    `costs[i][c]` is the cost of assigning item `i` to category `c` and each
+    category `c` can take at most `capacities[c]` items.
+
+    Items are added one at a time using successive shortest paths: if an
+    item's cheapest category is full, it's assigned along the cheapest chain
+    of moves (each moving one item from one category to another), found by
+    Bellman-Ford over the categories. The assignment is optimal after every
+    addition. Since the graph has one node per category, not per item, this is
+    fast when there are few categories relative to items."""
+
+    def __init__(self, costs, capacities):
+        self.costs = costs
+        self.capacities = capacities
+        self.loads = [0] * len(capacities)
+        self.members = [set() for c in capacities]
+        self.assigned = [None] * len(costs)
+
+    def spare(self, category):
+        return self.capacities[category] - self.loads[category]
+
+    def add(self, item):
+        """Assigns `item`, and returns its category, or None if it's left
+        unassigned. If every category is full, `item` is assigned only if that
+        makes it cheaper to displace another item instead."""
+        categories = [c for c, capacity in enumerate(self.capacities) if capacity > 0]
+        if not categories:
+            return None
+        spare = [c for c in categories if self.spare(c) > 0]
+        row = self.costs[item]
+
+        # If the cheapest category has space, that's optimal
+        cheapest = min(row[c] for c in categories)
+        direct = [c for c in spare if row[c] == cheapest]
+        if direct:
+            category = max(direct, key=self.spare)
+            self._place(item, category)
+            return category
+
+        dist, pred = self._shortest_paths(row, categories)
+
+        if spare:
+            category = min(spare, key=lambda c: (dist[c], -self.spare(c)))
+            evicted = None
+        else:
+            # Find the member whose eviction, after moving the chain along,
+            # saves the most
+            saving, category, evicted = min(((dist[c] - self.costs[member][c], c, member)
+                    for c in categories for member in self.members[c]), key=lambda x: x[0])
+            if saving >= 0:
+                return None
+            self._remove(evicted, category)
+
+        # Apply the chain backwards from the category with space
+        while pred[category] is not None:
+            previous, member = pred[category]
+            self._remove(member, previous)
+            self._place(member, category)
+            category = previous
+        self._place(item, category)
+        return category
+
+    def _shortest_paths(self, row, categories):
+        """Returns `(dist, pred)`, where `dist[c]` is the cost of the cheapest
+        chain of moves that gets a new item with costs `row` into category `c`,
+        and `pred[c]` is `(previous category, moved item)` on that chain, or
+        None if the new item goes to `c` directly."""
+
+        # `moves[c1, c2]` is the cheapest (cost, item) to move from c1 to c2
+        moves = {}
+        for c1 in categories:
+            for member in self.members[c1]:
+                member_row = self.costs[member]
+                for c2 in categories:
+                    if c1 == c2:
+                        continue
+                    cost = member_row[c2] - member_row[c1]
+                    if (c1, c2) not in moves or cost < moves[c1, c2][0]:
+                        moves[c1, c2] = (cost, member)
+
+        # Bellman-Ford; there are no negative cycles, since the current
+        # assignment is optimal
+        dist = [INFINITY] * len(self.capacities)
+        for c in categories:
+            dist[c] = row[c]
+        pred = [None] * len(self.capacities)
+        for i in range(len(categories)):
+            changed = False
+            for (c1, c2), (cost, member) in moves.items():
+                if dist[c1] + cost < dist[c2]:
+                    dist[c2] = dist[c1] + cost
+                    pred[c2] = (c1, member)
+                    changed = True
+            if not changed:
+                break
+
+        return dist, pred
+
+    def _place(self, item, category):
+        self.assigned[item] = category
+        self.members[category].add(item)
+        self.loads[category] += 1
+
+    def _remove(self, item, category):
+        self.assigned[item] = None
+        self.members[category].remove(item)
+        self.loads[category] -= 1
+
+
+def calc_costs(constraints, ncategories):
+    """Returns a cost matrix with a row for each element of `constraints`, a
+    list of `(priority, category index)` tuples in descending order of
+    priority, and a column for each category."""
+    min_priority = min((priority for cs in constraints for priority, c in cs), default=0)
+    unconstrained = [0] * ncategories
+
+    costs = []
+    for item_constraints in constraints:
+        if not item_constraints:
+            costs.append(unconstrained)
+            continue
+        row = []
+        for category in range(ncategories):
+            cost = 0
+            for priority, c in item_constraints:
+                if c == category:
+                    break
+                cost += 1 + priority - min_priority
+            row.append(cost)
+        costs.append(row)
+    return costs
+
+
+def assign_teams(costs, capacities, minimum_size, maximum_size, order):
+    """Returns a list with the index of the category to which each team is
+    assigned, or None if it couldn't be. Teams are added in `order`.
+
+    Each category takes at most as many teams as it has capacity for. If a
+    category ends up with a number of teams that can't be divided into
+    divisions within the size limits, its limit is lowered to the next
+    divisible number (possibly zero, excluding it) and the assignment is
+    rerun, until every category's teams can be divided."""
+    limits = [largest_divisible_count(capacity, minimum_size, maximum_size) for capacity in capacities]
+    while True:
+        assignment = CapacitatedAssignment(costs, limits)
+        for team in order:
+            assignment.add(team)
+
+        indivisible = [c for c, load in enumerate(assignment.loads)
+                       if load > 0 and not is_divisible(load, minimum_size, maximum_size)]
+        if not indivisible:
+            return assignment.assigned
+        logger.info("Lowering limits of %d venue categories with indivisible numbers of teams", len(indivisible))
+        for c in indivisible:
+            limits[c] = largest_divisible_count(assignment.loads[c] - 1, minimum_size, maximum_size)
+
+
+class DivisionAllocator:
+    """Allocates teams to divisions, so that teams are in divisions held at
+    venue categories that satisfy their and their institutions' venue
+    constraints, where possible, and divisions are between the minimum and
+    maximum division sizes, as close as possible to the ideal size.
+
+    The capacity of each venue category is its number of venues. Each team's
+    constraints (including its institution's) are treated as alternatives: a
+    team in a category meeting one of its constraints isn't penalised for its
+    lower-priority constraints, and each unmet constraint before that costs
+    more the higher its priority. Teams are assigned to categories to minimise
+    the total cost (see CapacitatedAssignment), then each category's teams are
+    divided into divisions of balanced sizes."""
 
     def __init__(self, teams, divisions, venue_categories, tournament, institutions):
-        print("Allocating divisions for %s" % tournament)
+        logger.info("Allocating divisions for %s", tournament)
         self.teams = teams
         self.divisions = divisions
         self.venue_categories = venue_categories
@@ -21,205 +237,111 @@ class DivisionAllocator():
         self.maximum_division_size = tournament.pref('maximum_division_size')
 
     def allocate(self):
-        # Entry Point
-        division_dict = {v: [] for v in self.venue_categories}
-        allocated_teams = []
-        all_constraints = []
-        all_teams = self.teams
-
-        team_constraints = [] # Get all the relevant team constraints
-        for team in all_teams:
-            team_constraints.extend(team.venue_constraints.order_by('-priority'))
-        print('Have %s team_constraints' % (team_constraints))
-
-        # First sweep of allocations just using team constraints
-        if len(team_constraints) > 0:
-            print("---\nStarting first round team allocations")
-            all_constraints.extend(team_constraints)
-            division_dict, allocated_teams = self.allocate_to_constraints(
-                division_dict, allocated_teams, all_teams, all_constraints)
-            print("Post-Allocate 1: have %s/%s teams allocated across %s venues"
-                % (len(allocated_teams), len(all_teams), len(division_dict)))
-        else:
-            print("---\nSkipping first team allocation as there are no team constraints")
+        teams = list(self.teams)
+        categories = list(self.venue_categories)
+        if not teams or not categories:
+            logger.warning("Can't allocate divisions with %d teams and %d venue categories",
+                    len(teams), len(categories))
+            return True
 
-        # Get all the relevant institution constraints
-        institutional_constraints = []
-        for institution in self.institutions:
-            institutional_constraints.extend(institution.venue_constraints.order_by('-priority'))
-        print('Have %s institutional_constraints' % (institutional_constraints))
+        capacities = self.load_capacities(categories)
+        constraints = self.load_constraints(teams, categories)
+        costs = calc_costs(constraints, len(categories))
 
-        # Add institutional constraints to the big list
-        all_constraints.extend(institutional_constraints)
+        # Constrained teams first, highest priority first, otherwise random
+        order = list(range(len(teams)))
+        random.shuffle(order)
+        order.sort(key=lambda i: -constraints[i][0][0] if constraints[i] else INFINITY)
 
-        if len(all_constraints) == 0:
-            print("---\nSkipping subequent allocations as there are no constraints at all")
-            return True
+        assigned = assign_teams(costs, capacities, self.minimum_division_size, self.maximum_division_size, order)
 
-        print("---\nStarting second round team allocations")
-        division_dict, allocated_teams = self.allocate_to_constraints(
-            division_dict, allocated_teams, all_teams,
-            all_constraints, force_fill=True)
+        groups = [[] for category in categories]
+        unallocated = []
+        unmet = 0
+        for i, c in enumerate(assigned):
+            if c is None:
+                unallocated.append(teams[i])
+            else:
+                groups[c].append(teams[i])
+                if costs[i][c] > 0:
+                    unmet += 1
 
-        # # First round of culls
-        # division_dict, allocated_teams = self.cull_venues(division_dict, allocated_teams)
-        # print("Post-Cull 1: have %s/%s teams allocated across %s venues" % (len(allocated_teams), len(all_teams), len(division_dict)))
+        ndivisions = self.create_divisions(categories, groups, capacities)
 
-        # # Second sweep of allocations
-        # unalloacted_teams = [te for te in all_teams if not te in allocated_teams]
-        # division_dict, allocated_teams = self.allocate_to_constraints(division_dict, allocated_teams, unalloacted_teams, )
-        # print("Post-Allocate 2: have %s/%s teams allocated across %s venues" % (len(allocated_teams), len(all_teams), len(division_dict)))
+        # QuerySet.update() doesn't send signals, so bump the content version
+        bump_content_version(self.tournament.id)
 
-        self.determine_division_size(division_dict, allocated_teams, all_teams)
+        logger.info("Made %d divisions over %d venue categories, allocated %d/%d teams, "
+                "%d teams not in their first-choice category", ndivisions, sum(1 for g in groups if g),
+                len(teams) - len(unallocated), len(teams), unmet)
+        if unallocated:
+            logger.warning("Couldn't allocate %d teams to divisions, because there wasn't enough venue capacity: %s",
+                    len(unallocated), ", ".join(str(team) for team in unallocated))
         return True
 
-    def allocate_to_constraints(self, division_dict, allocated_teams, all_teams, all_constraints, force_fill=False):
-        teams_to_allocate = list(all_teams)
-        random.shuffle(all_teams)
-        random.shuffle(all_constraints)
-        all_constraints.sort(key=lambda x: x.priority, reverse=True)
-        # Division dictionary structure: { <VenueCategory: PC Wed W1>: [], <VenueCategory: PC Wed W2>: [], ... }
-
-        # Sort preferences by priority then do all the allocations
-        for constraint in all_constraints:
-            # Find the relevant venue group that matches this constraint
-            first_venue = constraint.category.venues.first()
-            vc = [vc for vc in self.venue_categories if first_venue in vc.venues.all()]
-
-            # Not finding a vc is likely because no venues have been assigned with groups
-            if len(vc) == 0:
-                print("Skipped matching constraint because couldn't match it to a Venue Group ")
-                continue
-            else:
-                vc = vc[0]
-
-            # Infer capacity from number of venues
-            vc_capacity = vc.venues.count()
-            print("VenueCategory is:", vc)
-            print("VenueCategory Capacity is:", vc_capacity)
-
-            if len(division_dict[vc]) >= vc_capacity:
-                # If this venue is full
-                pass
-
-            elif isinstance(constraint.subject, Team):
-                team = constraint.subject
-                if team not in allocated_teams:
-                    group = vc
-                    division_dict[group].append(team)
-                    allocated_teams.append(team)
-                    teams_to_allocate.remove(team)
-
-            elif isinstance(constraint.subject, Institution):
-                for team in teams_to_allocate:
-                    if team.institution == constraint.subject and team not in allocated_teams:
-                        group = vc
-                        division_dict[group].append(team)
-                        allocated_teams.append(team)
-                        teams_to_allocate.remove(team)
-
-        # Randomly apply leftovers
-        if force_fill:
-            for team in teams_to_allocate:
-                vcs_with_capacity = [
-                    v_g for v_g in list(division_dict.keys()) if len(division_dict[v_g]) <= v_g.venues.count() - 1]
-
-                if len(vcs_with_capacity) is 0:
-                    continue
-
-                random_vc = random.choice(vcs_with_capacity)
-                if not random_vc:
-                    continue
-
-                print("allocating team %s to venue category %s (%s/%s) based on last resort" % (
-                    team, random_vc, len(division_dict[random_vc]), random_vc.venues.count()))
-                division_dict[random_vc].append(team)
-                allocated_teams.append(team)
-
-        for category, group_teams in division_dict.items():
-            # Trying to mix up the distributions within divisions
-            random.shuffle(group_teams)
+    def load_capacities(self, categories):
+        """Returns a list of the number of venues in each category."""
+        index = {category.id: c for c, category in enumerate(categories)}
+        capacities = [0] * len(categories)
+        for category_id in VenueCategory.venues.through.objects.filter(
+                venuecategory_id__in=list(index)).values_list('venuecategory_id', flat=True):
+            capacities[index[category_id]] += 1
+        return capacities
+
+    def load_constraints(self, teams, categories):
+        """Returns a list with a list for each team of tuples `(priority,
+        category index)`, one for each constraint on that team or its
+        institution, in descending order of priority. Constraints referring to
+        categories not in `categories` are ignored."""
+        content_types = ContentType.objects.get_for_models(Team, Institution)
+        team_ct = content_types[Team].id
+        institution_ct = content_types[Institution].id
+        index = {category.id: c for c, category in enumerate(categories)}
+
+        institution_ids = {team.institution_id for team in teams if team.institution_id is not None}
+        subjects = Q(subject_content_type_id=team_ct, subject_id__in=[team.id for team in teams]) | \
+            Q(subject_content_type_id=institution_ct, subject_id__in=institution_ids)
+
+        by_subject = {}
+        for ct_id, subject_id, category_id, priority in VenueConstraint.objects.filter(subjects).values_list(
+                'subject_content_type_id', 'subject_id', 'category_id', 'priority'):
+            if category_id in index:
+                by_subject.setdefault((ct_id, subject_id), []).append((priority, index[category_id]))
+
+        constraints = []
+        for team in teams:
+            team_constraints = by_subject.get((team_ct, team.id), []) + \
+                by_subject.get((institution_ct, team.institution_id), [])
+            team_constraints.sort(reverse=True)
+            constraints.append(team_constraints)
+
+        logger.info("Loaded constraints for %d of %d teams", sum(1 for c in constraints if c), len(teams))
+        return constraints
+
+    def create_divisions(self, categories, groups, capacities):
+        """Divides the teams in each group into divisions, and saves them.
+        Returns the number of divisions created."""
+        di = 1  # number of current division
+        for category, group_teams, capacity in zip(categories, groups, capacities):
             random.shuffle(group_teams)
-            random.shuffle(group_teams)
-
-        return division_dict, allocated_teams
-
-    def cull_venues(self, division_dict, allocated_teams):
-
-        culled_division_dict = {}
-        for category, group_teams in division_dict.items():
-            if len(group_teams) > 0 and len(group_teams) < self.minimum_division_size:
-                # If the amount of allocated teams is not enough for one division
-                print("\t culling %s because too few teams (%s)" % (category, len(group_teams)))
-                for ttr in group_teams:
-                    allocated_teams.remove(ttr)
-            else:
-                culled_division_dict[category] = group_teams
-
-        return culled_division_dict, allocated_teams
-
-    def determine_division_size(self, division_dict, allocated_teams, all_teams):
-        di = 1  # index of current division
-
-        for category, group_teams in division_dict.items():
-            if len(group_teams) > 0:
-                print("------\n%s has %s/%s teams" % (category, len(group_teams), category.venues.count()))
-
-                # Using the ideal division size, how many divisions can we support?
-                possible_ideal_divisions = len(group_teams) // self.ideal_division_size
-                possible_ideal_remainder = len(group_teams) % self.ideal_division_size
-                print("\t %s possible_ideal_division of 6 with %s leftover" % (possible_ideal_divisions, possible_ideal_remainder))
-                possible_small_divisions = len(group_teams) // self.minimum_division_size
-                possible_small_remainder = len(group_teams) % self.minimum_division_size
-                print("\t %s possible_small_division of 5 with %s leftover" % (possible_small_divisions, possible_small_remainder))
-
-                if min(possible_ideal_remainder, possible_small_remainder) == possible_ideal_remainder and possible_ideal_divisions > 0:
-                    di = self.create_venue_divisions(
-                        category, group_teams, di, self.ideal_division_size,
-                        possible_ideal_divisions, possible_ideal_remainder)
-                elif min(possible_ideal_remainder, possible_small_remainder) == possible_small_remainder and possible_small_divisions > 0:
-                    di = self.create_venue_divisions(
-                        category, group_teams, di, self.minimum_division_size,
-                        possible_small_divisions, possible_small_remainder)
-                else:
-                    print("\t no options - this shouldn't happen")
-
-        print("------")
-        print("Made %s divisions over %s venues, Allocated %s / %s teams" % (di, len(division_dict), len(allocated_teams), len(all_teams)))
-
-        unalloacted_teams = [te for te in all_teams if te not in allocated_teams]
-        for ute in unalloacted_teams:
-            # print("\t %s not allocated" % ute)
-            pass
-
-    def create_division(self, di, category, group_teams, team_index, division_size):
-
-        new_division, created = Division.objects.get_or_create(
-            name=str(di),
-            tournament=self.tournament,
-            venue_category=category
-        )
-        for i in range(team_index, team_index+division_size):
-            group_teams[i].division = new_division
-            group_teams[i].save()
-
-        print("\t Made division #%s of size %s" % (new_division, division_size))
-
-    def create_venue_divisions(self, category, group_teams, di, base_division_size,
-                               possible_divisions, remainder):
-
-        random.shuffle(group_teams)
-        divisions = [base_division_size] * possible_divisions
-
-        for i in range(0, remainder):
-            # Re-distributing the excess numbers to the other divisions
-            divisions.sort()
-            divisions[0] += 1
-
-        team_index = 0
-        for division_size in divisions:
-            self.create_division(di, category, group_teams, team_index, division_size)
-            team_index += division_size
-            di += 1
-
-        return di
+            sizes = division_sizes(len(group_teams), self.minimum_division_size,
+                    self.ideal_division_size, self.maximum_division_size)
+            if sizes:
+                logger.info("%s has %d/%d teams, in divisions of sizes %s", category, len(group_teams),
+                        capacity, sizes)
+
+            team_index = 0
+            for division_size in sizes:
+                division_teams = group_teams[team_index:team_index+division_size]
+                new_division, created = Division.objects.get_or_create(
+                    name=str(di),
+                    tournament=self.tournament,
+                    venue_category=category
+                )
+                Team.objects.filter(id__in=[team.id for team in division_teams]).update(division=new_division)
+                for team in division_teams:
+                    team.division = new_division
+                team_index += division_size
+                di += 1
+
+        return di - 1
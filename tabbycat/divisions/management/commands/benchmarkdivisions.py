@@ -0,0 +1,77 @@
+import random
+from collections import Counter
+from timeit import default_timer as timer
+
+from django.core.management.base import BaseCommand
+
+from divisions.division_allocator import assign_teams, calc_costs, division_sizes
+from draw.benchmark import weighted_choices
+
+
+class Command(BaseCommand):
+
+    help = "Times the division allocation algorithm on synthetic leagues, without using the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--teams", type=int, nargs="+", default=[100, 500, 1000],
+            help="Numbers of teams in synthetic leagues (default: 100 500 1000)")
+        parser.add_argument("--venues-per-category", type=int, default=20,
+            help="Average number of venues in each venue category (default: 20)")
+        parser.add_argument("--constrained", type=float, default=0.5,
+            help="Fraction of institutions with venue constraints (default: 0.5)")
+        parser.add_argument("--minimum", type=int, default=5,
+            help="Minimum division size (default: 5)")
+        parser.add_argument("--ideal", type=int, default=6,
+            help="Ideal division size (default: 6)")
+        parser.add_argument("--maximum", type=int, default=8,
+            help="Maximum division size (default: 8)")
+        parser.add_argument("--seed", type=int, default=None,
+            help="Seed for the random number generator")
+
+    def synthetic_league(self, nteams, options, rng):
+        """Returns a tuple `(constraints, capacities)` for a synthetic league,
+        in the forms used by the division allocator. Institutions vary in size,
+        some have constraints to one or two categories, and there's about 20%
+        more venue capacity than teams."""
+        ncategories = max(round(nteams * 1.2 / options["venues_per_category"]), 1)
+        capacities = [rng.randint(options["venues_per_category"] // 2, options["venues_per_category"] * 3 // 2)
+                      for i in range(ncategories)]
+
+        ninstitutions = max(nteams // 8, 1)
+        institution_constraints = []
+        for i in range(ninstitutions):
+            if rng.random() < options["constrained"]:
+                categories = rng.sample(range(ncategories), min(rng.randint(1, 2), ncategories))
+                institution_constraints.append([(rng.randint(1, 5), c) for c in categories])
+            else:
+                institution_constraints.append([])
+
+        weights = [1 / (i + 1) for i in range(ninstitutions)]
+        institutions = weighted_choices(range(ninstitutions), weights, nteams, rng)
+        constraints = [sorted(institution_constraints[i], reverse=True) for i in institutions]
+        return constraints, capacities
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        minimum, ideal, maximum = options["minimum"], options["ideal"], options["maximum"]
+
+        for nteams in options["teams"]:
+            constraints, capacities = self.synthetic_league(nteams, options, rng)
+
+            start = timer()
+            costs = calc_costs(constraints, len(capacities))
+            order = list(range(nteams))
+            rng.shuffle(order)
+            order.sort(key=lambda i: -constraints[i][0][0] if constraints[i] else float('inf'))
+            assigned = assign_teams(costs, capacities, minimum, maximum, order)
+            loads = Counter(c for c in assigned if c is not None)
+            sizes = Counter(size for load in loads.values() for size in division_sizes(load, minimum, ideal, maximum))
+            elapsed = timer() - start
+
+            unallocated = sum(1 for c in assigned if c is None)
+            unmet = sum(1 for i, c in enumerate(assigned) if c is not None and costs[i][c] > 0)
+            nconstrained = sum(1 for c in constraints if c)
+            self.stdout.write("{:5d} teams, {:3d} categories: {:7.3f} s, {:d} unallocated, {:d}/{:d} constrained "
+                    "teams not in first choice, division sizes: {}".format(nteams, len(capacities), elapsed,
+                    unallocated, unmet, nconstrained, ", ".join("{:d}×{:d}".format(n, size)
+                    for size, n in sorted(sizes.items()))))
@@ -0,0 +1,182 @@
+import random
+import unittest
+from itertools import product
+
+from django.test import TestCase
+
+from divisions.division_allocator import CapacitatedAssignment, division_sizes, DivisionAllocator, largest_divisible_count
+from divisions.models import Division
+from participants.models import Institution, Team
+from tournaments.models import Tournament
+from venues.models import Venue, VenueCategory, VenueConstraint
+
+
+class TestDivisionSizes(unittest.TestCase):
+
+    def test_no_teams(self):
+        self.assertEqual(division_sizes(0, 5, 6, 8), [])
+
+    def test_ideal(self):
+        self.assertEqual(division_sizes(12, 5, 6, 8), [6, 6])
+        self.assertEqual(division_sizes(18, 5, 6, 8), [6, 6, 6])
+
+    def test_balanced(self):
+        self.assertEqual(division_sizes(13, 5, 6, 8), [7, 6])
+        self.assertEqual(division_sizes(20, 5, 6, 8), [7, 7, 6])
+
+    def test_within_limits(self):
+        # 9 is the largest number of teams that can't be divided
+        for nteams in range(10, 100):
+            sizes = division_sizes(nteams, 5, 6, 8)
+            self.assertEqual(sum(sizes), nteams)
+            self.assertLessEqual(max(sizes) - min(sizes), 1)
+            for size in sizes:
+                self.assertGreaterEqual(size, 5)
+                self.assertLessEqual(size, 8)
+
+    def test_indivisible(self):
+        # 9 teams can't be divided into divisions of 5 to 8 teams
+        with self.assertLogs('divisions.division_allocator', 'WARNING'):
+            sizes = division_sizes(9, 5, 6, 8)
+        self.assertEqual(sum(sizes), 9)
+        self.assertLessEqual(max(sizes) - min(sizes), 1)
+
+
+class TestLargestDivisibleCount(unittest.TestCase):
+
+    def test_divisible(self):
+        self.assertEqual(largest_divisible_count(8, 5, 8), 8)
+        self.assertEqual(largest_divisible_count(10, 5, 8), 10)
+
+    def test_indivisible(self):
+        self.assertEqual(largest_divisible_count(9, 5, 8), 8)
+        self.assertEqual(largest_divisible_count(4, 5, 8), 0)
+        self.assertEqual(largest_divisible_count(0, 5, 8), 0)
+
+    def test_all_divisible_above_threshold(self):
+        # From 20 (= 4 × 5) up, any number can be split into 5 to 6 teams
+        for capacity in range(20, 60):
+            self.assertEqual(largest_divisible_count(capacity, 5, 6), capacity)
+
+
+class TestCapacitatedAssignment(unittest.TestCase):
+
+    def brute_force(self, costs, capacities):
+        """Returns the minimum cost of assigning as many items as possible."""
+        nassigned = min(len(costs), sum(capacities))
+        best = None
+        for assignment in product([None] + list(range(len(capacities))), repeat=len(costs)):
+            if sum(1 for c in assignment if c is not None) != nassigned:
+                continue
+            if any(assignment.count(c) > capacity for c, capacity in enumerate(capacities)):
+                continue
+            cost = sum(row[c] for row, c in zip(costs, assignment) if c is not None)
+            if best is None or cost < best:
+                best = cost
+        return best
+
+    def assertOptimal(self, costs, capacities):  # noqa: N802
+        assignment = CapacitatedAssignment(costs, capacities)
+        for item in range(len(costs)):
+            assignment.add(item)
+
+        for c, capacity in enumerate(capacities):
+            self.assertLessEqual(assignment.assigned.count(c), capacity)
+            self.assertEqual(assignment.assigned.count(c), assignment.loads[c])
+        self.assertEqual(sum(1 for c in assignment.assigned if c is not None), min(len(costs), sum(capacities)))
+
+        cost = sum(row[c] for row, c in zip(costs, assignment.assigned) if c is not None)
+        self.assertEqual(cost, self.brute_force(costs, capacities), msg="costs %s, capacities %s" % (costs, capacities))
+
+    def test_cheapest_full(self):
+        # Item 1 should displace item 0, which can move more cheaply
+        self.assertOptimal([[0, 1], [0, 5]], [1, 1])
+
+    def test_chain(self):
+        # Item 2 needs category 0, pushing item 0 to 1 and item 1 to 2
+        self.assertOptimal([[0, 1, 9], [9, 0, 1], [0, 9, 9]], [1, 1, 1])
+
+    def test_not_enough_capacity(self):
+        # Item 2 should displace item 0 rather than be left out
+        self.assertOptimal([[3, 3], [0, 0], [0, 0]], [1, 1])
+
+    def test_zero_capacity(self):
+        self.assertOptimal([[0, 1], [0, 1]], [0, 1])
+        self.assertOptimal([[0, 1], [0, 1]], [0, 0])
+
+    def test_random(self):
+        rng = random.Random(0)
+        for i in range(200):
+            nitems = rng.randint(1, 6)
+            ncategories = rng.randint(1, 3)
+            costs = [[rng.randint(0, 9) for c in range(ncategories)] for item in range(nitems)]
+            capacities = [rng.randint(0, 3) for c in range(ncategories)]
+            self.assertOptimal(costs, capacities)
+
+
+class TestDivisionAllocator(TestCase):
+
+    def setUp(self):
+        self.t = Tournament.objects.create(slug="divisiontest", name="Division test")
+        self.inst_a = Institution.objects.create(code="A", name="Institution A")
+        self.inst_b = Institution.objects.create(code="B", name="Institution B")
+
+    def tearDown(self):
+        Team.objects.filter(tournament=self.t).delete()
+        Institution.objects.all().delete()
+        VenueCategory.objects.all().delete()
+        self.t.delete()
+
+    def _teams(self, institution, n):
+        return [Team.objects.create(tournament=self.t, institution=institution, reference=str(i)) for i in range(n)]
+
+    def _category(self, name, nvenues):
+        category = VenueCategory.objects.create(name=name)
+        category.venues.set([Venue.objects.create(tournament=self.t, name="%s%d" % (name, i), priority=10)
+                             for i in range(nvenues)])
+        return category
+
+    def _allocate(self, categories):
+        allocator = DivisionAllocator(teams=Team.objects.filter(tournament=self.t), divisions=[],
+                venue_categories=categories, tournament=self.t, institutions=Institution.objects.all())
+        allocator.allocate()
+
+    def test_constraints_met(self):
+        teams_a = self._teams(self.inst_a, 6)
+        teams_b = self._teams(self.inst_b, 8)
+        small = self._category("Small", 6)
+        large = self._category("Large", 10)
+        VenueConstraint.objects.create(category=small, priority=1, subject=self.inst_a)
+
+        self._allocate([small, large])
+
+        for team in teams_a:
+            team.refresh_from_db()
+            self.assertEqual(team.division.venue_category, small)
+        for team in teams_b:
+            team.refresh_from_db()
+            self.assertEqual(team.division.venue_category, large)
+
+    def test_division_sizes(self):
+        self._teams(self.inst_a, 10)
+        self._teams(self.inst_b, 10)
+        category = self._category("Large", 30)
+
+        self._allocate([category])
+
+        divisions = Division.objects.filter(tournament=self.t)
+        self.assertEqual(sum(division.teams_count for division in divisions), 20)
+        for division in divisions:
+            self.assertEqual(division.venue_category, category)
+            self.assertGreaterEqual(division.teams_count, self.t.pref('minimum_division_size'))
+            self.assertLessEqual(division.teams_count, self.t.pref('maximum_division_size'))
+
+    def test_not_enough_capacity(self):
+        # 7 venues can hold at most one division of 7 teams
+        self._teams(self.inst_a, 10)
+        category = self._category("Small", 7)
+
+        self._allocate([category])
+
+        self.assertEqual(Team.objects.filter(tournament=self.t, division__isnull=False).count(), 7)
+        self.assertEqual(Team.objects.filter(tournament=self.t, division__isnull=True).count(), 3)
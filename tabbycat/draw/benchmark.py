@@ -0,0 +1,255 @@
+"""Benchmarks for draw generators on synthetic tournaments.
+
+These build in-memory, Team-like objects with random institutions and
+histories, so that draw generators can be timed and checked at any scale
+without a database. They're used by the `benchmarkdraws` and
+`benchmarkpowerpairing` management commands, and by draw/tests/test_benchmark.py
+to check that every generator/option combination produces a valid draw.
+
+Conflict counts are deterministic for a given seed, so they can be compared
+between runs. Times depend on the machine, so baselines should only be compared
+on the machine that recorded them."""
+
+import json
+import logging
+import random
+from bisect import bisect
+from itertools import accumulate, product
+from timeit import default_timer as timer
+
+from .generator import DrawGenerator, PowerPairedDrawGenerator
+from .generator.utils import partial_break_round_split
+
+logger = logging.getLogger(__name__)
+
+
+class SyntheticDivision:
+
+    def __init__(self, id):
+        self.id = id
+        self.name = "Division %d" % id
+        self.venue_category = None
+
+
+class SyntheticTeam:
+    """Minimal implementation of the team interface used by draw generators."""
+
+    def __init__(self, id, institution):
+        self.id = id
+        self.short_name = "Team %d" % id
+        self.institution = institution
+        self.points = 0
+        self.aff_count = 0
+        self.neg_count = 0
+        self.opponents = []
+        self.allocated_side = None
+        self.division = None
+
+    def __repr__(self):
+        return "<SyntheticTeam {0.id} of {0.institution}>".format(self)
+
+    def seen(self, other):
+        return self.opponents.count(other.id)
+
+
+def weighted_choices(population, weights, k, rng):
+    """Returns a list of `k` elements chosen from `population` with
+    replacement, with the given relative weights. This is like
+    `random.choices()`, which requires Python 3.6."""
+    cumulative = list(accumulate(weights))
+    total = cumulative[-1]
+    return [population[bisect(cumulative, rng.random() * total, 0, len(cumulative) - 1)] for i in range(k)]
+
+
+def synthetic_field(nteams, nrounds, rng, division_size=8):
+    """Returns a list of teams, sorted by points, from institutions of varying
+    sizes, that have had `nrounds` rounds of roughly power-paired debates with
+    random results. Teams are also allocated sides (half each) and divisions,
+    for generators that need them."""
+    institutions = ["Institution %d" % i for i in range(max(nteams // 4, 1))]
+    weights = [1 / (i + 1) for i in range(len(institutions))]
+    teams = [SyntheticTeam(i, inst) for i, inst in enumerate(
+            weighted_choices(institutions, weights, nteams, rng))]
+
+    for i in range(nrounds):
+        teams.sort(key=lambda t: (t.points, rng.random()), reverse=True)
+        for aff, neg in zip(teams[0::2], teams[1::2]):
+            aff.opponents.append(neg.id)
+            neg.opponents.append(aff.id)
+            aff.aff_count += 1
+            neg.neg_count += 1
+            rng.choice([aff, neg]).points += 1
+
+    shuffled = rng.sample(teams, len(teams))
+    for i, team in enumerate(shuffled):
+        team.allocated_side = "aff" if i < len(teams) // 2 else "neg"
+        team.division = SyntheticDivision(i // division_size)
+
+    teams.sort(key=lambda t: t.points, reverse=True)
+    return teams
+
+
+def count_conflicts(draw):
+    """Returns a tuple `(history conflicts, institution conflicts)` for the
+    given list of Pairings."""
+    history = sum(1 for pairing in draw if pairing.conflict_hist)
+    institution = sum(1 for pairing in draw if pairing.conflict_inst)
+    return history, institution
+
+
+# ==============================================================================
+# Cases
+# ==============================================================================
+
+def benchmark_cases():
+    """Returns a list of tuples `(name, draw_type, options)`, one for each
+    generator/option combination to benchmark."""
+    cases = []
+
+    def add(draw_type, **options):
+        name = " ".join([draw_type] + ["%s=%s" % item for item in sorted(options.items())])
+        cases.append((name, draw_type, options))
+
+    for avoid_conflicts in ["off", "on"]:
+        add("random", avoid_conflicts=avoid_conflicts)
+        add("random", avoid_conflicts=avoid_conflicts, side_allocations="preallocated")
+
+    avoid_conflicts_options = ["off"] + sorted(PowerPairedDrawGenerator.AVOID_CONFLICT_FUNCTIONS)
+    for odd_bracket, pairing_method, avoid_conflicts in product(
+            sorted(PowerPairedDrawGenerator.ODD_BRACKET_FUNCTIONS),
+            sorted(PowerPairedDrawGenerator.PAIRING_FUNCTIONS),
+            avoid_conflicts_options):
+        add("power_paired", odd_bracket=odd_bracket, pairing_method=pairing_method,
+                avoid_conflicts=avoid_conflicts)
+
+    # Only some options are valid with pre-allocated sides
+    for odd_bracket, pairing_method, avoid_conflicts in product(
+            ["pullup_top", "pullup_bottom", "pullup_random", "intermediate1", "intermediate2"],
+            ["slide", "fold", "random"], avoid_conflicts_options):
+        add("power_paired", odd_bracket=odd_bracket, pairing_method=pairing_method,
+                avoid_conflicts=avoid_conflicts, side_allocations="preallocated")
+
+    add("round_robin")
+    add("first_elimination")
+    add("elimination")
+    return cases
+
+
+def _generator_args(draw_type, teams, nrounds):
+    """Returns a tuple `(teams, results, rrseq)` suitable for a generator of the
+    given draw type, from the synthetic field `teams`."""
+    if draw_type in ["first_elimination", "elimination"]:
+        break_size = max(len(teams) // 4, 2)
+        breaking = teams[:break_size]
+        if draw_type == "first_elimination":
+            return breaking, None, None
+
+        # Fake the previous elimination round with random winners
+        bypassing = partial_break_round_split(break_size)[1]
+        results = DrawGenerator("first_elimination", breaking).generate()
+        for pairing in results:
+            pairing.set_winner(random.choice(pairing.teams))
+        return breaking[:bypassing], results, None
+
+    if draw_type == "round_robin":
+        return teams, None, nrounds + 1
+
+    return teams, None, None
+
+
+def run_case(draw_type, options, teams, nrounds):
+    """Generates a draw for the given case, and returns a tuple `(draw,
+    seconds)`, where `seconds` is the time taken by the generator alone."""
+    teams, results, rrseq = _generator_args(draw_type, teams, nrounds)
+    start = timer()
+    generator = DrawGenerator(draw_type, list(teams), results=results, rrseq=rrseq, **options)
+    draw = generator.generate()
+    elapsed = timer() - start
+    return draw, elapsed
+
+
+def run_benchmarks(sizes, nrounds=5, seed=0, repeat=1, cases=None):
+    """Runs each case in `cases` (default: all of benchmark_cases()) on a
+    synthetic field of each size in `sizes`. Yields a dict for each run, with
+    keys "case", "teams", "debates", "time" (the best of `repeat` times),
+    "history" and "institution" (conflict counts), and "error" (if the
+    generator raised an exception, its message, otherwise None)."""
+
+    if cases is None:
+        cases = benchmark_cases()
+
+    for nteams in sizes:
+        field_rng = random.Random("%d-%d" % (seed, nteams))
+        teams = synthetic_field(nteams - nteams % 2, nrounds, field_rng)
+
+        for name, draw_type, options in cases:
+            result = {"case": name, "teams": len(teams), "debates": None, "time": None,
+                    "history": None, "institution": None, "error": None}
+            times = []
+            try:
+                for i in range(repeat):
+                    # Draw generators use the random module directly; reseed it
+                    # so that each case is reproducible.
+                    random.seed("%d-%d-%s" % (seed, nteams, name))
+                    draw, elapsed = run_case(draw_type, options, teams, nrounds)
+                    times.append(elapsed)
+            except Exception as e:
+                logger.exception("Error running %s on %d teams", name, len(teams))
+                result["error"] = "%s: %s" % (type(e).__name__, e)
+            else:
+                result["debates"] = len(draw)
+                result["time"] = min(times)
+                result["history"], result["institution"] = count_conflicts(draw)
+            yield result
+
+
+# ==============================================================================
+# Baselines
+# ==============================================================================
+
+def save_baseline(path, results, settings):
+    """Saves the given results, and the settings they were run with, to a JSON
+    file at `path`."""
+    with open(path, 'w') as f:
+        json.dump({"settings": settings, "results": results}, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    """Returns a tuple `(results, settings)` from a JSON file written by
+    `save_baseline()`."""
+    with open(path) as f:
+        data = json.load(f)
+    return data["results"], data["settings"]
+
+
+def compare_to_baseline(results, baseline, time_tolerance=1.5, min_time_difference=0.01):
+    """Compares results to baseline results, returning a list of strings
+    describing regressions. A run is regarded as slower if it took more than
+    `time_tolerance` times as long as the baseline, and at least
+    `min_time_difference` seconds longer (so that very fast runs aren't
+    affected by noise). Conflict counts must not be greater than the baseline."""
+    baseline = {(r["case"], r["teams"]): r for r in baseline}
+    regressions = []
+
+    for result in results:
+        base = baseline.get((result["case"], result["teams"]))
+        if base is None:
+            continue
+        description = "{case} ({teams:d} teams)".format(**result)
+
+        if result["error"]:
+            if not base["error"]:
+                regressions.append("{}: now fails with {}".format(description, result["error"]))
+            continue
+        if base["error"]:
+            continue
+
+        if result["time"] > base["time"] * time_tolerance and result["time"] - base["time"] >= min_time_difference:
+            regressions.append("{}: took {:.3f} s, baseline {:.3f} s".format(
+                    description, result["time"], base["time"]))
+        for key in ["history", "institution"]:
+            if result[key] > base[key]:
+                regressions.append("{}: {:d} {} conflicts, baseline {:d}".format(
+                        description, result[key], key, base[key]))
+
+    return regressions
@@ -13,6 +13,9 @@ DRAW_FLAG_DESCRIPTIONS = {
     "1u1d_hist":    _("One-up-one-down (history)"),
     "1u1d_inst":    _("One-up-one-down (institution)"),
     "1u1d_other":   _("One-up-one-down (to accommodate)"),
+    "match_hist":   _("Re-paired by matching (history)"),
+    "match_inst":   _("Re-paired by matching (institution)"),
+    "match_other":  _("Re-paired by matching (to accommodate)"),
     "bub_up_hist":  _("Bubble up (history)"),
     "bub_dn_hist":  _("Bubble down (history)"),
     "bub_up_inst":  _("Bubble up (institution)"),
@@ -0,0 +1,505 @@
+"""Maximum-weight matching in general graphs.
+
+This is an implementation of Edmonds' blossom algorithm, in the O(n³) form
+described by Zvi Galil, "Efficient algorithms for finding maximum matching
+in graphs", ACM Computing Surveys, 1986. It closely follows the structure of
+Joris van Rantwijk's public-domain implementation (mwmatching.py), with the
+consistency checks stripped out.
+
+It's used by the "min_cost_matching" conflict avoidance method of the
+power-paired draw generator, which needs matchings in general (non-bipartite)
+graphs, so the assignment solvers in adjallocation.solvers can't be used.
+
+If all edge weights are integers, the algorithm uses only integer arithmetic,
+so callers should scale their weights to integers if they can."""
+
+
+def maximum_weight_matching(edges, maxcardinality=False):
+    """Computes a maximum-weight matching in the graph given by `edges`, a list
+    of tuples `(i, j, weight)`, where `i` and `j` are vertex indices (integers
+    from 0 up) and `i != j`. There must be at most one edge between any pair of
+    vertices. If `maxcardinality` is True, only maximum-cardinality matchings
+    are considered.
+
+    Returns a list `mate`, such that `mate[i] == j` if vertex `i` is matched to
+    vertex `j`, and `mate[i] == -1` if vertex `i` is unmatched."""
+
+    if not edges:
+        return []
+
+    nedge = len(edges)
+    nvertex = 1 + max(max(i, j) for i, j, wt in edges)
+    maxweight = max(0, max(wt for i, j, wt in edges))
+
+    # Edge k has endpoints 2k and 2k+1, such that endpoint[2k] = i and
+    # endpoint[2k+1] = j for edges[k] = (i, j, wt).
+    endpoint = [edges[p // 2][p % 2] for p in range(2 * nedge)]
+
+    # neighbend[v] is the list of remote endpoints of the edges attached to v
+    neighbend = [[] for i in range(nvertex)]
+    for k, (i, j, wt) in enumerate(edges):
+        neighbend[i].append(2 * k + 1)
+        neighbend[j].append(2 * k)
+
+    # mate[v] is the remote endpoint of v's matched edge, or -1 if single
+    mate = [-1] * nvertex
+
+    # Indices from 0 to nvertex-1 are vertices, and those from nvertex to
+    # 2*nvertex-1 are (non-trivial) blossoms. label[b] is 0 for free, 1 for an
+    # S-vertex/blossom and 2 for a T-vertex/blossom; labelend[b] is the remote
+    # endpoint of the edge through which b got its label.
+    label = [0] * (2 * nvertex)
+    labelend = [-1] * (2 * nvertex)
+
+    # inblossom[v] is the top-level blossom containing vertex v
+    inblossom = list(range(nvertex))
+
+    # For each blossom: its parent (or -1 if top-level), its ordered list of
+    # sub-blossoms (starting with the base), its base vertex, and the
+    # endpoints of the edges connecting its sub-blossoms.
+    blossomparent = [-1] * (2 * nvertex)
+    blossomchilds = [None] * (2 * nvertex)
+    blossombase = list(range(nvertex)) + [-1] * nvertex
+    blossomendps = [None] * (2 * nvertex)
+
+    # bestedge[b] is the least-slack edge from b to a different S-blossom, and
+    # blossombestedges[b] is a list of such edges for each S-blossom b.
+    bestedge = [-1] * (2 * nvertex)
+    blossombestedges = [None] * (2 * nvertex)
+
+    unusedblossoms = list(range(nvertex, 2 * nvertex))
+
+    # Dual variables: those of vertices start at maxweight, those of blossoms
+    # at zero. (The dual of a vertex is twice the "usual" value, so that it's
+    # an integer when all weights are integers.)
+    dualvar = [maxweight] * nvertex + [0] * nvertex
+
+    # allowedge[k] is True if edge k is known to have zero slack
+    allowedge = [False] * nedge
+
+    # Queue of newly discovered S-vertices
+    queue = []
+
+    def slack(k):
+        i, j, wt = edges[k]
+        return dualvar[i] + dualvar[j] - 2 * wt
+
+    def blossom_leaves(b):
+        if b < nvertex:
+            yield b
+        else:
+            for t in blossomchilds[b]:
+                if t < nvertex:
+                    yield t
+                else:
+                    yield from blossom_leaves(t)
+
+    def assign_label(w, t, p):
+        """Assigns label t to the top-level blossom containing vertex w, coming
+        through an edge with remote endpoint p. If it's a T-blossom, labels its
+        mate as an S-blossom too."""
+        b = inblossom[w]
+        label[w] = label[b] = t
+        labelend[w] = labelend[b] = p
+        bestedge[w] = bestedge[b] = -1
+        if t == 1:
+            queue.extend(blossom_leaves(b))
+        elif t == 2:
+            base = blossombase[b]
+            assign_label(endpoint[mate[base]], 1, mate[base] ^ 1)
+
+    def scan_blossom(v, w):
+        """Traces back from vertices v and w to discover either a new blossom,
+        in which case its base vertex is returned, or an augmenting path, in
+        which case -1 is returned."""
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = inblossom[v]
+            if label[b] & 4:
+                base = blossombase[b]
+                break
+            path.append(b)
+            label[b] = 5
+            if labelend[b] == -1:
+                # The base of blossom b is single; stop tracing this path.
+                v = -1
+            else:
+                v = endpoint[labelend[b]]
+                b = inblossom[v]
+                v = endpoint[labelend[b]]
+            # Swap v and w, so that we alternate between both paths.
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            label[b] = 1
+        return base
+
+    def add_blossom(base, k):
+        """Constructs a new blossom with the given base, containing edge k,
+        which connects a pair of S-vertices."""
+        v, w, wt = edges[k]
+        bb = inblossom[base]
+        bv = inblossom[v]
+        bw = inblossom[w]
+        b = unusedblossoms.pop()
+        blossombase[b] = base
+        blossomparent[b] = -1
+        blossomparent[bb] = b
+        blossomchilds[b] = path = []
+        blossomendps[b] = endps = []
+
+        # Trace back from v to base
+        while bv != bb:
+            blossomparent[bv] = b
+            path.append(bv)
+            endps.append(labelend[bv])
+            v = endpoint[labelend[bv]]
+            bv = inblossom[v]
+        path.append(bb)
+        path.reverse()
+        endps.reverse()
+        endps.append(2 * k)
+
+        # Trace back from w to base
+        while bw != bb:
+            blossomparent[bw] = b
+            path.append(bw)
+            endps.append(labelend[bw] ^ 1)
+            w = endpoint[labelend[bw]]
+            bw = inblossom[w]
+
+        # The new blossom is an S-blossom
+        label[b] = 1
+        labelend[b] = labelend[bb]
+        dualvar[b] = 0
+
+        # Relabel its vertices; former T-vertices become S-vertices
+        for v in blossom_leaves(b):
+            if label[inblossom[v]] == 2:
+                queue.append(v)
+            inblossom[v] = b
+
+        # Compute the least-slack edges to neighbouring S-blossoms
+        bestedgeto = [-1] * (2 * nvertex)
+        for bv in path:
+            if blossombestedges[bv] is None:
+                nblists = [[p // 2 for p in neighbend[v]] for v in blossom_leaves(bv)]
+            else:
+                nblists = [blossombestedges[bv]]
+            for nblist in nblists:
+                for k in nblist:
+                    i, j, wt = edges[k]
+                    if inblossom[j] == b:
+                        i, j = j, i
+                    bj = inblossom[j]
+                    if bj != b and label[bj] == 1 and (bestedgeto[bj] == -1 or slack(k) < slack(bestedgeto[bj])):
+                        bestedgeto[bj] = k
+            blossombestedges[bv] = None
+            bestedge[bv] = -1
+        blossombestedges[b] = [k for k in bestedgeto if k != -1]
+
+        bestedge[b] = -1
+        for k in blossombestedges[b]:
+            if bestedge[b] == -1 or slack(k) < slack(bestedge[b]):
+                bestedge[b] = k
+
+    def expand_blossom(b, endstage):
+        """Expands the given top-level blossom."""
+
+        # Convert sub-blossoms into top-level blossoms
+        for s in blossomchilds[b]:
+            blossomparent[s] = -1
+            if s < nvertex:
+                inblossom[s] = s
+            elif endstage and dualvar[s] == 0:
+                expand_blossom(s, endstage)
+            else:
+                for v in blossom_leaves(s):
+                    inblossom[v] = s
+
+        # If we're expanding a T-blossom during a stage, its sub-blossoms must
+        # be relabelled.
+        if not endstage and label[b] == 2:
+            # Start at the sub-blossom through which the expanding blossom got
+            # its label, and relabel sub-blossoms until we reach the base.
+            entrychild = inblossom[endpoint[labelend[b] ^ 1]]
+            j = blossomchilds[b].index(entrychild)
+            if j & 1:
+                # Start index is odd; go forward and wrap.
+                j -= len(blossomchilds[b])
+                jstep = 1
+                endptrick = 0
+            else:
+                # Start index is even; go backward.
+                jstep = -1
+                endptrick = 1
+
+            p = labelend[b]
+            while j != 0:
+                # Relabel the T-sub-blossom
+                label[endpoint[p ^ 1]] = 0
+                label[endpoint[blossomendps[b][j - endptrick] ^ endptrick ^ 1]] = 0
+                assign_label(endpoint[p ^ 1], 2, p)
+                # Step to the next S-sub-blossom and note its forward endpoint
+                allowedge[blossomendps[b][j - endptrick] // 2] = True
+                j += jstep
+                p = blossomendps[b][j - endptrick] ^ endptrick
+                # Step to the next T-sub-blossom
+                allowedge[p // 2] = True
+                j += jstep
+
+            # Relabel the base T-sub-blossom without stepping through to its
+            # mate (so don't call assign_label).
+            bv = blossomchilds[b][j]
+            label[endpoint[p ^ 1]] = label[bv] = 2
+            labelend[endpoint[p ^ 1]] = labelend[bv] = p
+            bestedge[bv] = -1
+
+            # Continue along the blossom until we get back to entrychild, and
+            # label any sub-blossoms that are reachable from outside.
+            j += jstep
+            while blossomchilds[b][j] != entrychild:
+                bv = blossomchilds[b][j]
+                if label[bv] == 1:
+                    # This sub-blossom just got label S through one of its
+                    # neighbours; leave it.
+                    j += jstep
+                    continue
+                for v in blossom_leaves(bv):
+                    if label[v] != 0:
+                        break
+                # If the sub-blossom contains a reachable vertex, assign label T
+                # to the sub-blossom.
+                if label[v] != 0:
+                    label[v] = 0
+                    label[endpoint[mate[blossombase[bv]]]] = 0
+                    assign_label(v, 2, labelend[v])
+                j += jstep
+
+        # Recycle the blossom number
+        label[b] = labelend[b] = -1
+        blossomchilds[b] = blossomendps[b] = None
+        blossombase[b] = -1
+        blossombestedges[b] = None
+        bestedge[b] = -1
+        unusedblossoms.append(b)
+
+    def augment_blossom(b, v):
+        """Swaps matched and unmatched edges over an alternating path through
+        blossom b, between vertex v and the base vertex, so that v becomes the
+        base."""
+
+        # Bubble up through the blossom tree from v to an immediate
+        # sub-blossom of b.
+        t = v
+        while blossomparent[t] != b:
+            t = blossomparent[t]
+        if t >= nvertex:
+            augment_blossom(t, v)
+
+        # Decide in which direction we will go round the blossom
+        i = j = blossomchilds[b].index(t)
+        if i & 1:
+            j -= len(blossomchilds[b])
+            jstep = 1
+            endptrick = 0
+        else:
+            jstep = -1
+            endptrick = 1
+
+        # Move along the blossom until we get to the base
+        while j != 0:
+            j += jstep
+            t = blossomchilds[b][j]
+            p = blossomendps[b][j - endptrick] ^ endptrick
+            if t >= nvertex:
+                augment_blossom(t, endpoint[p])
+            j += jstep
+            t = blossomchilds[b][j]
+            if t >= nvertex:
+                augment_blossom(t, endpoint[p ^ 1])
+            mate[endpoint[p]] = p ^ 1
+            mate[endpoint[p ^ 1]] = p
+
+        # Rotate the list of sub-blossoms to put the new base at the front
+        blossomchilds[b] = blossomchilds[b][i:] + blossomchilds[b][:i]
+        blossomendps[b] = blossomendps[b][i:] + blossomendps[b][:i]
+        blossombase[b] = blossombase[blossomchilds[b][0]]
+
+    def augment_matching(k):
+        """Swaps matched and unmatched edges over an alternating path between
+        two single vertices, which runs through edge k."""
+        v, w, wt = edges[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            # Match vertex s to remote endpoint p, then trace back from s
+            # until we find a single vertex, swapping matched and unmatched
+            # edges as we go.
+            while True:
+                bs = inblossom[s]
+                if bs >= nvertex:
+                    augment_blossom(bs, s)
+                mate[s] = p
+                if labelend[bs] == -1:
+                    # Reached a single vertex; stop.
+                    break
+                t = endpoint[labelend[bs]]
+                bt = inblossom[t]
+                s = endpoint[labelend[bt]]
+                j = endpoint[labelend[bt] ^ 1]
+                if bt >= nvertex:
+                    augment_blossom(bt, j)
+                mate[j] = labelend[bt]
+                p = labelend[bt] ^ 1
+
+    # Main loop: each stage finds an augmenting path, and augments the matching
+    # along it, until no more augmenting paths can be found.
+    for stage in range(nvertex):
+
+        label[:] = [0] * (2 * nvertex)
+        bestedge[:] = [-1] * (2 * nvertex)
+        blossombestedges[nvertex:] = [None] * nvertex
+        allowedge[:] = [False] * nedge
+        queue[:] = []
+
+        # Label single top-level blossoms as S
+        for v in range(nvertex):
+            if mate[v] == -1 and label[inblossom[v]] == 0:
+                assign_label(v, 1, -1)
+
+        augmented = False
+        while True:
+
+            # Grow alternating trees from S-vertices along tight edges
+            while queue and not augmented:
+                v = queue.pop()
+
+                for p in neighbend[v]:
+                    k = p // 2
+                    w = endpoint[p]
+                    if inblossom[v] == inblossom[w]:
+                        continue  # internal edge
+                    if not allowedge[k]:
+                        kslack = slack(k)
+                        if kslack <= 0:
+                            allowedge[k] = True
+                    if allowedge[k]:
+                        if label[inblossom[w]] == 0:
+                            # w is free; label it T, and its mate S
+                            assign_label(w, 2, p ^ 1)
+                        elif label[inblossom[w]] == 1:
+                            # w is an S-vertex; either a new blossom or an
+                            # augmenting path
+                            base = scan_blossom(v, w)
+                            if base >= 0:
+                                add_blossom(base, k)
+                            else:
+                                augment_matching(k)
+                                augmented = True
+                                break
+                        elif label[w] == 0:
+                            # w is in a T-blossom but hasn't been reached yet
+                            label[w] = 2
+                            labelend[w] = p ^ 1
+                    elif label[inblossom[w]] == 1:
+                        # Keep track of the least-slack edge to another S-blossom
+                        b = inblossom[v]
+                        if bestedge[b] == -1 or kslack < slack(bestedge[b]):
+                            bestedge[b] = k
+                    elif label[w] == 0:
+                        # Keep track of the least-slack edge to a free vertex
+                        if bestedge[w] == -1 or kslack < slack(bestedge[w]):
+                            bestedge[w] = k
+
+            if augmented:
+                break
+
+            # No augmenting path along tight edges, so update the dual
+            # variables by the largest amount that keeps them feasible.
+            deltatype = -1
+            delta = deltaedge = deltablossom = None
+
+            # Type 1: the minimum dual of a vertex (only if single vertices are
+            # allowed)
+            if not maxcardinality:
+                deltatype = 1
+                delta = min(dualvar[:nvertex])
+
+            # Type 2: the minimum slack of an edge between an S-vertex and a
+            # free vertex
+            for v in range(nvertex):
+                if label[inblossom[v]] == 0 and bestedge[v] != -1:
+                    d = slack(bestedge[v])
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 2
+                        deltaedge = bestedge[v]
+
+            # Type 3: half the minimum slack of an edge between two S-blossoms
+            for b in range(2 * nvertex):
+                if blossomparent[b] == -1 and label[b] == 1 and bestedge[b] != -1:
+                    kslack = slack(bestedge[b])
+                    d = kslack // 2 if isinstance(kslack, int) else kslack / 2
+                    if deltatype == -1 or d < delta:
+                        delta = d
+                        deltatype = 3
+                        deltaedge = bestedge[b]
+
+            # Type 4: the minimum dual of a T-blossom
+            for b in range(nvertex, 2 * nvertex):
+                if blossombase[b] >= 0 and blossomparent[b] == -1 and label[b] == 2 and \
+                        (deltatype == -1 or dualvar[b] < delta):
+                    delta = dualvar[b]
+                    deltatype = 4
+                    deltablossom = b
+
+            if deltatype == -1:
+                # No further improvement possible; max-cardinality optimum
+                # reached. Do a final delta update to make the optimum
+                # verifiable.
+                deltatype = 1
+                delta = max(0, min(dualvar[:nvertex]))
+
+            # Update the dual variables
+            for v in range(nvertex):
+                if label[inblossom[v]] == 1:
+                    dualvar[v] -= delta
+                elif label[inblossom[v]] == 2:
+                    dualvar[v] += delta
+            for b in range(nvertex, 2 * nvertex):
+                if blossombase[b] >= 0 and blossomparent[b] == -1:
+                    if label[b] == 1:
+                        dualvar[b] += delta
+                    elif label[b] == 2:
+                        dualvar[b] -= delta
+
+            # Take action at the point where the minimum delta occurred
+            if deltatype == 1:
+                break  # no further improvement possible
+            elif deltatype == 2:
+                allowedge[deltaedge] = True
+                i, j, wt = edges[deltaedge]
+                if label[inblossom[i]] == 0:
+                    i, j = j, i
+                queue.append(i)
+            elif deltatype == 3:
+                allowedge[deltaedge] = True
+                i, j, wt = edges[deltaedge]
+                queue.append(i)
+            elif deltatype == 4:
+                expand_blossom(deltablossom, False)
+
+        if not augmented:
+            break
+
+        # End of stage: expand all S-blossoms with zero dual
+        for b in range(nvertex, 2 * nvertex):
+            if blossomparent[b] == -1 and blossombase[b] >= 0 and label[b] == 1 and dualvar[b] == 0:
+                expand_blossom(b, True)
+
+    # Convert endpoints to vertices
+    for v in range(nvertex):
+        if mate[v] >= 0:
+            mate[v] = endpoint[mate[v]]
+
+    return mate
@@ -2,6 +2,7 @@ import random
 from collections import OrderedDict
 
 from .common import BaseDrawGenerator, DrawFatalError, Pairing
+from .matching import maximum_weight_matching
 from .one_up_one_down import OneUpOneDownSwapper
 
 
@@ -30,6 +31,13 @@ class PowerPairedDrawGenerator(BaseDrawGenerator):
         "avoid_conflicts" - How to avoid conflicts.
             "one_up_one_down" - swap conflicted teams with the debate above or below,
                 in accordance with Australasian Intervarsity Debating Association rules.
+            "min_cost_matching" - re-pair all teams at once, using a minimum-cost
+                perfect matching over pairings of teams that are at most
+                "max_displacement" debates apart. The cost of a pairing is the sum of
+                the history and institution penalties, "bracket_penalty" for each
+                point between the teams, "displacement_penalty" for each debate moved
+                from the pairing method's intent and, if sides are balanced,
+                "side_penalty" for each extra time a team would have to take a side.
             "off" - which turns off conflict avoidance.
     """
 
@@ -39,14 +47,21 @@ class PowerPairedDrawGenerator(BaseDrawGenerator):
     draw_type = "preliminary"
 
     DEFAULT_OPTIONS = {
-        "odd_bracket"    : "intermediate_bubble_up_down",
-        "pairing_method" : "slide",
-        "avoid_conflicts": "one_up_one_down"
+        "odd_bracket"         : "intermediate_bubble_up_down",
+        "pairing_method"      : "slide",
+        "avoid_conflicts"     : "one_up_one_down",
+        "bracket_penalty"     : 1e2,
+        "displacement_penalty": 1e-2,
+        "side_penalty"        : 1e-3,
+        "max_displacement"    : 5,
     }
 
     def __init__(self, *args, **kwargs):
         super(PowerPairedDrawGenerator, self).__init__(*args, **kwargs)
         self.check_teams_for_attribute("points")
+        if self.options["avoid_conflicts"] == "min_cost_matching" and self.options["side_allocations"] == "balance":
+            self.check_teams_for_attribute("aff_count")
+            self.check_teams_for_attribute("neg_count")
 
     def generate(self):
         self._brackets = self._make_raw_brackets()
@@ -283,7 +298,8 @@ class PowerPairedDrawGenerator(BaseDrawGenerator):
     # Conflict avoidance
 
     AVOID_CONFLICT_FUNCTIONS = {
-        "one_up_one_down": "_one_up_one_down",
+        "one_up_one_down"  : "_one_up_one_down",
+        "min_cost_matching": "_min_cost_matching",
     }
 
     def avoid_conflicts(self, pairings):
@@ -319,6 +335,101 @@ class PowerPairedDrawGenerator(BaseDrawGenerator):
                         pairing.add_flag("1u1d_other")
                     pairing.teams = list(new)
 
+    # Matching weights are scaled to integers, so that the matching algorithm
+    # uses exact arithmetic; this is the smallest cost unit that counts.
+    MATCHING_COST_SCALE = 1e4
+
+    def _matching_cost(self, team1, team2, displacement):
+        """Returns the cost of pairing team1 with team2, whose original places
+        were `displacement` apart, or None if they can't be paired."""
+        if self.options["side_allocations"] == "preallocated" and team1.allocated_side == team2.allocated_side:
+            return None  # not allowed
+        cost = self.options["bracket_penalty"] * abs(team1.points - team2.points)
+        cost += self.options["displacement_penalty"] * displacement
+        if self.options["avoid_history"]:
+            cost += self.options["history_penalty"] * team1.seen(team2)
+        if self.options["avoid_institution"] and team1.institution == team2.institution:
+            cost += self.options["institution_penalty"]
+        if self.options["side_allocations"] == "balance":
+            # Teams that have both taken one side more than the other can't both
+            # be given the other side.
+            imbalance1 = team1.aff_count - team1.neg_count
+            imbalance2 = team2.aff_count - team2.neg_count
+            if imbalance1 * imbalance2 > 0:
+                cost += self.options["side_penalty"] * min(abs(imbalance1), abs(imbalance2))
+        return cost
+
+    def _min_cost_matching(self, pairings):
+        """Re-pairs all teams using a minimum-cost perfect matching, then
+        reassembles the brackets and flags debates that changed. Pairings
+        are only considered between teams whose original debates are at most
+        max_displacement apart; original pairings are always considered, so a
+        perfect matching always exists."""
+
+        teams = []
+        rooms = []  # index of each team's original debate
+        firsts = []  # whether each team was first in its original debate
+        originals = []  # original Pairing objects, in order
+        for bracket in pairings.values():
+            for pairing in bracket:
+                for position, team in enumerate(pairing.teams):
+                    teams.append(team)
+                    rooms.append(len(originals))
+                    firsts.append(position == 0)
+                originals.append(pairing)
+
+        # Teams are in order of their original debates, so the candidates for
+        # each team are the teams after it up to max_displacement debates away.
+        max_displacement = self.options["max_displacement"]
+        costs = []
+        for i, (team1, room1) in enumerate(zip(teams, rooms)):
+            for j in range(i + 1, len(teams)):
+                if rooms[j] - room1 > max_displacement:
+                    break
+                # Pairing two teams that were in the same position (e.g. both top
+                # teams) moves them away from the pairing method's intent.
+                displacement = abs(room1 - rooms[j]) + (firsts[i] == firsts[j])
+                cost = self._matching_cost(team1, teams[j], displacement)
+                if cost is not None:
+                    costs.append((i, j, cost))
+
+        if not costs:
+            return
+
+        # Convert costs into positive integer weights, to maximize
+        scale = self.MATCHING_COST_SCALE
+        maxcost = max(round(cost * scale) for i, j, cost in costs)
+        edges = [(i, j, maxcost + 1 - round(cost * scale)) for i, j, cost in costs]
+        mate = maximum_weight_matching(edges, maxcardinality=True)
+
+        # Each new debate takes the place of the original debate of its "anchor",
+        # which is its team that was first in its original debate (or if both or
+        # neither were, the one in the higher debate).
+        new_pairs = []
+        for i, j in enumerate(mate):
+            if i < j:
+                new_pairs.append((i, j) if (not firsts[i], rooms[i]) <= (not firsts[j], rooms[j]) else (j, i))
+        new_pairs.sort(key=lambda pair: (rooms[pair[0]], not firsts[pair[0]]))
+
+        brackets = OrderedDict()
+        for room_rank, (i, j) in enumerate(new_pairs, start=1):
+            original = originals[rooms[i]]
+            pair = [teams[i], teams[j]]
+            if self.options["side_allocations"] == "preallocated" and teams[i].allocated_side == "neg":
+                pair.reverse()
+            pairing = Pairing(teams=pair, bracket=original.bracket, room_rank=room_rank)
+            if rooms[i] != rooms[j]:
+                if original.conflict_hist:
+                    pairing.add_flag("match_hist")
+                if original.conflict_inst:
+                    pairing.add_flag("match_inst")
+                if not (original.conflict_hist or original.conflict_inst):
+                    pairing.add_flag("match_other")
+            brackets.setdefault(original.bracket, []).append(pairing)
+
+        pairings.clear()
+        pairings.update(brackets)
+
 
 class PowerPairedWithAllocatedSidesDrawGenerator(PowerPairedDrawGenerator):
     """Power-paired draw with allocated sides.
@@ -345,9 +456,13 @@ class PowerPairedWithAllocatedSidesDrawGenerator(PowerPairedDrawGenerator):
     """
 
     DEFAULT_OPTIONS = {
-        "odd_bracket"    : "intermediate1",
-        "pairing_method" : "fold",
-        "avoid_conflicts": None,
+        "odd_bracket"         : "intermediate1",
+        "pairing_method"      : "fold",
+        "avoid_conflicts"     : None,
+        "bracket_penalty"     : 1e2,
+        "displacement_penalty": 1e-2,
+        "side_penalty"        : 1e-3,
+        "max_displacement"    : 5,
     }
 
     def __init__(self, *args, **kwargs):
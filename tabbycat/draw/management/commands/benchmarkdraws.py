@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from draw.benchmark import benchmark_cases, compare_to_baseline, load_baseline, run_benchmarks, save_baseline
+
+
+class Command(BaseCommand):
+
+    help = "Times every draw generator and option combination on synthetic tournaments, " \
+           "reporting conflicts as a measure of quality, and optionally compares the " \
+           "results to a baseline saved by an earlier run"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--teams", type=int, nargs="+", default=[20, 100, 300, 1000],
+            help="Numbers of teams in synthetic tournaments (default: 20 100 300 1000)")
+        parser.add_argument("--rounds", type=int, default=5,
+            help="Number of rounds already held (default: 5)")
+        parser.add_argument("--seed", type=int, default=0,
+            help="Seed for the random number generator (default: 0)")
+        parser.add_argument("--repeat", type=int, default=1,
+            help="Number of times to run each case, reporting the best time (default: 1)")
+        parser.add_argument("--cases", type=str, nargs="+", default=None, metavar="TEXT",
+            help="Only run cases whose names contain all of these strings, e.g. "
+                 "power_paired avoid_conflicts=min_cost_matching")
+        parser.add_argument("--list", action="store_true",
+            help="List cases without running them")
+        parser.add_argument("--save-baseline", type=str, default=None, metavar="FILE",
+            help="Save results to this file, for comparison in later runs")
+        parser.add_argument("--baseline", type=str, default=None, metavar="FILE",
+            help="Compare results to a baseline saved by --save-baseline, using the same "
+                 "settings as the baseline, and fail if there are any regressions")
+        parser.add_argument("--tolerance", type=float, default=1.5,
+            help="Ratio of time to baseline time above which a case is regarded as "
+                 "slower (default: 1.5)")
+
+    def handle(self, *args, **options):
+        cases = benchmark_cases()
+        if options["cases"]:
+            cases = [case for case in cases if all(s in case[0] for s in options["cases"])]
+            if not cases:
+                raise CommandError("No cases match: %s" % " ".join(options["cases"]))
+
+        if options["list"]:
+            for name, draw_type, draw_options in cases:
+                self.stdout.write(name)
+            return
+
+        settings = {key: options[key] for key in ["teams", "rounds", "seed"]}
+        if options["baseline"]:
+            baseline, baseline_settings = load_baseline(options["baseline"])
+            if baseline_settings != settings:
+                self.stdout.write("Using settings from baseline: " + ", ".join(
+                        "%s=%s" % item for item in sorted(baseline_settings.items())))
+                settings = baseline_settings
+
+        results = []
+        for result in run_benchmarks(settings["teams"], settings["rounds"], settings["seed"],
+                options["repeat"], cases):
+            results.append(result)
+            if result["error"]:
+                self.stdout.write(self.style.ERROR("{teams:5d}  {case:<100s}  {error}".format(**result)))
+            else:
+                self.stdout.write("{teams:5d}  {case:<100s}  {time:8.3f} s  {history:4d} history  "
+                    "{institution:4d} institution".format(**result))
+
+        if options["save_baseline"]:
+            save_baseline(options["save_baseline"], results, settings)
+            self.stdout.write("Saved baseline to %s" % options["save_baseline"])
+
+        if options["baseline"]:
+            regressions = compare_to_baseline(results, baseline, options["tolerance"])
+            for regression in regressions:
+                self.stdout.write(self.style.WARNING(regression))
+            if regressions:
+                raise CommandError("%d regressions compared to baseline" % len(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions compared to baseline"))
@@ -0,0 +1,46 @@
+import random
+from timeit import default_timer as timer
+
+from django.core.management.base import BaseCommand
+
+from draw.benchmark import count_conflicts, synthetic_field
+from draw.generator import PowerPairedDrawGenerator
+
+
+class Command(BaseCommand):
+
+    help = "Compares conflict avoidance methods of the power-paired draw generator " \
+           "on synthetic fields, reporting time taken and remaining conflicts"
+
+    METHODS = ["off", "one_up_one_down", "min_cost_matching"]
+
+    def add_arguments(self, parser):
+        parser.add_argument("--teams", type=int, nargs="+", default=[50, 150, 300, 600],
+            help="Numbers of teams in synthetic fields (default: 50 150 300 600)")
+        parser.add_argument("--rounds", type=int, default=5,
+            help="Number of rounds already held (default: 5)")
+        parser.add_argument("--methods", type=str, nargs="+", default=self.METHODS, choices=self.METHODS,
+            help="Conflict avoidance methods to compare (default: all)")
+        parser.add_argument("--seed", type=int, default=None,
+            help="Seed for the random number generator")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        for nteams in options["teams"]:
+            teams = synthetic_field(nteams - nteams % 2, options["rounds"], rng)
+            self.stdout.write("{:d} teams after {:d} rounds:".format(len(teams), options["rounds"]))
+
+            for method in options["methods"]:
+                # Use the same random state for each method, so that only the
+                # conflict avoidance differs.
+                state = random.getstate()
+                generator = PowerPairedDrawGenerator(list(teams), avoid_conflicts=method)
+                start = timer()
+                draw = generator.generate()
+                elapsed = timer() - start
+                random.setstate(state)
+
+                history, institution = count_conflicts(draw)
+                self.stdout.write("    {:<18s} {:8.3f} s    {:3d} history, {:3d} institution conflicts".format(
+                        method, elapsed, history, institution))
@@ -1,10 +1,16 @@
 import random
 
+from django.db import connection, transaction
+
+from adjallocation.utils import clear_histories_cache
+from participants.utils import get_side_counts
 from tournaments.models import Round
 from standings.teams import TeamStandingsGenerator
+from utils.cache import bump_content_version
 
 from .models import Debate, DebateTeam
 from .generator import DrawGenerator, Pairing
+from .prefetch import populate_team_histories
 
 OPTIONS_TO_CONFIG_MAPPING = {
     "avoid_institution"     : "draw_rules__avoid_same_institution",
@@ -46,39 +52,64 @@ class BaseDrawManager:
         # Only needed for RoundRobinDrawManager
         return None
 
-    def _populate_aff_counts(self, teams):
+    def _populate_side_counts(self, teams):
         if self.round.prev:
-            prev_seq = self.round.prev.seq
+            sides = [DebateTeam.SIDE_AFFIRMATIVE, DebateTeam.SIDE_NEGATIVE]
+            side_counts = get_side_counts(teams, sides, self.round.prev.seq)
             for team in teams:
-                team.aff_count = team.get_aff_count(prev_seq)
+                team.aff_count, team.neg_count = side_counts[team.id]
         else:
             for team in teams:
                 team.aff_count = 0
+                team.neg_count = 0
 
     def _populate_team_side_allocations(self, teams):
-        tsas = dict()
-        for tsa in self.round.teamsideallocation_set.all():
-            tsas[tsa.team] = tsa.side
+        tsas = dict(self.round.teamsideallocation_set.values_list('team_id', 'side'))
         for team in teams:
-            if team in tsas:
-                team.allocated_side = tsas[team]
+            if team.id in tsas:
+                team.allocated_side = tsas[team.id]
+
+    def _populate_team_data(self, teams):
+        """Populates the attributes of `teams` that draw generators need, using
+        a fixed number of queries regardless of the number of teams."""
+        self._populate_side_counts(teams)
+        self._populate_team_side_allocations(teams)
+        populate_team_histories(teams, self.round)
 
     def _make_debates(self, pairings):
         random.shuffle(pairings)  # to avoid IDs indicating room ranks
 
+        debates = []
         for pairing in pairings:
             debate = Debate(round=self.round)
             debate.division = pairing.division
             debate.bracket = pairing.bracket
             debate.room_rank = pairing.room_rank
             debate.flags = ",".join(pairing.flags)  # comma-separated list
-            debate.save()
-
-            aff, neg = pairing.teams
-            DebateTeam(debate=debate, team=aff, side=DebateTeam.SIDE_AFFIRMATIVE,
-                flags=",".join(pairing.get_team_flags(aff))).save()
-            DebateTeam(debate=debate, team=neg, side=DebateTeam.SIDE_NEGATIVE,
-                flags=",".join(pairing.get_team_flags(neg))).save()
+            debates.append(debate)
+
+        with transaction.atomic():
+            # DebateTeams need the debates' primary keys, which bulk_create()
+            # only sets on backends that can return them from bulk inserts.
+            if connection.features.can_return_ids_from_bulk_insert:
+                Debate.objects.bulk_create(debates)
+            else:
+                for debate in debates:
+                    debate.save()
+
+            debateteams = []
+            for debate, pairing in zip(debates, pairings):
+                aff, neg = pairing.teams
+                debateteams.append(DebateTeam(debate=debate, team=aff, side=DebateTeam.SIDE_AFFIRMATIVE,
+                    flags=",".join(pairing.get_team_flags(aff))))
+                debateteams.append(DebateTeam(debate=debate, team=neg, side=DebateTeam.SIDE_NEGATIVE,
+                    flags=",".join(pairing.get_team_flags(neg))))
+            DebateTeam.objects.bulk_create(debateteams)
+
+        # bulk_create() doesn't send signals, so clear caches that depend on
+        # debates and debate teams manually
+        clear_histories_cache(self.round.tournament_id, self.round.seq)
+        bump_content_version(self.round.tournament_id, self.round.id)
 
     def delete(self):
         self.round.debate_set.all().delete()
@@ -94,8 +125,7 @@ class BaseDrawManager:
         teams = self.get_teams()
         results = self.get_results()
         rrseq = self.get_rrseq()
-        self._populate_aff_counts(teams)
-        self._populate_team_side_allocations(teams)
+        self._populate_team_data(teams)
 
         options = dict()
         for key in self.relevant_options:
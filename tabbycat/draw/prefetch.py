@@ -67,3 +67,37 @@ def populate_history(debates):
 
     for debate in debates_annotated:
         debates_by_id[debate.id]._history = debate.past_debates
+
+
+def populate_team_histories(teams, round):
+    """Sets the attribute `_seen_cache` on each Team in `teams` to a dict
+    mapping the IDs of other teams to the number of times the two teams have
+    faced each other in rounds before `round`. `Team.seen()` uses this in
+    preference to querying the database, which makes conflict checks in draw
+    generators O(1).
+
+    All prior pairings are loaded in a single query. Returns the history
+    structure, a sparse symmetric dict of dicts keyed by team ID, so that
+    `history[a][b] == history[b][a]`."""
+
+    dts = DebateTeam.objects.filter(
+        debate__round__tournament_id=round.tournament_id,
+        debate__round__seq__lt=round.seq
+    ).order_by('debate_id').values_list('debate_id', 'team_id')
+
+    debates = {}
+    for debate_id, team_id in dts:
+        debates.setdefault(debate_id, []).append(team_id)
+
+    history = {team.id: {} for team in teams}
+    for team_ids in debates.values():
+        for team_id in team_ids:
+            counts = history.setdefault(team_id, {})
+            for other_id in team_ids:
+                if other_id != team_id:
+                    counts[other_id] = counts.get(other_id, 0) + 1
+
+    for team in teams:
+        team._seen_cache = history[team.id]
+
+    return history
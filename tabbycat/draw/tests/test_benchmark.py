@@ -0,0 +1,54 @@
+import random
+import unittest
+
+from ..benchmark import benchmark_cases, compare_to_baseline, run_benchmarks, run_case, synthetic_field
+
+
+class TestDrawBenchmarks(unittest.TestCase):
+    """Checks that every generator/option combination in the benchmarks
+    produces a valid draw on small synthetic tournaments."""
+
+    def test_all_cases_valid(self):
+        for nteams in [20, 50]:
+            teams = synthetic_field(nteams, 4, random.Random(nteams))
+            team_ids = {team.id for team in teams}
+            for name, draw_type, options in benchmark_cases():
+                with self.subTest(case=name, teams=nteams):
+                    draw, elapsed = run_case(draw_type, options, teams, 4)
+                    drawn = [team.id for pairing in draw for team in pairing.teams]
+                    self.assertEqual(len(drawn), len(set(drawn)))
+                    self.assertTrue(set(drawn) <= team_ids)
+                    if draw_type in ["random", "power_paired", "round_robin"]:
+                        self.assertEqual(len(drawn), nteams)
+                    if options.get("side_allocations") == "preallocated":
+                        for pairing in draw:
+                            self.assertEqual(pairing.aff_team.allocated_side, "aff")
+                            self.assertEqual(pairing.neg_team.allocated_side, "neg")
+
+    def test_reproducible(self):
+        cases = [case for case in benchmark_cases() if case[1] == "power_paired"][:5]
+        results1 = list(run_benchmarks([30], seed=3, cases=cases))
+        results2 = list(run_benchmarks([30], seed=3, cases=cases))
+        for result1, result2 in zip(results1, results2):
+            self.assertIsNone(result1["error"])
+            self.assertEqual(result1["history"], result2["history"])
+            self.assertEqual(result1["institution"], result2["institution"])
+
+    def test_compare_to_baseline(self):
+        baseline = [
+            {"case": "a", "teams": 10, "time": 1.0, "history": 0, "institution": 1, "error": None},
+            {"case": "b", "teams": 10, "time": 1.0, "history": 0, "institution": 1, "error": None},
+            {"case": "c", "teams": 10, "time": 0.001, "history": 0, "institution": 0, "error": None},
+            {"case": "d", "teams": 10, "time": 1.0, "history": 0, "institution": 0, "error": None},
+        ]
+        results = [
+            {"case": "a", "teams": 10, "time": 1.2, "history": 0, "institution": 0, "error": None},
+            {"case": "b", "teams": 10, "time": 2.0, "history": 1, "institution": 1, "error": None},
+            {"case": "c", "teams": 10, "time": 0.003, "history": 0, "institution": 0, "error": None},
+            {"case": "d", "teams": 10, "time": None, "history": None, "institution": None, "error": "Oops"},
+        ]
+        regressions = compare_to_baseline(results, baseline, time_tolerance=1.5)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(regressions[0].startswith("b (10 teams): took"))
+        self.assertTrue(regressions[1].startswith("b (10 teams): 1 history conflicts"))
+        self.assertTrue(regressions[2].startswith("d (10 teams): now fails"))
@@ -1,5 +1,6 @@
-import unittest
 import copy
+import random
+import unittest
 
 from collections import OrderedDict
 
@@ -374,6 +375,94 @@ class TestPowerPairedDrawGeneratorParts(unittest.TestCase):
                     ((4, 7), ["1u1d_hist"])]
         self.one_up_one_down(data, expected)
 
+    def min_cost_matching_result(self, data, **options):
+        """Runs min-cost matching on a single bracket of pairings, each team in
+        `data` being a tuple (id, institution[, points, history]), with points
+        ignored, and returns the resulting list of pairings."""
+        self.ppd.options["side_allocations"] = "none"
+        self.ppd.options["avoid_conflicts"] = "min_cost_matching"
+        for option, value in options.items():
+            self.ppd.options[option] = value
+        pairings = []
+        for pair in data:
+            teams = [TestTeam(id=team[0], inst=team[1], points=0, hist=team[3] if len(team) > 3 else ())
+                     for team in pair]
+            pairings.append(Pairing(teams, 0, None))
+        pairings_dict = {0: pairings}
+        self.ppd.avoid_conflicts(pairings_dict)
+        return pairings_dict[0]
+
+    def min_cost_matching(self, data, expected, **options):
+        result = self.min_cost_matching_result(data, **options)
+        self.assertEqual(len(expected), len(result))
+        for (exp_teams, exp_flags), pair in zip(expected, result):
+            self.assertEqual(tuple(t.id for t in pair.teams), exp_teams)
+            self.assertEqual(pair.flags, exp_flags)
+
+    def test_matching_no_swap(self):
+        data = (((1, 'A'), (5, 'B')),
+                ((2, 'C'), (6, 'A')),
+                ((3, 'B'), (7, 'D')),
+                ((4, 'C'), (8, 'A')))
+        expected = self._1u1d_no_change(data)
+        self.min_cost_matching(data, expected)
+
+    def test_matching_swap_institution(self):
+        data = (((1, 'A'), (5, 'A')),
+                ((2, 'C'), (6, 'B')),
+                ((3, 'B'), (7, 'D')),
+                ((4, 'C'), (8, 'A')))
+        expected = [((1, 6), ["match_inst"]),
+                    ((2, 5), ["match_other"]),
+                    ((3, 7), []),
+                    ((4, 8), [])]
+        self.min_cost_matching(data, expected)
+
+    def test_matching_no_swap_institution(self):
+        data = (((1, 'A'), (5, 'A')),
+                ((2, 'C'), (6, 'B')),
+                ((3, 'B'), (7, 'D')),
+                ((4, 'C'), (8, 'A')))
+        expected = self._1u1d_no_change(data)
+        self.min_cost_matching(data, expected, avoid_institution=False)
+
+    def test_matching_swap_history(self):
+        data = (((1, 'A', None, 5), (5, 'B', None, 1)),
+                ((2, 'C'), (6, 'A')),
+                ((3, 'B'), (7, 'D')),
+                ((4, 'C'), (8, 'A')))
+        expected = [((1, 7), ["match_hist"]),
+                    ((2, 5), ["match_other"]),
+                    ((3, 6), ["match_other"]),
+                    ((4, 8), [])]
+        self.min_cost_matching(data, expected)
+
+    def test_matching_beyond_adjacent(self):
+        # One-up-one-down can't resolve this, since swapping with the debate
+        # above or below creates another institution conflict.
+        data = (((1, 'C'), (5, 'B')),
+                ((2, 'C'), (6, 'C')),
+                ((3, 'C'), (7, 'B')),
+                ((4, 'D'), (8, 'E')))
+        result = self.min_cost_matching_result(data)
+        self.assertEqual(len(result), 4)
+        for pairing in result:
+            self.assertFalse(pairing.conflict_inst)
+
+    def test_matching_max_displacement(self):
+        rng = random.Random(0)
+        for i in range(50):
+            data = tuple(((2 * room + 1, rng.choice("AB")), (2 * room + 2, rng.choice("AB"))) for room in range(8))
+            original_rooms = {team[0]: room for room, pair in enumerate(data) for team in pair}
+            result = self.min_cost_matching_result(data, max_displacement=1)
+            self.assertEqual(len(result), len(data))
+            for pairing in result:
+                rooms = [original_rooms[team.id] for team in pairing.teams]
+                self.assertLessEqual(abs(rooms[0] - rooms[1]), 1, msg="draw %s" % (data,))
+
+    def test_matching_empty(self):
+        self.assertEqual(self.min_cost_matching_result(()), [])
+
 
 class TestPowerPairedDrawGenerator(unittest.TestCase):
     """Test the entire draw functions as a black box."""
@@ -0,0 +1,73 @@
+import logging
+from timeit import default_timer as timer
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from availability.utils import activate_all
+from draw.manager import DrawManager
+from draw.models import Debate, DebateTeam
+from participants.models import Institution, Team
+from tournaments.models import Round, Tournament
+from utils.tests import TournamentTestCase
+
+logger = logging.getLogger(__name__)
+
+
+class TestMakeDebatesLatency(TestCase):
+    """Checks that creating a large draw takes a fixed number of inserts and
+    reports how long it took."""
+
+    NUM_TEAMS = 240  # 120 debates
+
+    def setUp(self):
+        self.t = Tournament.objects.create(slug="drawlatencytest", name="Draw latency test")
+        institutions = [Institution.objects.create(code="INS%d" % i, name="Institution %d" % i) for i in range(20)]
+        for i in range(self.NUM_TEAMS):
+            Team.objects.create(tournament=self.t, institution=institutions[i % 20], reference="Team %d" % i)
+        self.round = Round.objects.create(tournament=self.t, seq=1, draw_type=Round.DRAW_RANDOM)
+        activate_all(self.round)
+
+    def test_large_draw(self):
+        with CaptureQueriesContext(connection) as context:
+            start = timer()
+            DrawManager(self.round).create()
+            elapsed = timer() - start
+
+        logger.info("Created draw of %d debates in %.3f s using %d queries",
+                self.NUM_TEAMS // 2, elapsed, len(context.captured_queries))
+
+        self.assertEqual(Debate.objects.filter(round=self.round).count(), self.NUM_TEAMS // 2)
+        self.assertEqual(DebateTeam.objects.filter(debate__round=self.round).count(), self.NUM_TEAMS)
+
+        inserts = [q for q in context.captured_queries if q['sql'].startswith('INSERT INTO "draw_debate')]
+        if connection.features.can_return_ids_from_bulk_insert:
+            self.assertEqual(len(inserts), 2)
+        else:
+            self.assertEqual(len(inserts), self.NUM_TEAMS // 2 + 1)
+
+
+class TestPopulateTeamData(TournamentTestCase):
+
+    def test_side_counts_match_models(self):
+        round = self.t.round_set.order_by('-seq').first()
+        teams = list(self.t.team_set.all())
+        DrawManager(round)._populate_side_counts(teams)
+        for team in teams:
+            self.assertEqual(team.aff_count, team.get_aff_count(round.prev.seq))
+            self.assertEqual(team.neg_count, team.get_neg_count(round.prev.seq))
+
+    def test_constant_queries(self):
+        round = self.t.round_set.order_by('-seq').first()
+        manager = DrawManager(round)
+
+        # Warm up caches (e.g. the tournament and its preferences), which
+        # would otherwise only be loaded by the first call
+        manager._populate_team_data(list(self.t.team_set.all()))
+
+        with CaptureQueriesContext(connection) as small:
+            manager._populate_team_data(list(self.t.team_set.all()[:4]))
+        with CaptureQueriesContext(connection) as large:
+            manager._populate_team_data(list(self.t.team_set.all()))
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
@@ -0,0 +1,30 @@
+from utils.tests import TournamentTestCase
+
+from draw.prefetch import populate_team_histories
+from participants.models import Team
+
+
+class TestPopulateTeamHistories(TournamentTestCase):
+
+    def test_matches_seen(self):
+        round = self.t.round_set.order_by('-seq').first()
+        teams = list(self.t.team_set.all())
+        history = populate_team_histories(teams, round)
+
+        fresh_teams = Team.objects.in_bulk([team.id for team in teams])
+        for team in teams:
+            for other in teams:
+                if team == other:
+                    continue
+                expected = fresh_teams[team.id].seen(other, before_round=round.seq)
+                self.assertEqual(team.seen(other), expected)
+                self.assertEqual(history[team.id].get(other.id, 0), history[other.id].get(team.id, 0))
+
+    def test_no_queries_after_prefetch(self):
+        round = self.t.round_set.order_by('-seq').first()
+        teams = list(self.t.team_set.all())
+        populate_team_histories(teams, round)
+        with self.assertNumQueries(0):
+            for team in teams:
+                for other in teams:
+                    team.seen(other)
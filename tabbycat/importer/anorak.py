@@ -69,8 +69,7 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
             tournament=self.tournament,
             stage=self.lookup_round_stage,
             draw_type=self.lookup_draw_type,
-            break_category=lambda x: bm.BreakCategory.objects.get(
-                slug=x, tournament=self.tournament)
+            break_category=lambda x: self.lookups.get(bm.BreakCategory, slug=x)
         )
         self._import(f, tm.Round, round_interpreter)
 
@@ -103,7 +102,7 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
             self._import(f, pm.Region, region_interpreter, expect_unique=False)
 
         institution_interpreter = make_interpreter(
-            region=lambda x: pm.Region.objects.get(name=x)
+            region=lambda x: self.lookups.get(pm.Region, name=x)
         )
 
         self._import(f, pm.Institution, institution_interpreter)
@@ -121,7 +120,7 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
         venue_interpreter = make_interpreter(
             tournament=self.tournament,
             DELETE=['category'],
-            category=lambda x: vm.VenueCategory.objects.get(name=x),
+            category=lambda x: self.lookups.get(vm.VenueCategory, name=x),
         )
         self._import(f, vm.Venue, venue_interpreter)
 
@@ -136,8 +135,8 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
             if not line.get('category'):
                 return None
             return {
-                'venuecategory': vm.VenueCategory.objects.get(name=line['category']),
-                'venue': vm.Venue.objects.get(name=line['name'])
+                'venuecategory': self.lookups.get(vm.VenueCategory, name=line['category']),
+                'venue': self.lookups.get(vm.Venue, name=line['name'])
             }
 
         self._import(f, vm.VenueCategory.venues.through, venue_category_venue_interpreter)
@@ -172,7 +171,7 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
 
         team_interpreter_part = make_interpreter(
             tournament=self.tournament,
-            institution=pm.Institution.objects.lookup
+            institution=lambda x: self.lookups.lookup(pm.Institution, x)
         )
 
         def team_interpreter(line):
@@ -185,8 +184,8 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
 
         if create_dummy_speakers:
             def speakers_interpreter(line):
-                team = pm.Teams.objects.get(name=line['reference'],
-                    institution=pm.Institution.objects.lookup(line['institution']))
+                team = self.lookups.get(pm.Team, reference=line['reference'],
+                    institution=self.lookups.lookup(pm.Institution, line['institution']))
                 for name in ["1st Speaker", "2nd Speaker", "3rd Speaker", "Reply Speaker"]:
                     yield dict(name=name, team=team)
             self._import(f, pm.Speaker, speakers_interpreter)
@@ -206,7 +205,7 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
             def team_interpreter(line):
                 interpreted = {
                     'tournament':  self.tournament,
-                    'institution':  pm.Institution.objects.lookup(line['institution']),
+                    'institution':  self.lookups.lookup(pm.Institution, line['institution']),
                     'reference':  line['team_name'],
                     'short_reference':  line['team_name'][:34],
                 }
@@ -223,9 +222,8 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
         )
 
         def speaker_interpreter(line):
-            institution = pm.Institution.objects.lookup(line['institution'])
-            line['team'] = pm.Team.objects.get(
-                institution=institution, reference=line['team_name'], tournament=self.tournament)
+            institution = self.lookups.lookup(pm.Institution, line['institution'])
+            line['team'] = self.lookups.get(pm.Team, institution=institution, reference=line['team_name'])
             line = speaker_interpreter_part(line)
             return line
         self._import(f, pm.Speaker, speaker_interpreter)
@@ -243,7 +241,7 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
         """
 
         adjudicator_interpreter = make_interpreter(
-            institution=pm.Institution.objects.lookup,
+            institution=lambda x: self.lookups.lookup(pm.Institution, x),
             tournament=self.tournament,
             gender=self.lookup_gender,
             DELETE=['team_conflicts', 'institution_conflicts', 'adj_conflicts']
@@ -251,19 +249,19 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
         self._import(f, pm.Adjudicator, adjudicator_interpreter)
 
         def test_score_interpreter(line):
-            institution = pm.Institution.objects.lookup(line['institution'])
+            institution = self.lookups.lookup(pm.Institution, line['institution'])
             if line['test_score']:
                 return {
-                    'adjudicator' : pm.Adjudicator.objects.get(name=line['name'], institution=institution, tournament=self.tournament),
+                    'adjudicator' : self.lookups.get(pm.Adjudicator, name=line['name'], institution=institution),
                     'score'       : line['test_score'],
                     'round'       : None,
                 }
         self._import(f, fm.AdjudicatorTestScoreHistory, test_score_interpreter)
 
         def own_institution_conflict_interpreter(line):
-            institution = pm.Institution.objects.lookup(line['institution'])
+            institution = self.lookups.lookup(pm.Institution, line['institution'])
             return {
-                'adjudicator' : pm.Adjudicator.objects.get(name=line['name'], institution=institution, tournament=self.tournament),
+                'adjudicator' : self.lookups.get(pm.Adjudicator, name=line['name'], institution=institution),
                 'institution' : institution,
             }
         self._import(f, am.AdjudicatorInstitutionConflict, own_institution_conflict_interpreter)
@@ -271,11 +269,11 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
         def institution_conflict_interpreter(line):
             if not line.get('institution_conflicts'):
                 return None
-            adj_inst = pm.Institution.objects.lookup(line['institution'])
-            adjudicator = pm.Adjudicator.objects.get(name=line['name'], institution=adj_inst, tournament=self.tournament)
+            adj_inst = self.lookups.lookup(pm.Institution, line['institution'])
+            adjudicator = self.lookups.get(pm.Adjudicator, name=line['name'], institution=adj_inst)
             for institution_name in line['institution_conflicts'].split(","):
                 institution_name = institution_name.strip()
-                institution = pm.Institution.objects.lookup(institution_name)
+                institution = self.lookups.lookup(pm.Institution, institution_name)
                 yield {
                     'adjudicator' : adjudicator,
                     'institution' : institution,
@@ -285,12 +283,11 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
         def team_conflict_interpreter(line):
             if not line.get('team_conflicts'):
                 return
-            adj_inst = pm.Institution.objects.lookup(line['institution'])
-            adjudicator = pm.Adjudicator.objects.get(name=line['name'],
-                institution=adj_inst, tournament=self.tournament)
+            adj_inst = self.lookups.lookup(pm.Institution, line['institution'])
+            adjudicator = self.lookups.get(pm.Adjudicator, name=line['name'], institution=adj_inst)
             for team_name in line['team_conflicts'].split(","):
                 team_name = team_name.strip()
-                team = pm.Team.objects.lookup(team_name)
+                team = self.lookups.lookup(pm.Team, team_name)
                 yield {
                     'adjudicator' : adjudicator,
                     'team'        : team,
@@ -300,12 +297,11 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
         def adj_conflict_interpreter(line):
             if not line.get('adj_conflicts'):
                 return
-            adj_inst = pm.Institution.objects.lookup(line['institution'])
-            adjudicator = pm.Adjudicator.objects.get(name=line['name'],
-                institution=adj_inst, tournament=self.tournament)
+            adj_inst = self.lookups.lookup(pm.Institution, line['institution'])
+            adjudicator = self.lookups.get(pm.Adjudicator, name=line['name'], institution=adj_inst)
             for adj_name in line['adj_conflicts'].split(","):
                 adj_name = adj_name.strip()
-                conflicted_adj = pm.Adjudicator.objects.get(name=adj_name)
+                conflicted_adj = self.lookups.get(pm.Adjudicator, name=adj_name)
                 yield {
                     'adjudicator'               : adjudicator,
                     'conflict_adjudicator'      : conflicted_adj,
@@ -318,7 +314,7 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
             round, motion_seq, reference, text
         """
         motions_interpreter = make_interpreter(
-            round=lambda x: tm.Round.objects.lookup(x, tournament=self.tournament),
+            round=lambda x: self.lookups.lookup(tm.Round, x),
         )
         self._import(f, mm.Motion, motions_interpreter)
 
@@ -328,11 +324,11 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
             team_name, side_for_round1, side_for_round2, ...
         """
         def side_interpreter(line):
-            team = pm.Team.objects.lookup(line['team_name'])
+            team = self.lookups.lookup(pm.Team, line['team_name'])
             del line['team_name']
             for round_name, side in line.items():
                 yield {
-                    'round'    : tm.Round.objects.lookup(round_name, tournament=self.tournament),
+                    'round'    : self.lookups.lookup(tm.Round, round_name),
                     'team'     : team,
                     'position' : self.lookup_team_position(side),
                 }
@@ -357,8 +353,8 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
             adjudicator, category, priority
         """
         adj_venue_constraints_interpreter_part = make_interpreter(
-            adjudicator=lambda x: pm.Adjudicator.objects.get(name=x),
-            category=lambda x: vm.VenueCategory.objects.get(name=x),
+            adjudicator=lambda x: self.lookups.get(pm.Adjudicator, name=x),
+            category=lambda x: self.lookups.get(vm.VenueCategory, name=x),
         )
 
         def adj_venue_constraints_interpreter(line):
@@ -376,8 +372,8 @@ class AnorakTournamentDataImporter(BaseTournamentDataImporter):
             team, category, priority
         """
         team_venue_constraints_interpreter_part = make_interpreter(
-            team=pm.Team.objects.lookup,
-            category=lambda x: vm.VenueCategory.objects.get(name=x),
+            team=lambda x: self.lookups.lookup(pm.Team, x),
+            category=lambda x: self.lookups.get(vm.VenueCategory, name=x),
         )
 
         def team_venue_constraints_interpreter(line):
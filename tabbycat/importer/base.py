@@ -3,15 +3,35 @@
 import csv
 import re
 import logging
+import weakref
 from collections import Counter
 from types import GeneratorType
 
-from django.core.exceptions import FieldError, MultipleObjectsReturned, ObjectDoesNotExist, ValidationError
+from django.core.exceptions import (FieldDoesNotExist, FieldError, MultipleObjectsReturned, ObjectDoesNotExist,
+                                    ValidationError)
+from django.db import connection, models, transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch.dispatcher import _make_id
+
+from utils.cache import bump_content_version
 
 NON_FIELD_ERRORS = '__all__'
 DUPLICATE_INFO = 19  # Logging level just below INFO
+BATCH_SIZE = 500
 logging.addLevelName(DUPLICATE_INFO, 'DUPLICATE_INFO')
 
+# Receivers that don't stop instances from being inserted in bulk, because
+# batched imports bump the tournament's content version themselves once they're
+# done, and the other receivers only affect rows that existed beforehand.
+BULK_SAFE_RECEIVERS = {
+    'participants.signals.update_team_cache',
+    'participants.signals.update_team_names_from_institution',
+    'tournaments.signals.bump_institution_content_version',
+    'tournaments.signals.bump_motion_content_version',
+    'tournaments.signals.bump_participant_content_version',
+    'tournaments.signals.bump_speaker_content_version',
+}
+
 
 def make_interpreter(DELETE=[], **kwargs):  # noqa: N803
     """Convenience function for building an interpreter."""
@@ -40,6 +60,229 @@ def make_lookup(name, choices):
     return staticmethod(lookup)
 
 
+class ExistingRowsIndex:
+    """In-memory index of the existing rows of a model, used in batched imports
+    in place of a query for each line. Rows are indexed separately for each set
+    of fields that lines are looked up by, and for each uniqueness constraint,
+    with one query each time a new one is needed."""
+
+    def __init__(self, model):
+        self.model = model
+        self.lookups = {}
+        self.uniques = {}
+
+    def _lookup_fields(self, kwargs):
+        fields = []
+        for name in kwargs:
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or field.many_to_many:
+                return None
+            fields.append(field)
+        return fields
+
+    @staticmethod
+    def _to_python(field, value):
+        if isinstance(value, models.Model):
+            return value.pk
+        if field.is_relation:
+            return field.target_field.to_python(value)
+        return field.to_python(value)
+
+    def get(self, kwargs):
+        """Raises `model.DoesNotExist` if no existing row matches `kwargs`, or
+        `model.MultipleObjectsReturned` if more than one does, like
+        `model.objects.get(**kwargs)`. If `kwargs` has keys that aren't
+        concrete fields, it just calls `model.objects.get(**kwargs)`."""
+
+        fields = self._lookup_fields(kwargs)
+        if fields is None:
+            self.model.objects.get(**kwargs)
+            return
+
+        names = tuple(field.attname for field in fields)
+        if names not in self.lookups:
+            self.lookups[names] = Counter(self.model.objects.values_list(*names))
+        key = tuple(self._to_python(field, value) for field, value in zip(fields, kwargs.values()))
+
+        count = self.lookups[names][key]
+        if count == 0:
+            raise self.model.DoesNotExist("%s matching query does not exist." % self.model._meta.object_name)
+        elif count > 1:
+            raise self.model.MultipleObjectsReturned("get() returned more than one %s -- it returned %d!" %
+                    (self.model._meta.object_name, count))
+
+    def full_clean(self, inst, kwargs):
+        """Like `inst.full_clean()`, but checks uniqueness against this index
+        (and instances that previously passed this method), and doesn't check
+        that related objects passed in `kwargs` as saved instances exist."""
+
+        errors = {}
+        exclude = [name for name, value in kwargs.items() if isinstance(value, models.Model) and value.pk is not None]
+        try:
+            inst.full_clean(exclude=exclude, validate_unique=False)
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+
+        unique_keys = []
+        unique_checks, date_checks = inst._get_unique_checks(exclude=list(errors))
+        for model_class, unique_check in unique_checks:
+            fields = [model_class._meta.get_field(name) for name in unique_check]
+            values = tuple(getattr(inst, field.attname) for field in fields)
+            if any(value is None or (value == '' and connection.features.interprets_empty_strings_as_nulls)
+                    for value in values):
+                continue
+
+            index_key = (model_class, unique_check)
+            if index_key not in self.uniques:
+                self.uniques[index_key] = set(model_class._default_manager.values_list(
+                        *[field.attname for field in fields]))
+            if values in self.uniques[index_key]:
+                key = unique_check[0] if len(unique_check) == 1 else NON_FIELD_ERRORS
+                errors.setdefault(key, []).append(inst.unique_error_message(model_class, unique_check))
+            unique_keys.append((index_key, values))
+
+        if date_checks:
+            for key, messages in inst._perform_date_checks(date_checks).items():
+                errors.setdefault(key, []).extend(messages)
+
+        if errors:
+            raise ValidationError(errors)
+
+        for index_key, values in unique_keys:
+            self.uniques[index_key].add(values)
+
+
+class LookupCache:
+    """Caches the objects that interpreters look up by name during an import,
+    so that each lookup is a dict access rather than a query. The objects of
+    each model are loaded the first time they're needed (restricted to the
+    tournament, if the model has a tournament field), and indexed by each set
+    of fields they're looked up by.
+
+    `invalidate(model)` must be called whenever objects of `model` are
+    created, so that later lookups find them; `_import()` does this."""
+
+    def __init__(self, tournament):
+        self.tournament = tournament
+        self.objects = {}
+        self.indices = {}
+
+    def _get_objects(self, model):
+        if model not in self.objects:
+            queryset = model.objects.all()
+            if any(field.name == 'tournament' for field in model._meta.concrete_fields):
+                queryset = queryset.filter(tournament=self.tournament)
+            self.objects[model] = list(queryset)
+        return self.objects[model]
+
+    def _get_index(self, model, names):
+        if (model, names) not in self.indices:
+            attnames = [model._meta.get_field(name).attname for name in names]
+            index = {}
+            for obj in self._get_objects(model):
+                index.setdefault(tuple(getattr(obj, attname) for attname in attnames), []).append(obj)
+            self.indices[(model, names)] = index
+        return self.indices[(model, names)]
+
+    @staticmethod
+    def _get_one(model, matches):
+        if len(matches) == 0:
+            raise model.DoesNotExist("%s matching query does not exist." % model._meta.object_name)
+        elif len(matches) > 1:
+            raise model.MultipleObjectsReturned("get() returned more than one %s -- it returned %d!" %
+                    (model._meta.object_name, len(matches)))
+        return matches[0]
+
+    def get(self, model, **kwargs):
+        """Returns the object of `model` whose fields exactly match `kwargs`,
+        raising DoesNotExist or MultipleObjectsReturned like `get()` would.
+        Model instances in `kwargs` match by primary key."""
+        names = tuple(sorted(kwargs))
+        key = tuple(kwargs[name].pk if isinstance(kwargs[name], models.Model) else kwargs[name] for name in names)
+        return self._get_one(model, self._get_index(model, names).get(key, []))
+
+    def lookup(self, model, name):
+        """Returns the object of `model` with `name` in any of the name fields
+        of its manager, like `model.objects.lookup(name)` would (see
+        LookupByNameFieldsMixin)."""
+        matches = {}
+        for field in model.objects.name_fields:
+            for obj in self._get_index(model, (field,)).get((name,), []):
+                matches[obj.pk] = obj
+        return self._get_one(model, list(matches.values()))
+
+    def invalidate(self, model):
+        self.objects.pop(model, None)
+        for key in [key for key in self.indices if key[0] is model]:
+            del self.indices[key]
+
+
+def _sender_receivers(signal, sender):
+    """Returns the receivers connected to `signal` for `sender` specifically.
+    Receivers connected to all senders (like dynamic_preferences', which only
+    act on models with preferences) aren't included."""
+    sender_id = _make_id(sender)
+    receivers = []
+    for (receiver_id, receiver_sender_id), receiver in signal.receivers:
+        if receiver_sender_id != sender_id:
+            continue
+        if isinstance(receiver, weakref.ReferenceType):
+            receiver = receiver()
+            if receiver is None:
+                continue
+        receivers.append(receiver)
+    return receivers
+
+
+def has_save_side_effects(model):
+    """Returns True if saving an instance of `model` does more than insert a
+    row, so that it can't be created using `bulk_create()`. Receivers in
+    BULK_SAFE_RECEIVERS don't count."""
+    if model.save is not models.Model.save:
+        return True
+    return any("%s.%s" % (receiver.__module__, receiver.__name__) not in BULK_SAFE_RECEIVERS
+               for signal in (pre_save, post_save) for receiver in _sender_receivers(signal, model))
+
+
+def bulk_insert(model, instances):
+    """Inserts `instances` in batches, returning False if it can't because
+    saving them needs more than an insert. Unlike `bulk_create()`, this also
+    works for models with a single concrete parent (like Speaker), by
+    inserting the parents first; this requires a database that returns IDs
+    from bulk inserts."""
+
+    if has_save_side_effects(model):
+        return False
+
+    parents = model._meta.get_parent_list()
+    if not parents:
+        model.objects.bulk_create(instances, batch_size=BATCH_SIZE)
+        return True
+
+    if len(parents) > 1 or has_save_side_effects(parents[0]) or \
+            not connection.features.can_return_ids_from_bulk_insert:
+        return False
+
+    parent = parents[0]
+    parent_instances = [parent(**{field.attname: getattr(inst, field.attname)
+            for field in parent._meta.concrete_fields}) for inst in instances]
+    parent.objects.bulk_create(parent_instances, batch_size=BATCH_SIZE)
+
+    ptr = model._meta.parents[parent]
+    for inst, parent_inst in zip(instances, parent_instances):
+        setattr(inst, parent._meta.pk.attname, parent_inst.pk)
+        setattr(inst, ptr.attname, parent_inst.pk)
+        inst._state.adding = False
+
+    fields = model._meta.local_concrete_fields
+    for i in range(0, len(instances), BATCH_SIZE):
+        model._base_manager._insert(instances[i:i+BATCH_SIZE], fields=fields)
+    return True
+
+
 class TournamentDataImporterFatal(Exception):
     pass
 
@@ -116,10 +359,13 @@ class BaseTournamentDataImporter(object):
 
     def import_things(self, f):
         interpreter = make_interpreter(
-            institution=lambda x: participants.models.Institution.objects.get(name=x)
+            institution=lambda x: self.lookups.get(participants.models.Institution, name=x)
         )
         self._import(f, participants.models.Speaker, interpreter)
 
+    Interpreters should look up related objects using `self.lookups` (a
+    LookupCache), rather than querying for them on every line.
+
     See the documentation for _import for more details.
     """
 
@@ -130,6 +376,8 @@ class BaseTournamentDataImporter(object):
         if 'loglevel' in kwargs:
             self.logger.setLevel(kwargs['loglevel'])
         self.expect_unique = kwargs.get('expect_unique', True)
+        self.batch = kwargs.get('batch', False)
+        self.lookups = LookupCache(tournament)
         self.reset_counts()
 
     def reset_counts(self):
@@ -169,16 +417,22 @@ class BaseTournamentDataImporter(object):
         duplicate objects before saving any of the objects it creates. If
         `expect_unique` is False, it will just skip objects that would be
         duplicates and log a DUPLICATE_INFO message to say so.
+
+        If `self.batch` is True, existing rows are checked against an index
+        loaded once per import (see ExistingRowsIndex) rather than queried for
+        every line, and instances are created in bulk in a single transaction.
+        Errors are reported for the same lines either way.
         """
         if hasattr(csvfile, 'seek') and callable(csvfile.seek):
             csvfile.seek(0)
         reader = csv.DictReader(csvfile)
-        kwargs_seen = list()
+        kwargs_seen = set()
         instances = list()
         errors = TournamentDataImporterError()
         if expect_unique is None:
             expect_unique = self.expect_unique
         skipped_because_existing = 0
+        index = ExistingRowsIndex(model) if self.batch else None
 
         for lineno, line in enumerate(reader, start=2):
 
@@ -206,7 +460,7 @@ class BaseTournamentDataImporter(object):
                 description = model.__name__ + "(" + ", ".join(["%s=%r" % args for args in kwargs.items()]) + ")"
 
                 # Check if it's a duplicate
-                kwargs_expect_unique = kwargs.copy()
+                kwargs_expect_unique = frozenset(kwargs.items())
                 if kwargs_expect_unique in kwargs_seen:
                     if expect_unique:
                         message = "Duplicate " + description
@@ -214,11 +468,14 @@ class BaseTournamentDataImporter(object):
                     else:
                         self.logger.log(DUPLICATE_INFO, "Skipping duplicate " + description)
                     continue
-                kwargs_seen.append(kwargs_expect_unique)
+                kwargs_seen.add(kwargs_expect_unique)
 
                 # Retrieve the instance or create it if it doesn't exist
                 try:
-                    inst = model.objects.get(**kwargs)
+                    if index is not None:
+                        index.get(kwargs)
+                    else:
+                        model.objects.get(**kwargs)
                 except ObjectDoesNotExist as e:
                     inst = model(**kwargs)
                 except MultipleObjectsReturned as e:
@@ -254,7 +511,10 @@ class BaseTournamentDataImporter(object):
                     continue
 
                 try:
-                    inst.full_clean()
+                    if index is not None:
+                        index.full_clean(inst, kwargs)
+                    else:
+                        inst.full_clean()
                 except ValidationError as e:
                     errors.update_with_validation_error(lineno, model, e)
                     continue
@@ -272,9 +532,23 @@ class BaseTournamentDataImporter(object):
                     self.logger.warning(message)
                 self.errors.update(errors)
 
-        for inst in instances:
-            self.logger.debug("Made %s: %r", model._meta.verbose_name, inst)
-            inst.save()
+        if self.batch:
+            with transaction.atomic():
+                if bulk_insert(model, instances):
+                    self.logger.debug("Made %d %s in bulk", len(instances), model._meta.verbose_name_plural)
+                else:
+                    for inst in instances:
+                        inst.save()
+                    self.logger.debug("Made %d %s one at a time", len(instances), model._meta.verbose_name_plural)
+            if instances:
+                bump_content_version(self.tournament.id)
+        else:
+            for inst in instances:
+                self.logger.debug("Made %s: %r", model._meta.verbose_name, inst)
+                inst.save()
+
+        if instances:
+            self.lookups.invalidate(model)
 
         self.logger.info("Imported %d %s", len(instances), model._meta.verbose_name_plural)
         if skipped_because_existing:
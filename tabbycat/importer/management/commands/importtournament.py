@@ -34,6 +34,9 @@ class Command(BaseCommand):
                             help='Delete all regions categories from the database. Overrides --keep-existing.')
         parser.add_argument('--relaxed', action='store_false', dest='strict', default=True,
                             help='Don\'t crash if there is an error, just skip and keep going.')
+        parser.add_argument('--batch', action='store_true', default=False,
+                            help='Check for existing rows in memory and create objects in bulk, which is much faster '
+                                 'for large tournaments.')
 
         # Tournament options
         parser.add_argument('-s', '--slug', type=str, action='store', default=None,
@@ -58,7 +61,8 @@ class Command(BaseCommand):
         self.make_tournament()
         loglevel = [logging.ERROR, logging.WARNING, DUPLICATE_INFO, logging.DEBUG][self.verbosity]
         self.importer = AnorakTournamentDataImporter(
-            self.t, loglevel=loglevel, strict=options['strict'], expect_unique=not options['keep_existing'])
+            self.t, loglevel=loglevel, strict=options['strict'], expect_unique=not options['keep_existing'],
+            batch=options['batch'])
 
         self._make('venue_categories')
         self._make('venues')
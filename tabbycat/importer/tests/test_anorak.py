@@ -7,7 +7,9 @@ from unittest import skip
 
 from settings import BASE_DIR
 
-from django.test import TestCase
+from django.db import connection
+from django.test import skipUnlessDBFeature, TestCase
+from django.test.utils import CaptureQueriesContext
 
 import adjallocation.models as am
 import adjfeedback.models as fm
@@ -18,7 +20,7 @@ import tournaments.models as tm
 import venues.models as vm
 
 from ..anorak import AnorakTournamentDataImporter
-from ..base import TournamentDataImporterError
+from ..base import has_save_side_effects, TournamentDataImporterError
 
 
 class TestImporterAnorak(TestCase):
@@ -196,3 +198,31 @@ class TestImporterAnorak(TestCase):
         self.assertEqual(len(self.importer.errors), 6)
         self.assertEqual(len(logscm.records), 6)
         self.importer.strict = True
+
+
+class TestImporterAnorakBatched(TestImporterAnorak):
+    """Runs all of the above tests with the importer in batched mode, which
+    should import the same objects and report the same errors."""
+
+    def setUp(self):
+        super().setUp()
+        self.importer.batch = True
+
+    def test_save_side_effects(self):
+        # Receivers for all senders, like dynamic_preferences', don't count
+        for model in [pm.Institution, pm.Speaker, pm.Adjudicator, vm.Venue, mm.Motion, am.AdjudicatorConflict]:
+            self.assertFalse(has_save_side_effects(model), msg=model.__name__)
+        for model in [pm.Team, tm.Round]:
+            self.assertTrue(has_save_side_effects(model), msg=model.__name__)
+
+    def _count_inserts(self, queries, model):
+        statement = 'INSERT INTO "%s"' % model._meta.db_table
+        return sum(1 for query in queries.captured_queries if query['sql'].startswith(statement))
+
+    @skipUnlessDBFeature('can_return_ids_from_bulk_insert')
+    def test_bulk_insert_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.test_speakers()
+        self.assertEqual(self._count_inserts(queries, pm.Institution), 1)
+        self.assertEqual(self._count_inserts(queries, pm.Person), 1)
+        self.assertEqual(self._count_inserts(queries, pm.Speaker), 1)
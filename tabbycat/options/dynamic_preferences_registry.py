@@ -115,6 +115,38 @@ class AdjHistoryPenalty(IntegerPreference):
     default = 10000
 
 
+@tournament_preferences_registry.register
+class AdjAllocator(ChoicePreference):
+    help_text = "Method used by the auto-allocator (see documentation for further details)"
+    verbose_name = "Adjudicator auto-allocation method"
+    section = draw_rules
+    name = "adj_allocator"
+    choices = (
+        ('hungarian', 'Hungarian'),
+        ('anneal', 'Hungarian, refined by simulated annealing'),
+        ('anneal_parallel', 'Hungarian, refined by simulated annealing with restarts'),
+    )
+    default = 'hungarian'
+
+
+@tournament_preferences_registry.register
+class AdjAnnealTimeLimit(FloatPreference):
+    help_text = "Time in seconds that the auto-allocator spends refining panels, if it uses simulated annealing"
+    verbose_name = "Adjudicator annealing time limit"
+    section = draw_rules
+    name = "adj_anneal_time_limit"
+    default = 3.0
+
+
+@tournament_preferences_registry.register
+class AdjAnnealRestarts(IntegerPreference):
+    help_text = "Number of independent annealing runs to keep the best of, with restarts (they share the annealing time limit)"
+    verbose_name = "Adjudicator annealing restarts"
+    section = draw_rules
+    name = "adj_anneal_restarts"
+    default = 4
+
+
 @tournament_preferences_registry.register
 class AvoidSameInstitution(BooleanPreference):
     help_text = "If checked, the draw will try to avoid pairing teams against their own institution"
@@ -209,10 +241,24 @@ class DrawAvoidConflicts(ChoicePreference):
     choices = (
         ('off', 'Off'),
         ('one_up_one_down', 'One-up-one-down'),
+        ('min_cost_matching', 'Minimum-cost matching'),
     )
     default = 'one_up_one_down'
 
 
+@tournament_preferences_registry.register
+class VenueAllocationMethod(ChoicePreference):
+    help_text = "Method used to allocate venues to debates, subject to venue constraints (see documentation for further details)"
+    verbose_name = "Venue allocation method"
+    section = draw_rules
+    name = "venue_allocation_method"
+    choices = (
+        ('greedy', 'Highest-priority constraints first'),
+        ('min_cost', 'Minimum-cost assignment'),
+    )
+    default = 'greedy'
+
+
 @tournament_preferences_registry.register
 class SkipAdjCheckins(BooleanPreference):
     help_text = "Automatically make all adjudicators available for all rounds"
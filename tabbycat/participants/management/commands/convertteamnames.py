@@ -1,3 +1,4 @@
+from participants.utils import update_team_names
 from utils.management.base import TournamentCommand
 
 
@@ -15,18 +16,20 @@ class Command(TournamentCommand):
                             help="Show what it would convert, but do not actually convert")
 
     def handle_tournament(self, tournament, **options):
-        for team in tournament.team_set.all():
+        to_convert = []
+        for team in tournament.team_set.select_related('institution'):
             if team.reference.startswith(team.institution.code + " "):
                 new_reference = team.reference[len(team.institution.code):].strip()
                 self.stdout.write("{verb} team {!r} from {} to {!r}".format(
                     team.reference, team.institution.code, new_reference,
                     verb="Would rename" if options["dry_run"] else "Renaming"))
-
-                if options["dry_run"]:
-                    team.reference = new_reference
-                    team.use_institution_prefix = True
-                    team.save()
+                team.reference = new_reference
+                team.use_institution_prefix = True
+                to_convert.append(team)
             else:
                 self.stdout.write("{verb} team {!r} from {} alone".format(
                     team.reference, team.institution.code,
-                    erb="Would leave" if options["dry_run"] else "Leaving"))
+                    verb="Would leave" if options["dry_run"] else "Leaving"))
+
+        if not options["dry_run"]:
+            update_team_names(to_convert, fields=('reference', 'use_institution_prefix'))
@@ -1,16 +1,19 @@
+from participants.utils import update_team_names
 from utils.management.base import TournamentCommand
 
 
 class Command(TournamentCommand):
 
-    help = "Resaves all teams which updates their short and long name fields. " \
+    help = "Regenerates the short and long name fields of all teams. " \
            "This shouldn't generally be necessary, because the names are " \
            "auto-populated whenever institutions and teams are saved, but it " \
            "can be used when there was a mishap with team names."
 
     def handle_tournament(self, tournament, **options):
-        for team in tournament.team_set.all():
-            old_names = team.long_name + " (" + team.short_name + ")"
-            team.save()
+        teams = list(tournament.team_set.select_related('institution'))
+        old_names = {team.id: team.long_name + " (" + team.short_name + ")" for team in teams}
+        changed = update_team_names(teams)
+        for team in changed:
             new_names = team.long_name + " (" + team.short_name + ")"
-            self.stdout.write("Resaved %s as %s" % (old_names, new_names))
+            self.stdout.write("Renamed %s as %s" % (old_names[team.id], new_names))
+        self.stdout.write("Renamed %d of %d teams" % (len(changed), len(teams)))
@@ -303,6 +303,10 @@ class Team(models.Model):
         return self.speaker_set.all()
 
     def seen(self, other, before_round=None):
+        # If draw.prefetch.populate_team_histories() has been run, use the
+        # prefetched history rather than querying the database.
+        if before_round is None and hasattr(self, '_seen_cache'):
+            return self._seen_cache.get(other.id, 0)
         queryset = self.debateteam_set.filter(debate__debateteam__team=other)
         if before_round:
             queryset = queryset.filter(debate__round__seq__lt=before_round)
@@ -482,11 +486,17 @@ class Adjudicator(Person):
         try:
             return self._feedback_score_cache
         except AttributeError:
+            pass
+
+        # Set by participants.prefetch.annotate_weighted_scores()
+        if hasattr(self, 'feedback_score_annotation'):
+            self._feedback_score_cache = self.feedback_score_annotation
+        else:
             from adjallocation.models import DebateAdjudicator
             self._feedback_score_cache = self.adjudicatorfeedback_set.filter(confirmed=True).exclude(
                 source_adjudicator__type=DebateAdjudicator.TYPE_TRAINEE).aggregate(
                     avg=models.Avg('score'))['avg']
-            return self._feedback_score_cache
+        return self._feedback_score_cache
 
     @property
     def feedback_score(self):
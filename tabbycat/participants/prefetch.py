@@ -1,4 +1,4 @@
-from django.db.models import Avg, Count
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Subquery, When
 
 from adjallocation.models import DebateAdjudicator
 from adjfeedback.models import AdjudicatorFeedback
@@ -48,3 +48,30 @@ def populate_feedback_scores(adjudicators):
     for adj in adjudicators:
         if not hasattr(adj, '_feedback_score_cache'):
             adj._feedback_score_cache = None
+
+
+def annotate_weighted_scores(queryset, feedback_weight):
+    """Annotates the adjudicators in `queryset` with:
+        'feedback_score_annotation', the average score of confirmed feedback
+            on the adjudicator, excluding feedback from trainees (or None if
+            there is none), and
+        'weighted_score_annotation', the weighted score of the adjudicator,
+            using the given feedback weight.
+    This matches `Adjudicator._feedback_score()` and
+    `Adjudicator.weighted_score()`, which use the annotation if it's there,
+    but computes them in a single query for all adjudicators.
+    Returns the annotated QuerySet."""
+
+    feedback_scores = AdjudicatorFeedback.objects.filter(
+        adjudicator_id=OuterRef('pk'),
+        confirmed=True
+    ).exclude(source_adjudicator__type=DebateAdjudicator.TYPE_TRAINEE).order_by().values(
+        'adjudicator_id').annotate(avg=Avg('score')).values('avg')
+
+    return queryset.annotate(
+        feedback_score_annotation=Subquery(feedback_scores, output_field=FloatField())
+    ).annotate(weighted_score_annotation=Case(
+        When(feedback_score_annotation__isnull=True, then=F('test_score')),
+        default=F('test_score') * (1 - feedback_weight) + F('feedback_score_annotation') * feedback_weight,
+        output_field=FloatField(),
+    ))
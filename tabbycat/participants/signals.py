@@ -3,6 +3,7 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from participants.models import Institution, Team
+from participants.utils import update_team_names
 
 import logging
 logger = logging.getLogger(__name__)
@@ -12,9 +13,8 @@ logger = logging.getLogger(__name__)
 def update_team_names_from_institution(sender, instance, created, **kwargs):
     teams = instance.team_set.all()
     if len(teams) > 0:
-        logger.info("Updating names of all %d teams from institution %s" % (len(teams), instance.name,))
-        for team in teams:
-            team.save()
+        changed = update_team_names(teams)
+        logger.info("Updated names of %d of %d teams from institution %s" % (len(changed), len(teams), instance.name,))
 
 
 @receiver(post_save, sender=Team)
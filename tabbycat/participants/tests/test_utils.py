@@ -0,0 +1,100 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from participants.models import Institution, Team
+from participants.utils import update_team_names
+from tournaments.models import Tournament
+from utils.cache import get_content_version
+
+
+class TestUpdateTeamNames(TestCase):
+
+    def setUp(self):
+        self.t = Tournament.objects.create(slug="names", name="Names")
+        self.institution = Institution.objects.create(code="Inst", name="An Institution")
+        self.teams = [Team.objects.create(tournament=self.t, institution=self.institution, reference=str(i),
+                      use_institution_prefix=(i % 2 == 0)) for i in range(4)]
+
+    def tearDown(self):
+        Institution.objects.all().delete()
+        self.t.delete()
+
+    def _names(self):
+        return list(Team.objects.filter(tournament=self.t).order_by('id').values_list('short_name', 'long_name'))
+
+    def test_bulk_rename(self):
+        # Bypass Team.save(), so the stored names are out of date
+        Team.objects.filter(tournament=self.t).update(use_institution_prefix=True)
+
+        changed = update_team_names(Team.objects.filter(tournament=self.t).select_related('institution'))
+
+        self.assertEqual(sorted(team.id for team in changed), [team.id for team in self.teams[1::2]])
+        self.assertEqual(self._names(), [("Inst %d" % i, "An Institution %d" % i) for i in range(4)])
+
+    def test_unchanged(self):
+        changed = update_team_names(Team.objects.filter(tournament=self.t).select_related('institution'))
+        self.assertEqual(changed, [])
+
+    def test_fields(self):
+        teams = list(Team.objects.filter(tournament=self.t).select_related('institution'))
+        for team in teams:
+            team.reference = "Team " + team.reference
+        update_team_names(teams, fields=('reference',))
+
+        self.assertEqual(list(Team.objects.filter(tournament=self.t).order_by('id').values_list(
+            'reference', flat=True)), ["Team %d" % i for i in range(4)])
+        self.assertEqual(self._names()[:2], [("Inst Team 0", "An Institution Team 0"), ("Team 1", "Team 1")])
+
+    def test_bumps_content_version(self):
+        version = get_content_version(self.t.id)
+        Team.objects.filter(tournament=self.t).update(use_institution_prefix=True)
+        update_team_names(Team.objects.filter(tournament=self.t).select_related('institution'))
+        self.assertNotEqual(get_content_version(self.t.id), version)
+
+    def test_institution_signal(self):
+        self.institution.code = "New"
+        self.institution.save()
+        self.assertEqual(self._names()[:2], [("New 0", "An Institution 0"), ("1", "1")])
+
+
+class TestConvertTeamNames(TestCase):
+
+    def setUp(self):
+        self.t = Tournament.objects.create(slug="convert", name="Convert")
+        self.institution = Institution.objects.create(code="Inst", name="An Institution")
+        self.prefixed = Team.objects.create(tournament=self.t, institution=self.institution, reference="Inst 1")
+        self.other = Team.objects.create(tournament=self.t, institution=self.institution, reference="Other")
+
+    def tearDown(self):
+        Institution.objects.all().delete()
+        self.t.delete()
+
+    def _call(self, *args):
+        stdout = StringIO()
+        call_command('convertteamnames', '--tournament', self.t.slug, *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_convert(self):
+        output = self._call()
+        self.assertIn("Renaming team 'Inst 1' from Inst to '1'", output)
+        self.assertIn("Leaving team 'Other' from Inst alone", output)
+
+        self.prefixed.refresh_from_db()
+        self.assertEqual(self.prefixed.reference, "1")
+        self.assertTrue(self.prefixed.use_institution_prefix)
+        self.assertEqual(self.prefixed.short_name, "Inst 1")
+        self.assertEqual(self.prefixed.long_name, "An Institution 1")
+
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.reference, "Other")
+        self.assertFalse(self.other.use_institution_prefix)
+
+    def test_dry_run(self):
+        output = self._call('--dry-run')
+        self.assertIn("Would rename team 'Inst 1' from Inst to '1'", output)
+
+        self.prefixed.refresh_from_db()
+        self.assertEqual(self.prefixed.reference, "Inst 1")
+        self.assertFalse(self.prefixed.use_institution_prefix)
@@ -1,9 +1,16 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, Value, When
 from django.db.models.expressions import RawSQL
 
+from draw.models import DebateTeam
 from tournaments.models import Round
+from utils.cache import bump_content_version
 
 from .models import Region, Team
 
+TEAM_NAMES_BATCH_SIZE = 500
+
 
 def regions_ordered(t):
     """Need to redo the region IDs so the CSS classes will be consistent. This
@@ -46,9 +53,60 @@ def annotate_side_count_kwargs(sides, seq):
 def get_side_counts(teams, sides, seq):
     """Returns a dict where keys are the team IDs in `teams`, and values are
     lists of the number of debates the team has had on each side in `sides`, in
-    preliminary rounds, up to and including the given seq (of a round)."""
+    preliminary rounds, up to and including the given seq (of a round). If
+    `seq` is None, all preliminary rounds are included.
+
+    This uses a single query, grouped by team and side."""
 
     team_ids = [team.id for team in teams]
-    queryset = Team.objects.filter(id__in=team_ids).annotate(
-        **annotate_side_count_kwargs(sides, seq))
-    return {team.id: [getattr(team, '%s_count' % side) for side in sides] for team in queryset}
+    debateteams = DebateTeam.objects.filter(team_id__in=team_ids, side__in=sides,
+            debate__round__stage=Round.STAGE_PRELIMINARY)
+    if seq is not None:
+        debateteams = debateteams.filter(debate__round__seq__lte=seq)
+
+    side_counts = {team_id: [0] * len(sides) for team_id in team_ids}
+    for team_id, side, count in debateteams.order_by().values('team_id', 'side').annotate(
+            count=Count('id')).values_list('team_id', 'side', 'count'):
+        side_counts[team_id][sides.index(side)] = count
+    return side_counts
+
+
+def update_team_names(teams, fields=()):
+    """Recomputes the short and long names of all teams in `teams` in memory,
+    and writes them using one UPDATE query per batch of teams, rather than
+    saving each team. If `fields` is given, those fields are written along with
+    the names for every team in `teams`; otherwise, only teams whose names
+    changed are written. Returns a list of the teams whose names changed.
+
+    The teams should have their institutions already loaded, e.g. using
+    `select_related('institution')`, to avoid a query for each team."""
+
+    teams = list(teams)
+    changed = []
+    for team in teams:
+        short_name = team._construct_short_name()
+        long_name = team._construct_long_name()
+        if short_name != team.short_name or long_name != team.long_name:
+            team.short_name = short_name
+            team.long_name = long_name
+            changed.append(team)
+
+    to_write = teams if fields else changed
+    fields = ['short_name', 'long_name'] + list(fields)
+
+    with transaction.atomic():
+        for start in range(0, len(to_write), TEAM_NAMES_BATCH_SIZE):
+            batch = to_write[start:start+TEAM_NAMES_BATCH_SIZE]
+            updates = {}
+            for field in fields:
+                updates[field] = Case(*[When(pk=team.pk, then=Value(getattr(team, field))) for team in batch],
+                        output_field=Team._meta.get_field(field))
+            Team.objects.filter(pk__in=[team.pk for team in batch]).update(**updates)
+
+    # Team.save() isn't called, so clear what the post_save receivers would
+    cache.delete_many(["%s_%s_%s" % ('teamid', team.id, suffix) for team in to_write
+            for suffix in ('_institution__object', '_speaker__objects')])
+    for tournament_id in {team.tournament_id for team in to_write}:
+        bump_content_version(tournament_id)
+
+    return changed
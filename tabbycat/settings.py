@@ -122,7 +122,11 @@ TEMPLATES = [
 # Caching
 # ==============================================================================
 
-PUBLIC_PAGE_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_PAGE_CACHE_TIMEOUT', 60 * 1))
+# Public pages are cached under content-versioned keys (see utils/cache.py).
+# Changes that bypass signals (like QuerySet.update(), or management commands
+# with a per-process cache) don't bump content versions, so this timeout, which
+# also applies to the versions themselves, bounds how stale a page can get.
+PUBLIC_PAGE_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_PAGE_CACHE_TIMEOUT', 60 * 5))
 TAB_PAGES_CACHE_TIMEOUT = int(os.environ.get('TAB_PAGES_CACHE_TIMEOUT', 60 * 120))
 
 # Default non-heroku cache is to use local memory
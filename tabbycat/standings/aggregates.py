@@ -0,0 +1,223 @@
+"""Functions that maintain and read the materialized per-round aggregates in
+TeamRoundAggregate and SpeakerRoundAggregate.
+
+The aggregates are kept up to date by the signal receivers in signals.py,
+whenever a ballot submission or score is saved or deleted. The standings
+generators then read cumulative metrics from them, using one grouped query
+for all teams or speakers, rather than aggregating across confirmed ballots
+every time standings are generated."""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Avg, Case, Count, FloatField, StdDev, Sum, When
+
+from draw.models import DebateTeam
+from results.models import BallotSubmission, SpeakerScore, TeamScore
+from tournaments.models import Round
+
+from .models import SpeakerRoundAggregate, TeamRoundAggregate
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================================================================
+# Updating aggregates
+# ==============================================================================
+
+def team_aggregate_fields(points, win, forfeit, score, margin, votes_given, votes_possible):
+    """Returns a dict of TeamRoundAggregate field values for a TeamScore with
+    the given field values."""
+    if votes_given is not None and votes_possible:
+        votes = votes_given / votes_possible
+    else:
+        votes = None
+
+    return {
+        'points': points,
+        'wins': int(win is True),
+        'nonforfeit_losses': int(win is False and not forfeit),
+        'score': score,
+        'nonforfeit_score': None if forfeit else score,
+        'margin': margin,
+        'nonforfeit_margin': None if forfeit else margin,
+        'votes': votes,
+    }
+
+
+_TEAMSCORE_FIELDS = ('debate_team_id', 'debate_team__team_id', 'debate_team__debate__round_id',
+        'points', 'win', 'forfeit', 'score', 'margin', 'votes_given', 'votes_possible')
+_SPEAKERSCORE_FIELDS = ('debate_team_id', 'debate_team__debate__round_id', 'speaker_id', 'position', 'score')
+
+
+def _create_aggregates(teamscores, speakerscores):
+    """Creates aggregates for all the given TeamScore and SpeakerScore
+    querysets, which should already be filtered to confirmed ballots. Returns
+    a tuple `(number of team aggregates, number of speaker aggregates)`."""
+
+    team_aggregates = []
+    for dt_id, team_id, round_id, *fields in teamscores.values_list(*_TEAMSCORE_FIELDS):
+        team_aggregates.append(TeamRoundAggregate(debate_team_id=dt_id, team_id=team_id,
+                round_id=round_id, **team_aggregate_fields(*fields)))
+    TeamRoundAggregate.objects.bulk_create(team_aggregates)
+
+    speaker_aggregates = []
+    for dt_id, round_id, speaker_id, position, score in speakerscores.filter(
+            ghost=False).values_list(*_SPEAKERSCORE_FIELDS):
+        speaker_aggregates.append(SpeakerRoundAggregate(debate_team_id=dt_id, round_id=round_id,
+                speaker_id=speaker_id, position=position, score=score))
+    SpeakerRoundAggregate.objects.bulk_create(speaker_aggregates)
+
+    return len(team_aggregates), len(speaker_aggregates)
+
+
+def update_debate_aggregates(debate_id):
+    """Recomputes the aggregates for all teams and speakers in the given
+    debate, from whichever ballot submission (if any) is confirmed."""
+    with transaction.atomic():
+        TeamRoundAggregate.objects.filter(debate_team__debate_id=debate_id).delete()
+        SpeakerRoundAggregate.objects.filter(debate_team__debate_id=debate_id).delete()
+        nteams, nspeakers = _create_aggregates(
+            TeamScore.objects.filter(ballot_submission__confirmed=True, debate_team__debate_id=debate_id),
+            SpeakerScore.objects.filter(ballot_submission__confirmed=True, debate_team__debate_id=debate_id))
+    logger.debug("Updated aggregates for debate %d: %d teams, %d speeches", debate_id, nteams, nspeakers)
+
+
+def _is_confirmed(ballot_submission_id):
+    return BallotSubmission.objects.filter(id=ballot_submission_id, confirmed=True).exists()
+
+
+def update_team_aggregate(teamscore):
+    """Updates the aggregate for a single TeamScore, if its ballot submission
+    is confirmed. This only uses the IDs on the TeamScore, so is safe to call
+    while fixtures are being loaded."""
+    if not _is_confirmed(teamscore.ballot_submission_id):
+        return
+
+    dt = DebateTeam.objects.filter(id=teamscore.debate_team_id).values_list(
+            'team_id', 'debate__round_id').first()
+    if dt is None:
+        return
+    team_id, round_id = dt
+
+    fields = team_aggregate_fields(teamscore.points, teamscore.win, teamscore.forfeit, teamscore.score,
+            teamscore.margin, teamscore.votes_given, teamscore.votes_possible)
+    fields.update(team_id=team_id, round_id=round_id)
+    TeamRoundAggregate.objects.update_or_create(debate_team_id=teamscore.debate_team_id, defaults=fields)
+
+
+def update_speaker_aggregate(speakerscore):
+    """Updates the aggregate for a single SpeakerScore, if its ballot
+    submission is confirmed."""
+    if not _is_confirmed(speakerscore.ballot_submission_id):
+        return
+
+    if speakerscore.ghost:
+        SpeakerRoundAggregate.objects.filter(debate_team_id=speakerscore.debate_team_id,
+                position=speakerscore.position).delete()
+        return
+
+    round_id = DebateTeam.objects.filter(id=speakerscore.debate_team_id).values_list(
+            'debate__round_id', flat=True).first()
+    if round_id is None:
+        return
+
+    SpeakerRoundAggregate.objects.update_or_create(
+        debate_team_id=speakerscore.debate_team_id, position=speakerscore.position,
+        defaults=dict(speaker_id=speakerscore.speaker_id, round_id=round_id, score=speakerscore.score))
+
+
+def rebuild_aggregates(tournament):
+    """Deletes and recomputes all aggregates in the given tournament. Returns
+    a tuple `(number of team aggregates, number of speaker aggregates)`."""
+    with transaction.atomic():
+        TeamRoundAggregate.objects.filter(round__tournament=tournament).delete()
+        SpeakerRoundAggregate.objects.filter(round__tournament=tournament).delete()
+        return _create_aggregates(
+            TeamScore.objects.filter(ballot_submission__confirmed=True,
+                debate_team__debate__round__tournament=tournament),
+            SpeakerScore.objects.filter(ballot_submission__confirmed=True,
+                debate_team__debate__round__tournament=tournament))
+
+
+# ==============================================================================
+# Reading cumulative metrics
+# ==============================================================================
+
+def get_team_cumulative_metrics(queryset, round=None):
+    """Returns a dict mapping team IDs to dicts of cumulative metrics for the
+    teams in `queryset`, over preliminary rounds up to and including `round`
+    (or all preliminary rounds, if `round` is None). Teams without any
+    confirmed results are omitted. Aggregates of no values are None."""
+
+    aggregates = TeamRoundAggregate.objects.filter(team__in=queryset.all(),
+            round__stage=Round.STAGE_PRELIMINARY)
+    if round is not None:
+        aggregates = aggregates.filter(round__seq__lte=round.seq)
+
+    rows = aggregates.order_by().values('team_id').annotate(
+        points=Sum('points'),
+        wins=Sum('wins'),
+        nonforfeit_losses=Sum('nonforfeit_losses'),
+        speaks_sum=Sum('score'),
+        speaks_avg=Avg('nonforfeit_score'),
+        margin_sum=Sum('margin'),
+        margin_avg=Avg('nonforfeit_margin'),
+        votes=Sum('votes'),
+    )
+    return {row.pop('team_id'): row for row in rows}
+
+
+def _speaker_metric_annotations(tournament):
+    """Returns a dict of aggregate expressions for speaker metrics, for use in
+    `annotate()` on a query with `position` and `score` fields. Substantive
+    speeches and replies are distinguished using the positions configured for
+    `tournament`."""
+
+    def substantive(field):
+        return Case(When(position__lte=tournament.last_substantive_position, then=field),
+                output_field=FloatField())
+
+    def reply(field):
+        # If there are no replies, this matches nothing
+        return Case(When(position=tournament.reply_position or -1, then=field),
+                output_field=FloatField())
+
+    return dict(
+        speaks_sum=Sum(substantive('score')),
+        speaks_avg=Avg(substantive('score')),
+        speaks_stddev=StdDev(substantive('score'), sample=True),
+        speeches_count=Count(substantive('score')),
+        replies_sum=Sum(reply('score')),
+        replies_avg=Avg(reply('score')),
+        replies_stddev=StdDev(reply('score'), sample=True),
+        replies_count=Count(reply('score')),
+    )
+
+
+def get_speaker_cumulative_metrics(queryset, round):
+    """Returns a dict mapping speaker IDs to dicts of cumulative metrics for
+    the speakers in `queryset`, over preliminary rounds up to and including
+    `round`. Substantive speeches and replies are distinguished using the
+    positions configured for the tournament of `round`."""
+
+    aggregates = SpeakerRoundAggregate.objects.filter(speaker__in=queryset.all(),
+            round__stage=Round.STAGE_PRELIMINARY, round__seq__lte=round.seq)
+
+    rows = aggregates.order_by().values('speaker_id').annotate(**_speaker_metric_annotations(round.tournament))
+    return {row.pop('speaker_id'): row for row in rows}
+
+
+def get_speaker_cumulative_metrics_from_scores(queryset, round):
+    """As for `get_speaker_cumulative_metrics()`, but aggregates non-ghost
+    speaker scores on confirmed ballots directly, rather than reading the
+    materialized aggregates. All metrics are still computed in one grouped
+    query, which joins the tables needed to filter scores only once."""
+
+    scores = SpeakerScore.objects.filter(speaker__in=queryset.all(),
+            ballot_submission__confirmed=True, ghost=False,
+            debate_team__debate__round__stage=Round.STAGE_PRELIMINARY,
+            debate_team__debate__round__seq__lte=round.seq)
+
+    rows = scores.order_by().values('speaker_id').annotate(**_speaker_metric_annotations(round.tournament))
+    return {row.pop('speaker_id'): row for row in rows}
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.utils.translation import ugettext_lazy as _
+
+
+class StandingsConfig(AppConfig):
+    name = 'standings'
+    verbose_name = _("Standings")
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -137,6 +137,10 @@ class Standings:
         self.rank_filter = rank_filter
         self._rank_limit = None
 
+        # Data fetched by metric annotators, so that annotators that need the
+        # same data can share it; see CumulativeMetricAnnotator
+        self.precomputed = dict()
+
         self.metric_keys = list()
         self.ranking_keys = list()
         self._metric_specs = list()
@@ -306,6 +310,41 @@ class BaseStandingsGenerator:
 
         return standings
 
+    def generate_from(self, standings, instances):
+        """Generates standings for `instances`, which must all be in
+        `standings`, reusing the metrics already in `standings` rather than
+        recomputing them. Returns a new Standings object.
+
+        `standings` must have been generated with the same metrics as this
+        generator (its rankings don't matter). Instances that are tied on all
+        metrics are kept in the same order as in `standings`. Check
+        `reusable_metrics` before using this on a strict subset of the
+        instances in `standings`.
+        """
+
+        order = {info.instance_id: i for i, info in enumerate(standings.standings)}
+        subset = Standings(instances, rank_filter=self.options["rank_filter"])
+
+        for spec in standings._metric_specs:
+            subset.record_added_metric(*spec)
+        for info in subset.infoview():
+            info.metrics = dict(standings.get_standing(info.instance).metrics)
+
+        subset.sort(self.precedence, lambda infos: infos.sort(key=lambda info: order[info.instance_id]))
+
+        for annotator in self.ranking_annotators:
+            logger.debug("Running ranking annotator: %s", annotator.name)
+            annotator.run(subset)
+
+        return subset
+
+    @property
+    def reusable_metrics(self):
+        """True if none of this generator's metrics depend on which other
+        instances are in the standings, so that `generate_from()` can be used
+        to generate standings for a subset of instances."""
+        return not any(annotator.depends_on_others for annotator in self.metric_annotators)
+
     def _check_annotators(self, annotators, type_str):
         """Checks the given list of annotators to ensure there are no conflicts.
         A conflict occurs if two annotators would add annotations of the same
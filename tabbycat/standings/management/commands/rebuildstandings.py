@@ -0,0 +1,14 @@
+from utils.management.base import TournamentCommand
+
+from ...aggregates import rebuild_aggregates
+
+
+class Command(TournamentCommand):
+
+    help = "Recomputes the per-round team and speaker aggregates that standings are read from, " \
+           "from the scores on confirmed ballots."
+
+    def handle_tournament(self, tournament, **options):
+        self.stdout.write("Rebuilding standings aggregates in tournament \"{:s}\"...".format(tournament.name))
+        nteams, nspeakers = rebuild_aggregates(tournament)
+        self.stdout.write("Created {:d} team and {:d} speaker aggregates.".format(nteams, nspeakers))
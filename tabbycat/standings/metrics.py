@@ -32,7 +32,10 @@ class BaseMetricAnnotator:
     Subclasses must implement the method `annotate()`. Every annotator
     must add precisely one metric.
 
-    Subclasses must set the `key`, `name` and `abbr` attributes.
+    Subclasses must set the `key`, `name` and `abbr` attributes. Subclasses
+    whose metric for an instance depends on which other instances are in the
+    standings (not just on the instance itself) must set `depends_on_others`
+    to True.
 
     The default constructor does nothing, but subclasses may have constructors
     that initialise themselves with parameters."""
@@ -42,6 +45,7 @@ class BaseMetricAnnotator:
     abbr = None  # must be set by subclasses
     glyphicon = None
     ranked_only = False
+    depends_on_others = False
 
     def run(self, queryset, standings, round=None):
         standings.record_added_metric(self.key, self.name, self.abbr, self.glyphicon)
@@ -108,3 +112,35 @@ class QuerySetMetricAnnotator(BaseMetricAnnotator):
         args = self.get_annotation_metric_query_args(round)
         queryset = self.get_annotated_queryset(queryset, "metric", *args)
         self.annotate_with_queryset(queryset, standings, round)
+
+
+class CumulativeMetricAnnotator(BaseMetricAnnotator):
+    """Base class for annotators that read metrics from a dict of cumulative
+    metrics, as returned by `get_cumulative_metrics()`, which maps instance IDs
+    to dicts of metrics keyed by `field`. The dict is fetched once per
+    Standings object and shared between all annotators using the same
+    `get_cumulative_metrics()`, so that all such metrics cost one query."""
+
+    field = None  # must be set by subclasses
+
+    @staticmethod
+    def get_cumulative_metrics(queryset, round=None):
+        raise NotImplementedError("Subclasses of CumulativeMetricAnnotator must implement get_cumulative_metrics().")
+
+    def get_metric(self, metrics):
+        """Returns the metric from the dict of cumulative metrics for a single
+        instance. Subclasses may override this to transform the metric."""
+        return metrics.get(self.field)
+
+    def annotate(self, queryset, standings, round=None):
+        get_cumulative_metrics = self.get_cumulative_metrics
+        if get_cumulative_metrics not in standings.precomputed:
+            standings.precomputed[get_cumulative_metrics] = get_cumulative_metrics(queryset, round)
+        cumulative_metrics = standings.precomputed[get_cumulative_metrics]
+
+        for info in standings.infoview():
+            metric = self.get_metric(cumulative_metrics.get(info.instance_id, {}))
+            if metric is None:
+                logger.info("Metric %r for %s was None, setting to 0", self.key, info.instance)
+                metric = 0
+            standings.add_metric(info.instance, self.key, metric)
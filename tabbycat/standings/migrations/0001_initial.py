@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.5 on 2017-09-24 11:02
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('draw', '0022_debateteam_flags'),
+        ('participants', '0036_auto_20170813_0519'),
+        ('tournaments', '0020_auto_20170422_1511'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpeakerRoundAggregate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.IntegerField(verbose_name='position')),
+                ('score', models.FloatField(verbose_name='score')),
+                ('debate_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='draw.DebateTeam', verbose_name='debate team')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournaments.Round', verbose_name='round')),
+                ('speaker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='participants.Speaker', verbose_name='speaker')),
+            ],
+            options={
+                'verbose_name': 'speaker round aggregate',
+                'verbose_name_plural': 'speaker round aggregates',
+            },
+        ),
+        migrations.CreateModel(
+            name='TeamRoundAggregate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0, verbose_name='points')),
+                ('wins', models.IntegerField(default=0, verbose_name='wins')),
+                ('nonforfeit_losses', models.IntegerField(default=0, verbose_name='non-forfeit losses')),
+                ('score', models.FloatField(blank=True, null=True, verbose_name='score')),
+                ('nonforfeit_score', models.FloatField(blank=True, null=True, verbose_name='score excluding forfeits')),
+                ('margin', models.FloatField(blank=True, null=True, verbose_name='margin')),
+                ('nonforfeit_margin', models.FloatField(blank=True, null=True, verbose_name='margin excluding forfeits')),
+                ('votes', models.FloatField(blank=True, help_text='Fraction of votes given to this team', null=True, verbose_name='votes')),
+                ('debate_team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='draw.DebateTeam', verbose_name='debate team')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournaments.Round', verbose_name='round')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='participants.Team', verbose_name='team')),
+            ],
+            options={
+                'verbose_name': 'team round aggregate',
+                'verbose_name_plural': 'team round aggregates',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='speakerroundaggregate',
+            unique_together=set([('debate_team', 'position')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='speakerroundaggregate',
+            index_together=set([('speaker', 'round')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='teamroundaggregate',
+            index_together=set([('team', 'round')]),
+        ),
+    ]
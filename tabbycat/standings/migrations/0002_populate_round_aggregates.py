@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+# This is a data migration. It populates the TeamRoundAggregate and
+# SpeakerRoundAggregate tables created in 0001_initial from the TeamScore and
+# SpeakerScore objects of confirmed ballots, so that standings for existing
+# tournaments don't need to be rebuilt manually.
+
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def populate_round_aggregates(apps, schema_editor):
+    TeamScore = apps.get_model("results", "TeamScore")
+    SpeakerScore = apps.get_model("results", "SpeakerScore")
+    TeamRoundAggregate = apps.get_model("standings", "TeamRoundAggregate")
+    SpeakerRoundAggregate = apps.get_model("standings", "SpeakerRoundAggregate")
+
+    team_aggregates = []
+    for ts in TeamScore.objects.filter(ballot_submission__confirmed=True).values(
+            'debate_team_id', 'debate_team__team_id', 'debate_team__debate__round_id', 'points',
+            'win', 'forfeit', 'score', 'margin', 'votes_given', 'votes_possible'):
+        if ts['votes_given'] is not None and ts['votes_possible']:
+            votes = ts['votes_given'] / ts['votes_possible']
+        else:
+            votes = None
+        team_aggregates.append(TeamRoundAggregate(
+            debate_team_id=ts['debate_team_id'],
+            team_id=ts['debate_team__team_id'],
+            round_id=ts['debate_team__debate__round_id'],
+            points=ts['points'],
+            wins=int(ts['win'] is True),
+            nonforfeit_losses=int(ts['win'] is False and not ts['forfeit']),
+            score=ts['score'],
+            nonforfeit_score=None if ts['forfeit'] else ts['score'],
+            margin=ts['margin'],
+            nonforfeit_margin=None if ts['forfeit'] else ts['margin'],
+            votes=votes,
+        ))
+    TeamRoundAggregate.objects.bulk_create(team_aggregates)
+
+    speaker_aggregates = []
+    for ss in SpeakerScore.objects.filter(ballot_submission__confirmed=True, ghost=False).values(
+            'debate_team_id', 'debate_team__debate__round_id', 'speaker_id', 'position', 'score'):
+        speaker_aggregates.append(SpeakerRoundAggregate(
+            debate_team_id=ss['debate_team_id'],
+            round_id=ss['debate_team__debate__round_id'],
+            speaker_id=ss['speaker_id'],
+            position=ss['position'],
+            score=ss['score'],
+        ))
+    SpeakerRoundAggregate.objects.bulk_create(speaker_aggregates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('standings', '0001_initial'),
+        ('results', '0011_auto_20170604_1115'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_round_aggregates, migrations.RunPython.noop),
+    ]
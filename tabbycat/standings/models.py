@@ -0,0 +1,74 @@
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+
+class TeamRoundAggregate(models.Model):
+    """Stores the results of a team in a debate, as given by the confirmed
+    ballot of that debate, in a form that can be summed across rounds by the
+    standings generator without reference to any other table. These are
+    redundant: they can all be derived from TeamScore objects, and are kept up
+    to date by signals in signals.py. To recompute them from scratch, use the
+    `rebuildstandings` management command."""
+
+    debate_team = models.OneToOneField('draw.DebateTeam', models.CASCADE,
+        verbose_name=_("debate team"))
+
+    # Denormalized from debate_team, so that standings don't need joins
+    team = models.ForeignKey('participants.Team', models.CASCADE,
+        verbose_name=_("team"))
+    round = models.ForeignKey('tournaments.Round', models.CASCADE,
+        verbose_name=_("round"))
+
+    points = models.IntegerField(default=0,
+        verbose_name=_("points"))
+    wins = models.IntegerField(default=0,
+        verbose_name=_("wins"))
+    nonforfeit_losses = models.IntegerField(default=0,
+        verbose_name=_("non-forfeit losses"))
+    score = models.FloatField(null=True, blank=True,
+        verbose_name=_("score"))
+    nonforfeit_score = models.FloatField(null=True, blank=True,
+        verbose_name=_("score excluding forfeits"))
+    margin = models.FloatField(null=True, blank=True,
+        verbose_name=_("margin"))
+    nonforfeit_margin = models.FloatField(null=True, blank=True,
+        verbose_name=_("margin excluding forfeits"))
+    votes = models.FloatField(null=True, blank=True,
+        verbose_name=_("votes"),
+        help_text=_("Fraction of votes given to this team"))
+
+    class Meta:
+        index_together = ['team', 'round']
+        verbose_name = _("team round aggregate")
+        verbose_name_plural = _("team round aggregates")
+
+    def __str__(self):
+        return "[{0.round_id}] {0.points}, {0.score} for team {0.team_id}".format(self)
+
+
+class SpeakerRoundAggregate(models.Model):
+    """Stores a (non-ghost) speech on the confirmed ballot of a debate, in a
+    form that can be aggregated across rounds by the standings generator
+    without reference to any other table. Like TeamRoundAggregate, these are
+    redundant, being derived from SpeakerScore objects."""
+
+    debate_team = models.ForeignKey('draw.DebateTeam', models.CASCADE,
+        verbose_name=_("debate team"))
+    position = models.IntegerField(verbose_name=_("position"))
+
+    # Denormalized from debate_team, so that standings don't need joins
+    speaker = models.ForeignKey('participants.Speaker', models.CASCADE,
+        verbose_name=_("speaker"))
+    round = models.ForeignKey('tournaments.Round', models.CASCADE,
+        verbose_name=_("round"))
+
+    score = models.FloatField(verbose_name=_("score"))
+
+    class Meta:
+        unique_together = [('debate_team', 'position')]
+        index_together = ['speaker', 'round']
+        verbose_name = _("speaker round aggregate")
+        verbose_name_plural = _("speaker round aggregates")
+
+    def __str__(self):
+        return "[{0.round_id}] {0.score} at {0.position} for speaker {0.speaker_id}".format(self)
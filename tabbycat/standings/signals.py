@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from results.models import BallotSubmission, SpeakerScore, TeamScore
+
+from .aggregates import update_debate_aggregates, update_speaker_aggregate, update_team_aggregate
+
+
+# Confirming a ballot submission unconfirms the others in the same debate, so
+# any change to a ballot submission could change which scores count.
+@receiver(post_delete, sender=BallotSubmission)
+@receiver(post_save, sender=BallotSubmission)
+def update_aggregates_for_ballot_submission(sender, instance, **kwargs):
+    update_debate_aggregates(instance.debate_id)
+
+
+@receiver(post_save, sender=TeamScore)
+def update_aggregate_for_team_score(sender, instance, **kwargs):
+    update_team_aggregate(instance)
+
+
+@receiver(post_save, sender=SpeakerScore)
+def update_aggregate_for_speaker_score(sender, instance, **kwargs):
+    update_speaker_aggregate(instance)
@@ -1,9 +1,8 @@
 """Standings generator for speakers."""
 
-from participants.models import Round
-
+from .aggregates import get_speaker_cumulative_metrics, get_speaker_cumulative_metrics_from_scores
 from .base import BaseStandingsGenerator
-from .metrics import QuerySetMetricAnnotator
+from .metrics import CumulativeMetricAnnotator
 from .ranking import BasicRankAnnotator
 
 
@@ -11,121 +10,76 @@ from .ranking import BasicRankAnnotator
 # Metric annotators
 # ==============================================================================
 
-class SpeakerScoreQuerySetMetricAnnotator(QuerySetMetricAnnotator):
-    """Base class for annotators for metrics based on conditional aggregations
-    of SpeakerScore instances."""
-
-    function = None  # Must be set by subclasses
-    field = None  # Must be set by subclasses
-    replies = False
-
-    @staticmethod
-    def get_annotation_metric_query_str(function, round, replies=False):
-        """Returns a string, being an SQL query that can be passed into RawSQL()."""
-        # This is what might be more concisely expressed, if it were permissible
-        # in Django, as:
-        # teams = teams.annotate_if(
-        #     models.Count('debateteam__teamscore__{field:s}'),
-        #     condition={"debateteam__teamscore__ballot_submission__confirmed": True,
-        #         "debateteam__debate__round__stage": Round.STAGE_PRELIMINARY}
-        # )
-        #
-        # That is, it adds up the relevant field on *confirmed* ballots for each
-        # team and adds them as columns to the table it returns. The standings
-        # include only preliminary rounds.
-
-        query = """
-            SELECT DISTINCT {function}(score)
-            FROM results_speakerscore
-            JOIN results_ballotsubmission ON results_speakerscore.ballot_submission_id = results_ballotsubmission.id
-            JOIN draw_debateteam ON results_speakerscore.debate_team_id = draw_debateteam.id
-            JOIN draw_debate ON draw_debateteam.debate_id = draw_debate.id
-            JOIN tournaments_round ON draw_debate.round_id = tournaments_round.id
-            WHERE results_ballotsubmission.confirmed = TRUE
-            AND results_speakerscore.speaker_id = participants_speaker.person_ptr_id
-            AND tournaments_round.stage = '""" + str(Round.STAGE_PRELIMINARY) + """'
-            AND tournaments_round.seq <= {round:d}
-            AND ghost = FALSE"""
-
-        if replies:
-            query += """
-            AND results_speakerscore.position = {position:d}""".format(position=round.tournament.reply_position)
-        else:
-            query += """
-            AND results_speakerscore.position <= {position:d}""".format(position=round.tournament.last_substantive_position)
-
-        return query.format(function=function, round=round.seq)
-
-    def get_annotation_metric_query_args(self, round):
-        return (self.function, round, self.replies)
-
-
-class TotalSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
+class SpeakerCumulativeMetricAnnotator(CumulativeMetricAnnotator):
+    """Base class for annotators for metrics based on aggregations of
+    SpeakerRoundAggregate instances, which reflect non-ghost speeches on
+    confirmed ballots. The standings include only preliminary rounds."""
+
+    get_cumulative_metrics = staticmethod(get_speaker_cumulative_metrics)
+
+
+class TotalSpeakerScoreMetricAnnotator(SpeakerCumulativeMetricAnnotator):
     """Metric annotator for total speaker score."""
     key = "speaks_sum"
     name = "total"
     abbr = "Total"
-    function = "SUM"
+    field = "speaks_sum"
 
 
-class AverageSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
+class AverageSpeakerScoreMetricAnnotator(SpeakerCumulativeMetricAnnotator):
     """Metric annotator for average speaker score."""
     key = "speaks_avg"
     name = "average"
     abbr = "Avg"
-    function = "AVG"
+    field = "speaks_avg"
 
 
-class StandardDeviationSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
+class StandardDeviationSpeakerScoreMetricAnnotator(SpeakerCumulativeMetricAnnotator):
     """Metric annotator for standard deviation of speaker score."""
     key = "speaks_stddev"
     name = "standard deviation"
     abbr = "Stdev"
-    function = "STDDEV_SAMP"
+    field = "speaks_stddev"
 
 
-class NumberOfSpeechesMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
+class NumberOfSpeechesMetricAnnotator(SpeakerCumulativeMetricAnnotator):
     """Metric annotator for number of speeches given."""
     key = "speeches_count"
     name = "speeches given"
     abbr = "Num"
-    function = "COUNT"
+    field = "speeches_count"
 
 
-class TotalReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
+class TotalReplyScoreMetricAnnotator(SpeakerCumulativeMetricAnnotator):
     """Metric annotator for total reply score."""
     key = "replies_sum"
     name = "total"
     abbr = "Total"
-    function = "SUM"
-    replies = True
+    field = "replies_sum"
 
 
-class AverageReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
+class AverageReplyScoreMetricAnnotator(SpeakerCumulativeMetricAnnotator):
     """Metric annotator for average reply score."""
     key = "replies_avg"
     name = "average"
     abbr = "Avg"
-    function = "AVG"
-    replies = True
+    field = "replies_avg"
 
 
-class StandardDeviationReplyScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
+class StandardDeviationReplyScoreMetricAnnotator(SpeakerCumulativeMetricAnnotator):
     """Metric annotator for standard deviation of reply score."""
     key = "replies_stddev"
     name = "standard deviation"
     abbr = "Stdev"
-    function = "STDDEV_SAMP"
-    replies = True
+    field = "replies_stddev"
 
 
-class NumberOfRepliesMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
+class NumberOfRepliesMetricAnnotator(SpeakerCumulativeMetricAnnotator):
     """Metric annotator for number of replies given."""
     key = "replies_count"
     name = "replies given"
     abbr = "Num"
-    function = "COUNT"
-    replies = True
+    field = "replies_count"
 
 
 # ==============================================================================
@@ -141,8 +95,15 @@ class SpeakerStandingsGenerator(BaseStandingsGenerator):
         standings = generator.generate(teams)
 
     The generate() method returns a TeamStandings object.
+
+    If the `use_aggregates` option is False, metrics are computed directly
+    from speaker scores on confirmed ballots (still in one grouped query),
+    rather than from the materialized per-round aggregates.
     """
 
+    DEFAULT_OPTIONS = BaseStandingsGenerator.DEFAULT_OPTIONS.copy()
+    DEFAULT_OPTIONS["use_aggregates"] = True
+
     TIEBREAK_FUNCTIONS = BaseStandingsGenerator.TIEBREAK_FUNCTIONS.copy()
     TIEBREAK_FUNCTIONS["name"] = lambda x: x.sort(key=lambda y: y.speaker.name)
     TIEBREAK_FUNCTIONS["institution"] = lambda x: x.sort(key=lambda y: y.speaker.team.institution.name)
@@ -161,3 +122,9 @@ class SpeakerStandingsGenerator(BaseStandingsGenerator):
     ranking_annotator_classes = {
         "rank"     : BasicRankAnnotator,
     }
+
+    def __init__(self, metrics, rankings, extra_metrics=(), **options):
+        super().__init__(metrics, rankings, extra_metrics, **options)
+        if not self.options["use_aggregates"]:
+            for annotator in self.metric_annotators:
+                annotator.get_cumulative_metrics = get_speaker_cumulative_metrics_from_scores
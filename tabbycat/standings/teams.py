@@ -2,16 +2,16 @@
 
 import logging
 
-from django.db.models import Prefetch, Sum
-from django.db.models.expressions import RawSQL
+from django.db.models import Count, Prefetch, Sum
 
 from draw.models import DebateTeam
 from draw.prefetch import populate_opponents
-from participants.models import Round
+from participants.models import Round, Team
 from results.models import TeamScore
 
+from .aggregates import get_team_cumulative_metrics
 from .base import BaseStandingsGenerator
-from .metrics import BaseMetricAnnotator, metricgetter, QuerySetMetricAnnotator, RepeatedMetricAnnotator
+from .metrics import BaseMetricAnnotator, CumulativeMetricAnnotator, metricgetter, RepeatedMetricAnnotator
 from .ranking import BasicRankAnnotator, DivisionRankAnnotator, RankFromInstitutionAnnotator, SubrankAnnotator
 
 logger = logging.getLogger(__name__)
@@ -21,61 +21,15 @@ logger = logging.getLogger(__name__)
 # Metric annotators
 # ==============================================================================
 
-class TeamScoreQuerySetMetricAnnotator(QuerySetMetricAnnotator):
-    """Base class for annotators that metrics based on conditional aggregations
-    of TeamScore instances."""
+class TeamCumulativeMetricAnnotator(CumulativeMetricAnnotator):
+    """Base class for annotators for metrics based on aggregations of
+    TeamRoundAggregate instances, which reflect confirmed ballots. The standings
+    include only preliminary rounds."""
 
-    function = None  # must be set by subclasses
-    field = None  # must be set by subclasses
+    get_cumulative_metrics = staticmethod(get_team_cumulative_metrics)
 
-    exclude_forfeits = False
-    where_value = None
 
-    @staticmethod
-    def get_annotation_metric_query_str(field, function, round=None, exclude_forfeits=False, where_value=None):
-        """Returns a string, being an SQL query that can be passed into RawSQL()."""
-        # This is what might be more concisely expressed, if it were permissible
-        # in Django, as:
-        # teams = teams.annotate_if(
-        #     models.Sum('debateteam__teamscore__{field:s}'),
-        #     condition={"debateteam__teamscore__ballot_submission__confirmed": True,
-        #         "debateteam__debate__round__stage": Round.STAGE_PRELIMINARY}
-        # )
-        #
-        # That is, it adds up the relevant field on *confirmed* ballots for each
-        # team and adds them as columns to the table it returns. The standings
-        # include only preliminary rounds.
-
-        query = """
-            SELECT DISTINCT {function}({field:s})
-            FROM results_teamscore
-            JOIN results_ballotsubmission ON results_teamscore.ballot_submission_id = results_ballotsubmission.id
-            JOIN draw_debateteam ON results_teamscore.debate_team_id = draw_debateteam.id
-            JOIN draw_debate ON draw_debateteam.debate_id = draw_debate.id
-            JOIN tournaments_round ON draw_debate.round_id = tournaments_round.id
-            WHERE results_ballotsubmission.confirmed = TRUE
-            AND draw_debateteam.team_id = participants_team.id
-            AND tournaments_round.stage = '""" + str(Round.STAGE_PRELIMINARY) + "\'"
-
-        if round is not None:
-            query += """
-            AND tournaments_round.seq <= {round:d}""".format(round=round.seq)
-
-        if exclude_forfeits:
-            query += """
-            AND results_teamscore.forfeit = FALSE"""
-
-        if where_value is not None:
-            query += """
-            AND {field:s} = """ + str(where_value)
-
-        return query.format(field=field, function=function)
-
-    def get_annotation_metric_query_args(self, round):
-        return (self.field, self.function, round, self.exclude_forfeits, self.where_value)
-
-
-class Points210MetricAnnotator(TeamScoreQuerySetMetricAnnotator):
+class Points210MetricAnnotator(TeamCumulativeMetricAnnotator):
     """Metric annotator for team points using win = 2, loss = 1, loss by forfeit = 0."""
     key = "points210"
     name = "points"
@@ -83,90 +37,84 @@ class Points210MetricAnnotator(TeamScoreQuerySetMetricAnnotator):
 
     choice_name = "Points (2/1/0)"
 
+    def get_metric(self, metrics):
+        # Wins include forfeits, losses exclude forfeits
+        return (metrics.get("wins") or 0) * 2 + (metrics.get("nonforfeit_losses") or 0)
+
+    bye_points = 2  # Byes worth 2 points for WADL
+
+    @staticmethod
+    def get_bye_counts(queryset, round=None):
+        """Returns a dict mapping team IDs to the number of preliminary debates
+        up to and including `round` in which the team faced a bye team."""
+        debateteams = DebateTeam.objects.filter(team__in=queryset.all(),
+                debate__debateteam__team__type=Team.TYPE_BYE,
+                debate__round__stage=Round.STAGE_PRELIMINARY)
+        if round is not None:
+            debateteams = debateteams.filter(debate__round__seq__lte=round.seq)
+        counts = debateteams.order_by().values('team_id').annotate(byes=Count('debate', distinct=True))
+        return {row['team_id']: row['byes'] for row in counts}
+
     def annotate(self, queryset, standings, round=None):
-        # Includes forfeits
-        wins_query = self.get_annotation_metric_query_str("win", "COUNT", round, False, "TRUE")
-        # Excludes forfeits
-        losses_query = self.get_annotation_metric_query_str("win", "COUNT", round, True, "FALSE")
-        query = "({wins}) * 2 + ({losses})".format(wins=wins_query, losses=losses_query)
-        sql = RawSQL(query, ())
-        logger.info("Running query: " + query)
-        queryset = queryset.annotate(metric=sql).distinct()
-
-        # Calculate bye debates
-        bye_points = 2 # Byes worth 2 points for WADL
-        from draw.models import Debate
-        from participants.models import Team
-        debates_with_byes = Debate.objects.filter(debateteam__team__type=Team.TYPE_BYE,
-                                                  round__stage=Round.STAGE_PRELIMINARY)
-        for item in queryset:
-            byes = debates_with_byes.filter(debateteam__team=item).count()
-            wins_including_byes = item.metric + byes * bye_points
-            # Manually implement annotate_with_queryset()
-            standings.add_metric(item, self.key, wins_including_byes)
-
-
-class PointsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
+        super().annotate(queryset, standings, round)
+
+        bye_counts = self.get_bye_counts(queryset, round)
+        for info in standings.infoview():
+            info.metrics[self.key] += bye_counts.get(info.instance_id, 0) * self.bye_points
+
+
+class PointsMetricAnnotator(TeamCumulativeMetricAnnotator):
     """Metric annotator for total number of points."""
     key = "points"
     name = "points"
     abbr = "Pts"
 
-    function = "SUM"
     field = "points"
 
 
-class WinsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
+class WinsMetricAnnotator(TeamCumulativeMetricAnnotator):
     """Metric annotator for total number of wins."""
     key = "wins"
     name = "wins"
     abbr = "Wins"
 
-    function = "COUNT"
-    field = "win"
-    where_value = "TRUE"
+    field = "wins"
 
 
-class TotalSpeakerScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
+class TotalSpeakerScoreMetricAnnotator(TeamCumulativeMetricAnnotator):
     """Metric annotator for total speaker score."""
     key = "speaks_sum"
     name = "total speaker score"
     abbr = "Spk"
 
-    function = "SUM"
-    field = "score"
+    field = "speaks_sum"
 
 
-class AverageSpeakerScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
+class AverageSpeakerScoreMetricAnnotator(TeamCumulativeMetricAnnotator):
     """Metric annotator for total speaker score."""
     key = "speaks_avg"
     name = "average speaker score"
     abbr = "ASS"
-    exclude_forfeits = True
 
-    function = "AVG"
-    field = "score"
+    field = "speaks_avg"
 
 
-class SumMarginMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
+class SumMarginMetricAnnotator(TeamCumulativeMetricAnnotator):
     """Metric annotator for sum of margins."""
     key = "margin_sum"
     name = "sum of margins"
     abbr = "Marg"
 
-    function = "SUM"
-    field = "margin"
+    field = "margin_sum"
 
 
-class AverageMarginMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
+class AverageMarginMetricAnnotator(TeamCumulativeMetricAnnotator):
     """Metric annotator for average margin, excluding forfeit ballots."""
     key = "margin_avg"
     name = "average margin"
     abbr = "AWM"
 
-    function = "AVG"
-    field = "margin"
-    exclude_forfeits = True
+    field = "margin_avg"
 
 
 class DrawStrengthMetricAnnotator(BaseMetricAnnotator):
@@ -180,8 +128,8 @@ class DrawStrengthMetricAnnotator(BaseMetricAnnotator):
             return
 
         logger.info("Running points query for draw strength:")
-        points_queryset = TeamScoreQuerySetMetricAnnotator.get_annotated_queryset(
-            queryset[0].tournament.team_set.all(), "points", "points", "SUM", round)
+        points_queryset = queryset[0].tournament.team_set.all()
+        cumulative_metrics = get_team_cumulative_metrics(points_queryset, round)
 
         if round is not None:
             prefetch_queryset = DebateTeam.objects.filter(debate__round__seq__lte=round.seq)
@@ -189,7 +137,6 @@ class DrawStrengthMetricAnnotator(BaseMetricAnnotator):
             prefetch_queryset = DebateTeam.objects.filter(debate__round__stage=Round.STAGE_PRELIMINARY)
         points_queryset = points_queryset.prefetch_related(Prefetch('debateteam_set',
                 queryset=prefetch_queryset, to_attr='debateteams'))
-        points_queryset_teams = {team.id: team for team in points_queryset}
         points_queryset_debateteams = {team.id: list(team.debateteams) for team in points_queryset}
 
         populate_opponents([dt for dts in points_queryset_debateteams.values() for dt in dts])
@@ -197,13 +144,13 @@ class DrawStrengthMetricAnnotator(BaseMetricAnnotator):
         for team in queryset:
             draw_strength = 0
             for dt in points_queryset_debateteams[team.id]:
-                points = points_queryset_teams[dt.opponent.team_id].points
+                points = cumulative_metrics.get(dt.opponent.team_id, {}).get("points")
                 if points is not None: # points is None when no debates have happened
                     draw_strength += points
             standings.add_metric(team, self.key, draw_strength)
 
 
-class NumberOfAdjudicatorsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
+class NumberOfAdjudicatorsMetricAnnotator(TeamCumulativeMetricAnnotator):
     """Metric annotator for number of votes given by a panel.
 
     The metric normalizes each debate to an assumed typical panel size. For
@@ -215,14 +162,13 @@ class NumberOfAdjudicatorsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     name = "number of adjudicators who voted for this team"
     abbr = "Ballots"
     choice_name = "votes/ballots carried"
-    function = "SUM"
 
     def __init__(self, adjs_per_debate=3):
         self.adjs_per_debate = 3
 
-    @property
-    def field(self):
-        return "CAST(votes_given AS float) / NULLIF(votes_possible, 0) * {:d}".format(self.adjs_per_debate)
+    def get_metric(self, metrics):
+        votes = metrics.get("votes")
+        return votes * self.adjs_per_debate if votes is not None else None
 
     def annotate(self, queryset, standings, round=None):
         super().annotate(queryset, standings, round)
@@ -244,6 +190,7 @@ class WhoBeatWhomMetricAnnotator(RepeatedMetricAnnotator):
     name_prefix = "Who-beat-whom"
     abbr_prefix = "WBW"
     choice_name = "who-beat-whom"
+    depends_on_others = True
 
     def __init__(self, index, keys):
         if len(keys) == 0:
@@ -0,0 +1,56 @@
+from utils.tests import TournamentTestCase
+
+from participants.models import Speaker
+from results.models import BallotSubmission, TeamScore
+from standings.aggregates import (get_speaker_cumulative_metrics, get_speaker_cumulative_metrics_from_scores,
+                                  get_team_cumulative_metrics, rebuild_aggregates)
+from standings.models import SpeakerRoundAggregate, TeamRoundAggregate
+
+
+class TestRoundAggregates(TournamentTestCase):
+
+    def assertMetricsAlmostEqual(self, first, second):  # noqa: N802
+        # Standard deviations can differ by floating-point noise depending on
+        # the order in which they're accumulated
+        self.assertEqual(first.keys(), second.keys())
+        for instance_id, metrics in second.items():
+            self.assertEqual(first[instance_id].keys(), metrics.keys())
+            for key, value in metrics.items():
+                if value is None:
+                    self.assertIsNone(first[instance_id][key])
+                else:
+                    self.assertAlmostEqual(first[instance_id][key], value)
+
+    def test_signals_match_rebuild(self):
+        round = self.t.round_set.order_by('-seq').first()
+        teams = self.t.team_set.all()
+        speakers = Speaker.objects.filter(team__tournament=self.t)
+
+        team_metrics = get_team_cumulative_metrics(teams)
+        speaker_metrics = get_speaker_cumulative_metrics(speakers, round)
+        rebuild_aggregates(self.t)
+        self.assertMetricsAlmostEqual(get_team_cumulative_metrics(teams), team_metrics)
+        self.assertMetricsAlmostEqual(get_speaker_cumulative_metrics(speakers, round), speaker_metrics)
+
+    def test_speaker_metrics_from_scores(self):
+        round = self.t.round_set.order_by('-seq').first()
+        speakers = Speaker.objects.filter(team__tournament=self.t)
+        from_aggregates = get_speaker_cumulative_metrics(speakers, round)
+        from_scores = get_speaker_cumulative_metrics_from_scores(speakers, round)
+        self.assertMetricsAlmostEqual(from_scores, from_aggregates)
+
+    def test_unconfirm_ballot(self):
+        ballotsub = BallotSubmission.objects.filter(debate__round__tournament=self.t, confirmed=True).first()
+        debate_team_ids = list(TeamScore.objects.filter(ballot_submission=ballotsub).values_list(
+                'debate_team_id', flat=True))
+        self.assertTrue(TeamRoundAggregate.objects.filter(debate_team_id__in=debate_team_ids).exists())
+
+        ballotsub.confirmed = False
+        ballotsub.save()
+        self.assertFalse(TeamRoundAggregate.objects.filter(debate_team_id__in=debate_team_ids).exists())
+        self.assertFalse(SpeakerRoundAggregate.objects.filter(debate_team_id__in=debate_team_ids).exists())
+
+        ballotsub.confirmed = True
+        ballotsub.save()
+        self.assertEqual(TeamRoundAggregate.objects.filter(debate_team_id__in=debate_team_ids).count(),
+                len(debate_team_ids))
@@ -0,0 +1,69 @@
+import unittest
+
+from ..base import BaseStandingsGenerator
+from ..metrics import BaseMetricAnnotator
+from ..ranking import BasicRankAnnotator
+
+
+class Meta:
+    verbose_name = "thing"
+
+
+class Thing:
+    _meta = Meta
+
+    def __init__(self, id, score):
+        self.id = id
+        self.score = score
+
+    def __eq__(self, other):
+        return self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class ScoreMetricAnnotator(BaseMetricAnnotator):
+    key = "score"
+    name = "score"
+    abbr = "Sc"
+
+    def annotate(self, queryset, standings, round=None):
+        for info in standings.infoview():
+            info.add_metric("score", info.instance.score)
+
+
+class ThingStandingsGenerator(BaseStandingsGenerator):
+    metric_annotator_classes = {"score": ScoreMetricAnnotator}
+    ranking_annotator_classes = {"rank": BasicRankAnnotator}
+
+
+class TestGenerateFrom(unittest.TestCase):
+
+    def setUp(self):
+        self.things = [Thing(i, score) for i, score in enumerate([3, 5, 5, 1, 5, 2, 3])]
+        self.standings = ThingStandingsGenerator(("score",), ()).generate(self.things)
+
+    def test_all_instances(self):
+        generator = ThingStandingsGenerator(("score",), ("rank",))
+        derived = generator.generate_from(self.standings, self.things)
+        self.assertEqual(derived.get_instance_list(), self.standings.get_instance_list())
+        self.assertEqual([info.get_ranking("rank") for info in derived], [1, 1, 1, 4, 4, 6, 7])
+        self.assertEqual(derived.metric_keys, ["score"])
+
+    def test_subset(self):
+        subset = [thing for thing in self.things if thing.id % 2 == 0]  # scores 3, 5, 5, 3
+        generator = ThingStandingsGenerator(("score",), ("rank",))
+        derived = generator.generate_from(self.standings, subset)
+
+        # Ties should be broken in the same order as in the original standings
+        expected = [thing for thing in self.standings.get_instance_list() if thing.id % 2 == 0]
+        self.assertEqual(derived.get_instance_list(), expected)
+        self.assertEqual([info.get_ranking("rank") for info in derived], [1, 1, 3, 3])
+
+        # The original standings should be untouched
+        self.assertEqual(len(self.standings), 7)
+        self.assertEqual([info.rankings for info in self.standings], [{}] * 7)
+
+    def test_reusable_metrics(self):
+        self.assertTrue(ThingStandingsGenerator(("score",), ()).reusable_metrics)
@@ -1,6 +1,6 @@
 from django.test import TestCase
 
-from ..teams import TeamStandingsGenerator
+from standings.teams import TeamStandingsGenerator
 
 from tournaments.models import Round, Tournament
 from participants.models import Adjudicator, Institution, Team
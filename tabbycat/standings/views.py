@@ -3,15 +3,18 @@ import logging
 
 from django.conf import settings
 from django.contrib import messages
-from django.db.models import Avg, Count
+from django.db.models import Avg, Count, prefetch_related_objects
 from django.utils.html import mark_safe
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy
 from django.views.generic.base import TemplateView
 
+from breakqual.liveness import get_live_thresholds
+from breakqual.utils import liveness
 import motions.statistics as motion_statistics
 from motions.models import Motion
 from participants.models import Speaker, SpeakerCategory, Team
+from participants.prefetch import populate_win_counts
 from results.models import SpeakerScore, TeamScore
 from tournaments.mixins import PublicTournamentPageMixin, RoundMixin, SingleObjectFromTournamentMixin, TournamentMixin
 from tournaments.models import Round
@@ -362,6 +365,7 @@ class BaseTeamStandingsView(BaseStandingsView):
 
     page_title = ugettext_lazy("Team Standings")
     page_emoji = '👯'
+    show_liveness = False
 
     def get_standings(self):
         tournament = self.get_tournament()
@@ -396,12 +400,26 @@ class BaseTeamStandingsView(BaseStandingsView):
 
         table.add_ranking_columns(standings)
         table.add_team_columns([info.team for info in standings])
+        if self.show_liveness:
+            self.add_liveness_column(table, [info.team for info in standings])
 
         table.add_standings_results_columns(standings, rounds, self.show_ballots())
         table.add_metric_columns(standings)
 
         return table
 
+    def add_liveness_column(self, table, teams):
+        # Thresholds are cached, and win counts and categories are fetched in
+        # bulk, so this doesn't cost a query per team.
+        tournament = self.get_tournament()
+        if not tournament.breakcategory_set.exists():
+            return
+        thresholds = get_live_thresholds(tournament, self.get_round())
+        populate_win_counts(teams)
+        prefetch_related_objects(teams, 'break_categories')
+        header = {'key': _("Live"), 'tooltip': _("Liveness in each break category")}
+        table.add_column(header, [liveness(team, thresholds) for team in teams])
+
     def show_ballots(self):
         return False
 
@@ -413,6 +431,7 @@ class BaseTeamStandingsView(BaseStandingsView):
 class TeamStandingsView(SuperuserRequiredMixin, BaseTeamStandingsView):
     """The standard team standings view."""
     rankings = ('rank',)
+    show_liveness = True
 
 
 class DivisionStandingsView(SuperuserRequiredMixin, BaseTeamStandingsView):
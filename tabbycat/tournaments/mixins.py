@@ -15,7 +15,8 @@ from django.utils.translation import ugettext_lazy as _
 from django.views.generic.detail import SingleObjectMixin
 
 from actionlog.mixins import LogActionMixin
-from breakqual.utils import calculate_live_thresholds, determine_liveness
+from breakqual.liveness import get_live_thresholds
+from breakqual.utils import determine_liveness
 from draw.models import Debate, MultipleDebateTeamsError, NoDebateTeamFoundError
 from participants.models import Region
 from tournaments.utils import get_side_name
@@ -318,9 +319,7 @@ class DrawForDragAndDropMixin(RoundMixin):
 
     @cached_property
     def break_thresholds(self):
-        t = self.get_tournament()
-        r = self.get_round()
-        return {bc.id: calculate_live_thresholds(bc, t, r) for bc in self.break_categories}
+        return get_live_thresholds(self.get_tournament(), self.get_round())
 
     @cached_property
     def regions(self):
@@ -1,8 +1,19 @@
 from django.core.cache import cache
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
+from adjallocation.models import DebateAdjudicator
+from adjfeedback.models import AdjudicatorFeedback
+from breakqual.models import BreakCategory, BreakingTeam
+from divisions.models import Division
+from draw.models import Debate, DebateTeam
+from motions.models import Motion
+from options.models import TournamentPreferenceModel
+from participants.models import Adjudicator, Institution, Speaker, SpeakerCategory, Team
+from results.models import BallotSubmission
+from venues.models import Venue
 from tournaments.models import Round, Tournament
+from utils.cache import bump_content_version
 
 import logging
 logger = logging.getLogger(__name__)
@@ -30,3 +41,121 @@ def update_round_cache(sender, instance, **kwargs):
         logger.debug("Cleared %s tournament cache because the current round is %s" %
                 (instance.tournament.slug, instance if current_round_id == instance.id else current_round_id))
         update_tournament_cache(sender, instance.tournament, **kwargs)
+
+
+# ==============================================================================
+# Content versions for public page caching (see utils/cache.py)
+# ==============================================================================
+
+@receiver(post_delete, sender=Tournament)
+@receiver(post_save, sender=Tournament)
+def bump_tournament_content_version(sender, instance, **kwargs):
+    bump_content_version(instance.id)
+
+
+@receiver(post_delete, sender=TournamentPreferenceModel)
+@receiver(post_save, sender=TournamentPreferenceModel)
+def bump_preference_content_version(sender, instance, created=False, **kwargs):
+    # Rows are created with default values the first time preferences are
+    # read, often while a public page is rendering, and that changes nothing
+    if created and instance.value == instance.preference.default:
+        return
+    bump_content_version(instance.instance_id)
+
+
+@receiver(post_delete, sender=Round)
+@receiver(post_save, sender=Round)
+def bump_round_content_version(sender, instance, **kwargs):
+    bump_content_version(instance.tournament_id, instance.id)
+
+
+@receiver(post_delete, sender=Debate)
+@receiver(post_save, sender=Debate)
+def bump_debate_content_version(sender, instance, **kwargs):
+    # The round might not exist yet if fixtures are being loaded
+    tournament_id = Round.objects.filter(id=instance.round_id).values_list('tournament_id', flat=True).first()
+    if tournament_id is not None:
+        bump_content_version(tournament_id, instance.round_id)
+
+
+@receiver(post_delete, sender=BallotSubmission)
+@receiver(post_save, sender=BallotSubmission)
+@receiver(post_delete, sender=DebateAdjudicator)
+@receiver(post_save, sender=DebateAdjudicator)
+@receiver(post_delete, sender=DebateTeam)
+@receiver(post_save, sender=DebateTeam)
+def bump_debate_related_content_version(sender, instance, **kwargs):
+    debate_round = Debate.objects.filter(id=instance.debate_id).values_list(
+            'round__tournament_id', 'round_id').first()
+    if debate_round is not None:
+        bump_content_version(*debate_round)
+
+
+@receiver(post_delete, sender=Motion)
+@receiver(post_save, sender=Motion)
+def bump_motion_content_version(sender, instance, **kwargs):
+    tournament_id = Round.objects.filter(id=instance.round_id).values_list('tournament_id', flat=True).first()
+    if tournament_id is not None:
+        bump_content_version(tournament_id, instance.round_id)
+
+
+@receiver(post_delete, sender=Adjudicator)
+@receiver(post_save, sender=Adjudicator)
+@receiver(post_delete, sender=BreakCategory)
+@receiver(post_save, sender=BreakCategory)
+@receiver(post_delete, sender=Division)
+@receiver(post_save, sender=Division)
+@receiver(post_delete, sender=SpeakerCategory)
+@receiver(post_save, sender=SpeakerCategory)
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Venue)
+@receiver(post_save, sender=Venue)
+def bump_participant_content_version(sender, instance, **kwargs):
+    # Adjudicators and venues without a tournament are shared between
+    # tournaments, and bump_content_version(None) bumps all tournaments
+    bump_content_version(instance.tournament_id)
+
+
+@receiver(post_delete, sender=Institution)
+@receiver(post_save, sender=Institution)
+def bump_institution_content_version(sender, instance, **kwargs):
+    bump_content_version(None)
+
+
+@receiver(post_delete, sender=Speaker)
+@receiver(post_save, sender=Speaker)
+def bump_speaker_content_version(sender, instance, **kwargs):
+    tournament_id = Team.objects.filter(id=instance.team_id).values_list('tournament_id', flat=True).first()
+    if tournament_id is not None:
+        bump_content_version(tournament_id)
+
+
+@receiver(post_delete, sender=BreakingTeam)
+@receiver(post_save, sender=BreakingTeam)
+def bump_breaking_team_content_version(sender, instance, **kwargs):
+    tournament_id = BreakCategory.objects.filter(id=instance.break_category_id).values_list(
+            'tournament_id', flat=True).first()
+    if tournament_id is not None:
+        bump_content_version(tournament_id)
+
+
+@receiver(post_delete, sender=AdjudicatorFeedback)
+@receiver(post_save, sender=AdjudicatorFeedback)
+def bump_feedback_content_version(sender, instance, **kwargs):
+    adjudicator = Adjudicator.objects.filter(id=instance.adjudicator_id).values_list('tournament_id').first()
+    if adjudicator is not None:
+        bump_content_version(*adjudicator)
+
+
+@receiver(m2m_changed, sender=Team.break_categories.through)
+@receiver(m2m_changed, sender=Speaker.categories.through)
+def bump_category_membership_content_version(sender, instance, action, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, Speaker):
+        tournament_id = Team.objects.filter(id=instance.team_id).values_list('tournament_id', flat=True).first()
+    else:
+        tournament_id = instance.tournament_id
+    if tournament_id is not None:
+        bump_content_version(tournament_id)
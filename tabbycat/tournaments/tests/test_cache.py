@@ -0,0 +1,59 @@
+from django.core.cache import cache
+
+from utils.tests import TournamentTestCase
+
+
+class TestPublicPageCache(TournamentTestCase):
+
+    view_name = 'tournament-public-index'
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_conditional_request(self):
+        response = self.get_response()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(self.get_view_url(self.view_name), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_change_invalidates(self):
+        etag = self.get_response()['ETag']
+
+        round = self.t.round_set.first()
+        round.save()
+
+        response = self.client.get(self.get_view_url(self.view_name), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_team_change_invalidates(self):
+        etag = self.get_response()['ETag']
+
+        team = self.t.team_set.first()
+        team.reference = team.reference + " (renamed)"
+        team.save()
+
+        response = self.client.get(self.get_view_url(self.view_name), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_break_category_membership_invalidates(self):
+        etag = self.get_response()['ETag']
+
+        team = self.t.team_set.first()
+        team.break_categories.clear()
+
+        response = self.client.get(self.get_view_url(self.view_name), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_preference_change_invalidates(self):
+        etag = self.get_response()['ETag']
+
+        key = 'public_features__public_participants'
+        self.t.preferences[key] = not self.t.preferences[key]
+
+        response = self.client.get(self.get_view_url(self.view_name), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,86 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from participants.models import Institution, Team
+from tournaments.models import Tournament
+from utils import urlkeys
+from utils.urlkeys import delete_url_keys, populate_url_keys
+
+
+class TestUrlKeys(TestCase):
+
+    def setUp(self):
+        self.t = Tournament.objects.create(slug="urlkeys", name="URL keys")
+        self.inst = Institution.objects.create(code="Inst", name="Institution")
+
+    def tearDown(self):
+        Institution.objects.all().delete()
+        self.t.delete()
+
+    def _teams(self, n, start=0):
+        return [Team.objects.create(tournament=self.t, institution=self.inst, reference=str(i))
+                for i in range(start, start + n)]
+
+    def _keys(self):
+        return list(Team.objects.filter(tournament=self.t).values_list('url_key', flat=True))
+
+    def test_no_collisions(self):
+        # With one-character keys, collisions would be likely if existing keys
+        # weren't avoided
+        existing = self._teams(5)
+        for team, key in zip(existing, "abcde"):
+            team.url_key = key
+            team.save()
+        others = self._teams(25, start=5)
+
+        populate_url_keys(Team.objects.filter(id__in=[team.id for team in others]), length=1)
+
+        keys = self._keys()
+        self.assertNotIn(None, keys)
+        self.assertEqual(len(set(keys)), len(keys))
+        self.assertCountEqual(Team.objects.filter(id__in=[team.id for team in existing]).values_list(
+            'url_key', flat=True), "abcde")
+
+    def test_constant_queries(self):
+        small = self._teams(2)
+        with CaptureQueriesContext(connection) as small_queries:
+            populate_url_keys(Team.objects.filter(id__in=[team.id for team in small]))
+
+        large = self._teams(50, start=2)
+        with CaptureQueriesContext(connection) as large_queries:
+            populate_url_keys(Team.objects.filter(id__in=[team.id for team in large]))
+
+        self.assertEqual(len(small_queries.captured_queries), len(large_queries.captured_queries))
+        self.assertNotIn(None, self._keys())
+
+    def test_retry_on_integrity_error(self):
+        self._teams(3)
+        generate = urlkeys.generate_url_keys
+        calls = []
+
+        def clashing_then_unique(number, existing=(), length=8):
+            # The first attempt gives every team the same key, as if another
+            # process had taken keys in the meantime
+            calls.append(number)
+            if len(calls) == 1:
+                return ["clash"] * number
+            return generate(number, existing, length)
+
+        with patch('utils.urlkeys.generate_url_keys', clashing_then_unique):
+            with self.assertLogs('utils.urlkeys', 'WARNING'):
+                populate_url_keys(Team.objects.filter(tournament=self.t))
+
+        self.assertEqual(len(calls), 2)
+        keys = self._keys()
+        self.assertNotIn(None, keys)
+        self.assertNotIn("clash", keys)
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_delete(self):
+        self._teams(3)
+        populate_url_keys(Team.objects.filter(tournament=self.t))
+        delete_url_keys(Team.objects.filter(tournament=self.t))
+        self.assertEqual(self._keys(), [None] * 3)
@@ -0,0 +1,79 @@
+"""Content versions for public page caching.
+
+A content version is the time (as returned by `time.time()`) at which the
+content of a set of pages last changed. Public pages are cached under keys that
+include their content version: when something changes, the relevant content
+versions are bumped by signal receivers (see tournaments/signals.py), and
+subsequent requests miss the cache. Writes that don't send signals should call
+`bump_content_version()` themselves. As a backstop, versions expire after
+PUBLIC_PAGE_CACHE_TIMEOUT, which also invalidates pages cached under them.
+
+There are versions at three levels:
+ - the whole site, for pages covering all tournaments,
+ - a tournament, bumped by any change in that tournament, and
+ - a round, bumped by changes in that round, or by changes that affect the
+   whole tournament (like preferences), which are tracked separately so that
+   bumping them doesn't require looking up every round.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SITE_VERSION_KEY = "site_content_version"
+
+
+def _tournament_version_key(tournament_id):
+    return "%s_%s" % (tournament_id, 'content_version')
+
+
+def _tournament_wide_version_key(tournament_id):
+    return "%s_%s" % (tournament_id, 'tournament_wide_content_version')
+
+
+def _round_version_key(tournament_id, round_id):
+    return "%s_%s_%s" % (tournament_id, round_id, 'content_version')
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # If the version is missing (e.g. evicted), pages cached under older
+        # versions must not be used, so start from now.
+        cache.add(key, time.time(), settings.PUBLIC_PAGE_CACHE_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def get_content_version(tournament_id=None, round_id=None):
+    """Returns the content version for the given round, or if `round_id` is
+    None, the given tournament, or if that's also None, the whole site."""
+    if tournament_id is None:
+        return _get_version(SITE_VERSION_KEY)
+    if round_id is None:
+        return _get_version(_tournament_version_key(tournament_id))
+    return max(_get_version(_round_version_key(tournament_id, round_id)),
+               _get_version(_tournament_wide_version_key(tournament_id)))
+
+
+def bump_content_version(tournament_id, round_id=None):
+    """Marks content in the given round as changed, or if `round_id` is None,
+    content across the whole tournament. If `tournament_id` is None, marks
+    content across all tournaments as changed."""
+    if tournament_id is None:
+        from tournaments.models import Tournament
+        for tournament_id in Tournament.objects.values_list('id', flat=True):
+            bump_content_version(tournament_id)
+        return
+
+    keys = [SITE_VERSION_KEY, _tournament_version_key(tournament_id)]
+    if round_id is None:
+        keys.append(_tournament_wide_version_key(tournament_id))
+    else:
+        keys.append(_round_version_key(tournament_id, round_id))
+    cache.set_many(dict.fromkeys(keys, time.time()), settings.PUBLIC_PAGE_CACHE_TIMEOUT)
+    logger.debug("Bumped content version for tournament %s, round %s", tournament_id, round_id)
@@ -4,15 +4,18 @@ import logging
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.core.urlresolvers import reverse_lazy
 from django.forms.models import modelformset_factory
 from django.http import HttpResponseRedirect, JsonResponse
-from django.utils.decorators import method_decorator
+from django.utils.cache import get_cache_key, get_conditional_response, learn_cache_key, patch_cache_control
 from django.utils.encoding import force_text
-from django.views.decorators.cache import cache_page
+from django.utils.http import http_date
 from django.views.generic.base import ContextMixin, TemplateResponseMixin, TemplateView, View
 
+from .cache import get_content_version
+
 
 logger = logging.getLogger(__name__)
 
@@ -130,13 +133,60 @@ class SuperuserOrTabroomAssistantTemplateResponseMixin(LoginRequiredMixin, Templ
 
 
 class CacheMixin:
-    """Mixin for views that cache the page."""
+    """Mixin for views that cache the page.
+
+    Pages are cached under keys that include the content version of the round
+    or tournament in the URL (see utils/cache.py), so they're regenerated as
+    soon as content changes, and otherwise cached for `cache_timeout`. Responses carry ETag and
+    Last-Modified headers derived from the content version, and browsers must
+    revalidate them, which is cheap if nothing has changed."""
 
     cache_timeout = settings.PUBLIC_PAGE_CACHE_TIMEOUT
 
-    @method_decorator(cache_page(cache_timeout))
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+    def get_content_version(self):
+        if "round_seq" in self.kwargs and hasattr(self, "get_round"):
+            round = self.get_round()
+            return get_content_version(round.tournament_id, round.id)
+        if "tournament_slug" in self.kwargs and hasattr(self, "get_tournament"):
+            return get_content_version(self.get_tournament().id)
+        return get_content_version()
+
+    def get_etag(self, version):
+        # Logged-in users may see different pages, so they get different tags
+        authenticated = hasattr(self.request, 'user') and self.request.user.is_authenticated
+        return '"{:.6f}-{}"'.format(version, '1' if authenticated else '0')
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        version = self.get_content_version()
+        etag = self.get_etag(version)
+        last_modified = int(version)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            key_prefix = "public_page_{:.6f}".format(version)
+            cache_key = get_cache_key(request, key_prefix, 'GET', cache=cache)
+            response = cache.get(cache_key) if cache_key else None
+
+            if response is None:
+                response = super().dispatch(request, *args, **kwargs)
+                if response.status_code == 200 and not response.streaming:
+                    cache_key = learn_cache_key(request, response, self.cache_timeout, key_prefix, cache=cache)
+                    if hasattr(response, 'render') and callable(response.render):
+                        response.add_post_render_callback(
+                            lambda r: cache.set(cache_key, r, self.cache_timeout))
+                    else:
+                        cache.set(cache_key, response, self.cache_timeout)
+            else:
+                logger.debug("Serving %s from cache, version %f", request.path, version)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, no_cache=True, max_age=0)
+        return response
 
 
 class VueTableTemplateView(TemplateView):
@@ -2,10 +2,15 @@ import logging
 import random
 import string
 
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Case, CharField, Value, When
+
+from .cache import bump_content_version
 
 logger = logging.getLogger(__name__)
 
+BATCH_SIZE = 500
+
 
 def generate_url_key(length=8):
     """Generates a randomised URL key."""
@@ -13,29 +18,55 @@ def generate_url_key(length=8):
     return ''.join(random.SystemRandom().choice(chars) for _ in range(length))
 
 
+def generate_url_keys(number, existing=(), length=8):
+    """Generates a list of `number` randomised URL keys, which are all distinct
+    from each other and from the keys in `existing`."""
+    taken = set(existing)
+    keys = []
+    while len(keys) < number:
+        key = generate_url_key(length)
+        if key in taken:
+            logger.warning("URL key %s was not unique, trying again", key)
+            continue
+        taken.add(key)
+        keys.append(key)
+    return keys
+
+
 def populate_url_keys(queryset, length=8):
-    """Populates the URL key field for every instance in the given QuerySet."""
+    """Populates the URL key field for every instance in the given QuerySet.
+
+    The keys are generated in memory to be unique against all existing keys of
+    the model (fetched in one query), then written using one UPDATE query for
+    each batch of instances. If another process takes one of the keys in the
+    meantime, the whole attempt is rolled back and retried."""
+    model = queryset.model
+    pks = list(queryset.values_list('pk', flat=True))
     num_attempts = 10
-    for instance in queryset:
-        for i in range(num_attempts):
-            instance.url_key = generate_url_key(length)
-            try:
-                instance.save()
-            except IntegrityError:
-                logger.warning(
-                    "URL key was not unique, trying again (%d of %d", i,
-                    num_attempts)
-                continue
-            else:
-                break
+
+    for i in range(num_attempts):
+        existing = model.objects.filter(url_key__isnull=False).values_list('url_key', flat=True)
+        keys = generate_url_keys(len(pks), existing, length)
+        try:
+            with transaction.atomic():
+                for start in range(0, len(pks), BATCH_SIZE):
+                    batch = list(zip(pks[start:start+BATCH_SIZE], keys[start:start+BATCH_SIZE]))
+                    cases = [When(pk=pk, then=Value(key)) for pk, key in batch]
+                    model.objects.filter(pk__in=[pk for pk, key in batch]).update(
+                            url_key=Case(*cases, output_field=CharField()))
+        except IntegrityError:
+            logger.warning("URL keys were not unique, trying again (%d of %d)", i + 1, num_attempts)
+            continue
         else:
-            logger.error("Could not generate unique URL for %r after %d tries",
-                         instance, num_attempts)
+            logger.info("Populated URL keys for %d %s", len(pks), model._meta.verbose_name_plural)
+            bump_content_version(None)
             return
 
+    logger.error("Could not generate unique URL keys for %d %s after %d tries",
+                 len(pks), model._meta.verbose_name_plural, num_attempts)
+
 
 def delete_url_keys(queryset):
     """Deletes URL keys from every instance in the given QuerySet."""
-    for instance in queryset:
-        instance.url_key = None
-        instance.save()
+    queryset.update(url_key=None)
+    bump_content_version(None)
@@ -2,14 +2,31 @@ import itertools
 import logging
 import random
 
-from .models import VenueConstraint
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from adjallocation.models import DebateAdjudicator
+from adjallocation.solvers import get_assignment_solver
+from divisions.models import Division
+from draw.models import Debate
+from participants.models import Adjudicator, Institution, Team
+from utils.cache import bump_content_version
+
+from .models import VenueCategory, VenueConstraint
 
 logger = logging.getLogger(__name__)
 
 
 def allocate_venues(round, debates=None):
-    allocator = VenueAllocator()
+    """Allocates venues using the allocator selected by the tournament's
+    `venue_allocation_method` preference, and returns the allocator."""
+    if round.tournament.pref('venue_allocation_method') == 'min_cost':
+        allocator = MinCostVenueAllocator()
+    else:
+        allocator = VenueAllocator()
     allocator.allocate(round, debates)
+    return allocator
 
 
 class VenueAllocator:
@@ -20,9 +37,14 @@ class VenueAllocator:
     constraint to the debate with the lowest-priority constraint, choosing at
     random if more than one is available. This isn't guaranteed to be optimal,
     since a flexible high-priority debate might randomly choose a room demanded
-    by a picky low-priority room.
+    by a picky low-priority room. MinCostVenueAllocator doesn't have this
+    problem.
     """
 
+    # List of (debate, constraint) tuples, populated by allocators that track
+    # which constraints they couldn't meet
+    unmet_constraints = None
+
     def allocate(self, round, debates=None):
         if debates is None:
             debates = round.debate_set_with_prefetches(speakers=False)
@@ -173,3 +195,159 @@ class VenueAllocator:
             logger.debug("Saving %s for %s", venue, debate)
             debate.venue = venue
             debate.save()
+
+
+class MinCostVenueAllocator(VenueAllocator):
+    """Allocates venues by solving a single minimum-cost assignment of debates
+    to venues.
+
+    The cost of putting a debate in a venue is the sum of a cost for each
+    constraint that the venue doesn't meet, plus the amount by which the
+    venue's priority is less than that of the highest-priority venue. Each
+    subject's constraints are treated as alternatives: once a venue meets one
+    of a subject's constraints, that subject's lower-priority constraints are
+    disregarded, as in VenueAllocator. Every unmet constraint costs more than
+    any combination of venue priorities, and higher-priority constraints cost
+    more than lower-priority ones.
+
+    All constraints, adjudicator seatings and venue categories are loaded, and
+    venues are saved, in a fixed number of queries. After allocation, `unmet_constraints` is a list of
+    `(debate, constraint)` tuples, one for each constraint that wasn't met.
+    """
+
+    BATCH_SIZE = 500
+
+    def allocate(self, round, debates=None):
+        self.round = round
+        if debates is None:
+            debates = round.debate_set_with_prefetches(speakers=False, adjudicators=False, divisions=False,
+                    venues=False)
+        debates = list(debates)
+        random.shuffle(debates)  # break ties between equal-cost assignments randomly
+        venues = list(round.active_venues.order_by('-priority'))
+
+        if len(debates) > len(venues):
+            logger.error("There are %d debates but only %d venues", len(debates), len(venues))
+
+        debate_constraints = self.collect_constraints(debates)
+        cost_matrix, unmet = self.calc_cost_matrix(debates, venues, debate_constraints)
+
+        assignment = dict(get_assignment_solver().compute(cost_matrix)) if debates else {}
+        debate_venues = {}
+        self.unmet_constraints = []
+
+        for i, debate in enumerate(debates):
+            j = assignment[i]
+            venue = venues[j] if j < len(venues) else None
+            constraints = unmet[i][j]
+            debate_venues[debate] = venue
+            for vc in constraints:
+                logger.info("Unmet constraint on %s in %s: %s", debate, venue, vc)
+                self.unmet_constraints.append((debate, vc))
+
+        self.save_venues(debate_venues)
+
+    def collect_constraints(self, debates):
+        """Returns a list with an element for each debate in `debates`. Each
+        element is a list with an element for each subject of that debate that
+        has constraints, which is a list of those constraints in descending
+        order of priority."""
+
+        content_types = ContentType.objects.get_for_models(Team, Adjudicator, Institution, Division)
+
+        all_constraints = {}
+        for vc in VenueConstraint.objects.filter_for_debates(debates).select_related('category'):
+            all_constraints.setdefault((vc.subject_content_type_id, vc.subject_id), []).append(vc)
+        for constraints in all_constraints.values():
+            constraints.sort(key=lambda vc: vc.priority, reverse=True)
+
+        adjudicators = {}
+        for debate_id, adj_id in DebateAdjudicator.objects.filter(
+                debate__in=debates).values_list('debate_id', 'adjudicator_id'):
+            adjudicators.setdefault(debate_id, []).append(adj_id)
+
+        team_ct = content_types[Team].id
+        adj_ct = content_types[Adjudicator].id
+        institution_ct = content_types[Institution].id
+        division_ct = content_types[Division].id
+
+        debate_constraints = []
+        for debate in debates:
+            subjects = itertools.chain(
+                [(team_ct, team.id) for team in debate.teams],
+                [(adj_ct, adj_id) for adj_id in adjudicators.get(debate.id, [])],
+                [(institution_ct, team.institution_id) for team in debate.teams],
+                [] if debate.division_id is None else [(division_ct, debate.division_id)],
+            )
+            groups = [all_constraints[subject] for subject in dict.fromkeys(subjects) if subject in all_constraints]
+            debate_constraints.append(groups)
+            if groups:
+                logger.debug("Constraints on %s: %s", debate, groups)
+
+        return debate_constraints
+
+    def calc_cost_matrix(self, debates, venues, debate_constraints):
+        """Returns a tuple `(cost_matrix, unmet)`, where `cost_matrix[i][j]` is
+        the cost of putting `debates[i]` in `venues[j]`, and `unmet[i][j]` is
+        the list of constraints that that would leave unmet.
+
+        If there are more debates than venues, the matrix has an extra column
+        for each missing venue, standing for no venue. Having no venue leaves
+        all of a debate's constraints unmet, and costs more than any venue."""
+
+        category_ids = {vc.category_id for groups in debate_constraints for group in groups for vc in group}
+        category_venues = {category_id: set() for category_id in category_ids}
+        for category_id, venue_id in VenueCategory.venues.through.objects.filter(
+                venuecategory_id__in=category_ids).values_list('venuecategory_id', 'venue_id'):
+            category_venues[category_id].add(venue_id)
+
+        venue_costs = [venues[0].priority - venue.priority for venue in venues] if venues else []
+
+        # Make every unmet constraint cost more than all venue priorities combined
+        unit = max(venue_costs, default=0) * len(debates) + 1
+        min_priority = min((vc.priority for groups in debate_constraints for group in groups for vc in group), default=0)
+
+        nmissing = max(len(debates) - len(venues), 0)
+        no_venue_cost = max(venue_costs, default=0) + 1
+
+        cost_matrix = []
+        unmet = []
+        for groups in debate_constraints:
+            if not groups:
+                cost_matrix.append(venue_costs + [no_venue_cost] * nmissing)
+                unmet.append([[]] * (len(venues) + nmissing))
+                continue
+
+            costs = []
+            unmet_row = []
+            for venue, venue_cost in zip(venues, venue_costs):
+                unmet_constraints = []
+                for group in groups:
+                    for vc in group:
+                        if venue.id in category_venues[vc.category_id]:
+                            break
+                        unmet_constraints.append(vc)
+                costs.append(venue_cost + sum(unit * (1 + vc.priority - min_priority) for vc in unmet_constraints))
+                unmet_row.append(unmet_constraints)
+            all_constraints = [vc for group in groups for vc in group]
+            costs.extend([no_venue_cost + sum(unit * (1 + vc.priority - min_priority) for vc in all_constraints)]
+                         * nmissing)
+            unmet_row.extend([all_constraints] * nmissing)
+            cost_matrix.append(costs)
+            unmet.append(unmet_row)
+
+        return cost_matrix, unmet
+
+    def save_venues(self, debate_venues):
+        """Saves venues using one UPDATE query per batch of debates. This
+        doesn't send signals, so it bumps the round's content version itself."""
+        debate_venues = list(debate_venues.items())
+        with transaction.atomic():
+            for start in range(0, len(debate_venues), self.BATCH_SIZE):
+                batch = debate_venues[start:start+self.BATCH_SIZE]
+                cases = [When(id=debate.id, then=Value(venue.id if venue else None)) for debate, venue in batch]
+                Debate.objects.filter(id__in=[debate.id for debate, venue in batch]).update(
+                        venue=Case(*cases, output_field=IntegerField()))
+        for debate, venue in debate_venues:
+            debate.venue = venue
+        bump_content_version(self.round.tournament_id, self.round.id)
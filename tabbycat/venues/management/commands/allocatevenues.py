@@ -9,4 +9,6 @@ class Command(RoundCommand):
 
     def handle_round(self, round, **options):
         self.stdout.write("Assigning venues for all debates in round '{}'...".format(round.name))
-        allocate_venues(round)
+        allocator = allocate_venues(round)
+        for debate, constraint in allocator.unmet_constraints or []:
+            self.stdout.write(self.style.WARNING("Unmet constraint on {}: {}".format(debate, constraint)))
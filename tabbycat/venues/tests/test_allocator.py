@@ -0,0 +1,114 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from availability.utils import activate_all
+from draw.models import Debate, DebateTeam
+from participants.models import Institution, Team
+from tournaments.models import Round, Tournament
+from venues.allocator import MinCostVenueAllocator
+from venues.models import Venue, VenueCategory, VenueConstraint
+
+
+class TestMinCostVenueAllocator(TestCase):
+
+    def setUp(self):
+        self.t = Tournament.objects.create(slug="venuetest", name="Venue test")
+        self.rd = Round.objects.create(tournament=self.t, seq=1, abbreviation="R1")
+        self.inst = Institution.objects.create(code="Inst", name="Institution")
+        self.ndebates = 0
+
+    def tearDown(self):
+        DebateTeam.objects.all().delete()
+        Institution.objects.all().delete()
+        self.t.delete()
+
+    def _venues(self, n):
+        return [Venue.objects.create(tournament=self.t, name="V%d" % i, priority=100 - i) for i in range(n)]
+
+    def _debates(self, n):
+        debates = []
+        for i in range(self.ndebates, self.ndebates + n):
+            debate = Debate.objects.create(round=self.rd)
+            for side in [DebateTeam.SIDE_AFFIRMATIVE, DebateTeam.SIDE_NEGATIVE]:
+                team = Team.objects.create(tournament=self.t, institution=self.inst, reference="%d%s" % (i, side))
+                DebateTeam.objects.create(debate=debate, team=team, side=side)
+            debates.append(debate)
+        self.ndebates += n
+        return debates
+
+    def _constrain(self, debate, venues, priority):
+        category = VenueCategory.objects.create(name="Category for %d" % debate.id)
+        category.venues.set(venues)
+        team = debate.debateteam_set.first().team
+        return VenueConstraint.objects.create(category=category, priority=priority, subject=team)
+
+    def _allocate(self):
+        activate_all(self.rd)
+        allocator = MinCostVenueAllocator()
+        allocator.allocate(self.rd)
+        return allocator
+
+    def _venue_of(self, debate):
+        return Debate.objects.get(id=debate.id).venue
+
+    def test_flexible_debate_leaves_picky_debate_its_room(self):
+        # The flexible debate's constraint has higher priority, so the greedy
+        # allocator might give it the only room the picky debate can use
+        venue1, venue2 = self._venues(2)
+        flexible, picky = self._debates(2)
+        self._constrain(flexible, [venue1, venue2], priority=10)
+        self._constrain(picky, [venue1], priority=1)
+
+        for i in range(5):
+            allocator = self._allocate()
+            self.assertEqual(self._venue_of(picky), venue1)
+            self.assertEqual(self._venue_of(flexible), venue2)
+            self.assertEqual(allocator.unmet_constraints, [])
+
+    def test_unmet_constraints(self):
+        venue1, venue2 = self._venues(2)
+        high, low = self._debates(2)
+        self._constrain(high, [venue2], priority=10)
+        low_constraint = self._constrain(low, [venue2], priority=1)
+
+        allocator = self._allocate()
+        self.assertEqual(self._venue_of(high), venue2)
+        self.assertEqual(self._venue_of(low), venue1)
+        self.assertEqual(allocator.unmet_constraints, [(low, low_constraint)])
+
+    def test_more_debates_than_venues(self):
+        venues = self._venues(2)
+        debates = self._debates(3)
+        constraint = self._constrain(debates[0], venues[:1], priority=1)
+
+        allocator = self._allocate()
+        allocated = [self._venue_of(debate) for debate in debates]
+        self.assertEqual(allocated.count(None), 1)
+        self.assertCountEqual([venue for venue in allocated if venue is not None], venues)
+        self.assertEqual(allocated[0], venues[0])
+        self.assertNotIn((debates[0], constraint), allocator.unmet_constraints)
+
+    def test_unconstrained_use_highest_priority_venues(self):
+        venues = self._venues(5)
+        debates = self._debates(3)
+        self._allocate()
+        self.assertCountEqual([self._venue_of(debate) for debate in debates], venues[:3])
+
+    def test_constant_queries(self):
+        venues = self._venues(12)
+        debates = self._debates(2)
+        self._constrain(debates[0], venues[:3], priority=1)
+        activate_all(self.rd)
+        MinCostVenueAllocator().allocate(self.rd)  # warm up caches, e.g. content types
+
+        with CaptureQueriesContext(connection) as small:
+            MinCostVenueAllocator().allocate(self.rd)
+
+        for debate in self._debates(8):
+            self._constrain(debate, venues[3:6], priority=2)
+        activate_all(self.rd)
+
+        with CaptureQueriesContext(connection) as large:
+            MinCostVenueAllocator().allocate(self.rd)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))